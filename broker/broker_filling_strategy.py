@@ -30,38 +30,38 @@ class BaseFillingStrategy(object):
 
 class SimpleFillingStrategy(BaseFillingStrategy):
     def execute_buy_long_order(self, order):
-        candle = order.candle_feed.value
+        open_price = order.candle_feed.value.open
         if order.stop is None or order.stop.price is None:
             if order.limit is None or order.limit.price is None:
-                price = candle.open
+                price = open_price
             else:
-                price = min(candle.open, order.limit.price)
+                price = min(open_price, order.limit.price)
         else:
             stop = order.stop.price
-            if candle.open > stop:
+            if open_price > stop:
                 if order.limit is None or order.limit.price is None:
-                    price = candle.open
+                    price = open_price
                 else:
-                    price = min(candle.open, order.limit.price)
+                    price = min(open_price, order.limit.price)
             else:
                 price = stop
         quantity = order.quantity
         return price, quantity
     
     def execute_sell_long_order(self, order):
-        candle = order.candle_feed.value
+        open_price = order.candle_feed.value.open
         if order.stop is None or order.stop.price is None:
             if order.limit is None or order.limit.price is None:
-                price = candle.open
+                price = open_price
             else:
-                price = max(candle.open, order.limit.price)
+                price = max(open_price, order.limit.price)
         else:
             stop = order.stop.price
-            if candle.open < stop:
+            if open_price < stop:
                 if order.limit is None or order.limit.price is None:
-                    price = candle.open
+                    price = open_price
                 else:
-                    price = max(candle.open, order.limit.price)
+                    price = max(open_price, order.limit.price)
             else:
                 price = stop
         quantity = order.quantity
@@ -9,6 +9,20 @@ DEFAULT_CONV_TYPE = 'online'
 CONV_WARN = True
 
 
+def history(ticker, ttl=None, **kwargs):
+    """Download the history of a ticker with yfinance. The result is
+    served from the ResponseCache if one is set (see
+    PyTrest.feed.http_cache.set_http_cache). The ttl overrides the TTL
+    of the cache.
+    """
+    from ..feed.http_cache import cached_call
+    
+    def fetch():
+        return yf.Ticker(ticker).history(**kwargs)
+    return cached_call(f'yfinance://fx-history/{ticker}', kwargs, fetch,
+                       ttl=ttl)
+
+
 class ConvType(object):
     """Class to handle conversion between different currencies.
     
@@ -167,6 +181,7 @@ class ConvType(object):
             return self.convert_fixed(mon, new_curr, ratio, date=date)
     
     def convert_online(self, mon, new_curr, date=None):
+        latest = date is None
         if date is None:
             date = datetime.datetime.now()
         
@@ -174,21 +189,12 @@ class ConvType(object):
         if cached:
             return self.convert_cached(mon, new_curr, date=date)
         
-        start_date = (date - datetime.timedelta(days=3)).date()
-        end_date = date.date() + datetime.timedelta(days=3)
         if mon.currency == 'USD':
             ticker = new_curr.upper() + '=X'
         else:
             ticker = mon.currency + new_curr.upper() + '=X'
         
-        try:
-            data = yf.Ticker(ticker).history(start=start_date,
-                                             end=end_date,
-                                             interval='1m')
-        except:
-            data = yf.Ticker(ticker).history(start=start_date,
-                                             end=end_date,
-                                             interval='1d')
+        data = self.download_rates(ticker, None if latest else date)
         
         self.cache_data(data, mon.currency, new_curr, date)
         
@@ -200,6 +206,27 @@ class ConvType(object):
         conversion_factor = data.iloc[idx]['Low']
         return Money(mon.amount * conversion_factor, currency=new_curr)
     
+    @staticmethod
+    def download_rates(ticker, date=None):
+        """Download the exchange rates of a ticker in one minute
+        intervals (or daily if those are unavailable) around a date.
+        
+        Without a date the rates of the last days are requested by a
+        fixed period instead of a range around now. The request is then
+        the same on every day, such that a response recorded by the
+        ResponseCache is found again in its replay and offline modes. In
+        record mode it is downloaded again after one minute.
+        """
+        if date is None:
+            span = {'period': '5d', 'ttl': datetime.timedelta(minutes=1)}
+        else:
+            span = {'start': (date - datetime.timedelta(days=3)).date(),
+                    'end': date.date() + datetime.timedelta(days=3)}
+        try:
+            return history(ticker, interval='1m', **span)
+        except:
+            return history(ticker, interval='1d', **span)
+    
     def check_cached(self, old, new_curr, date=None):
         if not old in self.cache:
             return False
@@ -279,7 +306,89 @@ class ConvType(object):
     def convert_fixed(self, mon, new_curr, ratio, date=None):
         return Money(mon.amount * ratio, currency=new_curr)
     
+    def covers(self, old, new, start, end):
+        """Check if the cache contains data for a conversion from `old`
+        to `new` spanning the range from `start` to `end`.
+        """
+        if old not in self.cache or new not in self.cache[old]:
+            return False
+        data = self.cache[old][new]
+        if len(data) == 0:
+            return False
+        return data.min_dateindex <= start and end <= data.max_dateindex
+    
+    def rates(self, old, new, dates, conv_type=None, ratio=None):
+        """Return the conversion factors from one currency to another
+        for many datetimes at once.
+        
+        The cached exchange rate series is resolved once and the most
+        recent rate at or before each datetime is looked up (as-of
+        join). For the conversion type `online` the rates for the entire
+        range are downloaded at most once, if the cache does not cover
+        the range yet.
+        
+        Arguments
+        ---------
+        old : str
+            The currency to convert from.
+        new : str
+            The currency to convert to.
+        dates : list of datetime
+            The datetimes at which to determine the conversion factors.
+        conv_type : {`online` or `cached` or `fixed` or None, None}
+            The type of conversion to use. See `convert`.
+        ratio : {float or None, None}
+            The conversion ratio to use for a fixed conversion.
+        
+        Returns
+        -------
+        numpy.ndarray:
+            The conversion factors, one for each datetime in `dates`.
+        """
+        old = old.upper()
+        new = new.upper()
+        num = len(dates)
+        if old == new or num == 0:
+            return np.ones(num)
+        if conv_type is None:
+            conv_type = self.default_type
+        if conv_type == 'fixed':
+            if ratio is None:
+                ratio = 1
+                if CONV_WARN:
+                    warnings.warn(f'Missing coversion factor for fixed conversion. Using 1 as conversion factor.')
+            return np.full(num, float(ratio))
+        
+        dates = [pt.astimezone().replace(tzinfo=None) if pt.tzinfo is not None else pt
+                 for pt in dates]
+        start = min(dates)
+        end = max(dates)
+        if conv_type == 'online' and not self.covers(old, new, start, end):
+            try:
+                self.download_cache(old, new,
+                                    start_date=(start - datetime.timedelta(days=3)).date(),
+                                    end_date=(end + datetime.timedelta(days=3)).date())
+            except Exception:
+                if CONV_WARN:
+                    warnings.warn(f'Could not download conversion rates from {old} to {new}. Using cached values.')
+        
+        if old not in self.cache or new not in self.cache[old] or len(self.cache[old][new]) == 0:
+            if CONV_WARN:
+                warnings.warn(f'Did not find cached value to convert {old} to {new}. Using conversion factor of 1.')
+            return np.ones(num)
+        data = self.cache[old][new]
+        cache_index = np.array(data.index, dtype='datetime64[us]')
+        cache_data = np.array(data.data, dtype=np.float64)
+        order = np.argsort(cache_index, kind='stable')
+        cache_index = cache_index[order]
+        cache_data = cache_data[order]
+        idxs = np.searchsorted(cache_index,
+                               np.array(dates, dtype='datetime64[us]'),
+                               side='right') - 1
+        return cache_data[np.clip(idxs, 0, None)]
+    
     def update_cache(self, old, new, date=None):
+        latest = date is None
         if date is None:
             date = datetime.datetime.now()
         
@@ -287,21 +396,12 @@ class ConvType(object):
         if cached:
             return
         
-        start_date = (date - datetime.timedelta(days=3)).date()
-        end_date = date.date() + datetime.timedelta(days=3)
         if old == 'USD':
             ticker = new.upper() + '=X'
         else:
             ticker = old + new.upper() + '=X'
         
-        try:
-            data = yf.Ticker(ticker).history(start=start_date,
-                                             end=end_date,
-                                             interval='1m')
-        except:
-            data = yf.Ticker(ticker).history(start=start_date,
-                                             end=end_date,
-                                             interval='1d')
+        data = self.download_rates(ticker, None if latest else date)
         
         self.cache_data(data, old, new, date)
         self.write_cache(force=True)
@@ -316,8 +416,8 @@ class ConvType(object):
         else:
             ticker = old.upper() + new.upper() + '=X'
         
-        data = yf.Ticker(ticker).history(start=start_date, end=end_date,
-                                         period=period)
+        data = history(ticker, start=start_date, end=end_date,
+                       period=period)
         
         date = None
         if old in self.cache:
@@ -325,7 +425,7 @@ class ConvType(object):
                 if hasattr(self.cache[old][new], 'updated'):
                     date = self.cache[old][new].updated
         if date is None:
-            data.index.max().to_pydatetime()
+            date = data.index.max().to_pydatetime()
         
         self.cache_data(data, old, new, date)
         self.write_cache(force=True)
@@ -1,2 +1,11 @@
 from PyTrest.feed import basefeed
 from PyTrest.feed.basefeed import CandleFeed, YahooFeed, YahooFeedFast
+from PyTrest.feed.store import FeedStore
+from PyTrest.feed.catalog import FeedCatalog
+from PyTrest.feed.fetch import Fetcher, get_fetcher, set_fetcher
+from PyTrest.feed.http_cache import ResponseCache, get_http_cache, set_http_cache
+from PyTrest.feed.ingest import iter_csv, read_csv, csv_to_store
+from PyTrest.feed.bars import BarBuilder
+from PyTrest.feed.live import LiveFeed, SimulatedSource
+from PyTrest.feed.panel import FeedPanel
+from PyTrest.feed.synthetic import SyntheticUniverse, synthetic_feed
@@ -0,0 +1,283 @@
+from PyTrest.types import Candle
+from PyTrest.feed.basefeed import CandleFeed
+import datetime
+
+
+BAR_RULES = ('time', 'tick', 'volume', 'dollar')
+
+
+class BarBuilder(object):
+    """Aggregate a stream of ticks (timestamp, price, size) into candles.
+    
+    A bar is closed when
+    time:
+        a tick arrives at or after the end of the time interval of the
+        bar. Bars are aligned to `origin`; intervals without ticks do
+        not create bars.
+    tick:
+        it contains `size` ticks.
+    volume:
+        its volume reaches `size`.
+    dollar:
+        the sum of price times size of its ticks reaches `size`.
+    
+    Only the open, high, low, close, volume and number of ticks of the
+    open bar are kept, i.e. the state is independent of the number of
+    ticks. The closed bars are added to a CandleFeed.
+    
+    Arguments
+    ---------
+    rule : {str, 'time'}
+        One of 'time', 'tick', 'volume' or 'dollar'.
+    size : {datetime.timedelta or float, datetime.timedelta(minutes=1)}
+        The size of a bar in units of the rule. A timedelta for the
+        time rule, a number otherwise.
+    feed : {CandleFeed or None, None}
+        The feed to add the bars to. If None a new columnar CandleFeed
+        is created.
+    notify : {str, 'close'}
+        'close': A bar is added to the feed when it is closed, i.e.
+        listeners of the feed only see complete bars.
+        'update': A bar is added to the feed when it is opened and is
+        updated in place for every further tick (sending a `__setitem__`
+        event), such that listeners see every change.
+    origin : {datetime or None, None}
+        The datetime the time intervals are aligned to. If None the
+        midnight before the first tick is used.
+    name : {str, 'N/A'}
+        The name of a new feed.
+    currency : {str, 'USD'}
+        The currency of the prices and of a new feed.
+    
+    Examples
+    --------
+    >>> builder = BarBuilder(rule='time', size=datetime.timedelta(minutes=5))
+    >>> for timestamp, price, size in ticks:
+    ...     builder.add(timestamp, price, size)
+    >>> builder.flush()
+    >>> builder.feed
+    
+    Notes
+    -----
+    -A tick that exceeds the size of a volume or dollar bar is not
+     split. It closes the bar it belongs to.
+    -The dateindex of a time bar is the start of its interval. The
+     dateindex of other bars is the timestamp of their first tick. If
+     that equals the dateindex of the previous bar, it is moved by one
+     microsecond to keep the index of the feed unique.
+    -A tick that arrives after `flush` within the interval of the
+     flushed time bar reopens that bar. The bar in the feed is replaced
+     when it is closed again (or updated with every tick for
+     notify='update').
+    """
+    def __init__(self, rule='time', size=datetime.timedelta(minutes=1),
+                 feed=None, notify='close', origin=None, name='N/A',
+                 currency='USD'):
+        if rule not in BAR_RULES:
+            raise ValueError(f'Unknown rule {rule}. Use one of {BAR_RULES}.')
+        if notify not in ('close', 'update'):
+            raise ValueError(f"Unknown notify {notify}. Use 'close' or 'update'.")
+        if rule == 'time':
+            if not isinstance(size, datetime.timedelta):
+                raise TypeError('The size of time bars must be a timedelta.')
+            if size <= datetime.timedelta(0):
+                raise ValueError('The size of bars must be positive.')
+        elif size <= 0:
+            raise ValueError('The size of bars must be positive.')
+        if feed is None:
+            feed = CandleFeed(name=name, currency=currency, columnar=True)
+        self.rule = rule
+        self.size = size
+        self.feed = feed
+        self.notify = notify
+        self.origin = origin
+        self.currency = feed.currency
+        self._bar = None
+        self._last_bar = None
+        self._last_start = None
+        self._last_timestamp = None
+        self._pending = None
+    
+    @property
+    def current(self):
+        """The open bar as Candle or None if there is none.
+        """
+        if self._bar is None:
+            return None
+        return self._candle(self._bar)
+    
+    def _candle(self, bar):
+        data = {'Open': bar['open'],
+                'High': bar['high'],
+                'Low': bar['low'],
+                'Close': bar['close'],
+                'Volume': bar['volume']}
+        return Candle(data=data, currency=self.currency,
+                      timestamp=bar['start'])
+    
+    def _interval_start(self, timestamp):
+        if self.origin is None:
+            self.origin = timestamp.replace(hour=0, minute=0, second=0,
+                                            microsecond=0)
+        return self.origin + ((timestamp - self.origin) // self.size) * self.size
+    
+    def _is_full(self, bar):
+        if self.rule == 'tick':
+            return bar['ticks'] >= self.size
+        if self.rule == 'volume':
+            return bar['volume'] >= self.size
+        if self.rule == 'dollar':
+            return bar['dollar'] >= self.size
+        return False
+    
+    def _reopen(self, price, size):
+        """Continue the last closed bar, e.g. after a flush.
+        """
+        bar = self._last_bar
+        bar['high'] = max(bar['high'], price)
+        bar['low'] = min(bar['low'], price)
+        bar['close'] = price
+        bar['volume'] += size
+        bar['dollar'] += price * size
+        bar['ticks'] += 1
+        bar['reopened'] = True
+        self._bar = bar
+        if self.notify == 'update':
+            self.feed[bar['start']] = self._candle(bar)
+    
+    def _open(self, timestamp, price, size):
+        if self.rule == 'time':
+            start = self._interval_start(timestamp)
+            end = start + self.size
+            if self._last_bar is not None and start == self._last_bar['start']:
+                self._reopen(price, size)
+                return
+        else:
+            start = timestamp
+            if self._last_start is not None and start <= self._last_start:
+                start = self._last_start + datetime.timedelta(microseconds=1)
+            end = None
+        self._bar = {'start': start,
+                     'end': end,
+                     'open': price,
+                     'high': price,
+                     'low': price,
+                     'close': price,
+                     'volume': size,
+                     'dollar': price * size,
+                     'ticks': 1}
+        self._last_start = start
+        if self.notify == 'update':
+            self.feed.add_candle(start, self._candle(self._bar))
+    
+    def _close(self):
+        bar = self._bar
+        self._bar = None
+        self._last_bar = bar
+        candle = self._candle(bar)
+        if self.notify == 'close':
+            if bar.get('reopened', False):
+                self.feed[bar['start']] = candle
+            elif self._pending is not None:
+                self._pending.append(candle)
+            else:
+                self.feed.add_candle(bar['start'], candle)
+        return candle
+    
+    def add(self, timestamp, price, size=0.):
+        """Add a tick.
+        
+        Arguments
+        ---------
+        timestamp : datetime
+            The time of the tick. Must not be earlier than the previous
+            tick.
+        price : float
+            The price of the tick.
+        size : {float, 0.}
+            The traded volume of the tick.
+        
+        Returns
+        -------
+        Candle or None:
+            The bar that was closed by this tick or None.
+        """
+        if self._last_timestamp is not None and timestamp < self._last_timestamp:
+            msg = f'Tick at {timestamp} is earlier than the previous tick '
+            msg += f'at {self._last_timestamp}.'
+            raise ValueError(msg)
+        self._last_timestamp = timestamp
+        price = float(price)
+        size = float(size)
+        closed = None
+        bar = self._bar
+        if bar is not None and bar['end'] is not None and timestamp >= bar['end']:
+            closed = self._close()
+            bar = None
+        if bar is None:
+            self._open(timestamp, price, size)
+            bar = self._bar
+        else:
+            if price > bar['high']:
+                bar['high'] = price
+            if price < bar['low']:
+                bar['low'] = price
+            bar['close'] = price
+            bar['volume'] += size
+            bar['dollar'] += price * size
+            bar['ticks'] += 1
+            if self.notify == 'update':
+                self.feed[bar['start']] = self._candle(bar)
+        if self._is_full(bar):
+            closed = self._close()
+        return closed
+    
+    def add_ticks(self, timestamps, prices, sizes=None):
+        """Add multiple ticks.
+        
+        With notify='close' all bars that are closed by the ticks are
+        added to the feed at once, such that listeners of the feed
+        receive a single event.
+        
+        Arguments
+        ---------
+        timestamps : list of datetime
+            The times of the ticks.
+        prices : list of float
+            The prices of the ticks.
+        sizes : {list of float or None, None}
+            The traded volumes of the ticks. If None all sizes are 0.
+        
+        Returns
+        -------
+        list of Candle:
+            The bars that were closed.
+        """
+        if sizes is None:
+            sizes = [0.] * len(prices)
+        if self.notify == 'update':
+            closed = [self.add(*tick) for tick in zip(timestamps, prices, sizes)]
+            return [candle for candle in closed if candle is not None]
+        self._pending = []
+        try:
+            for tick in zip(timestamps, prices, sizes):
+                self.add(*tick)
+        finally:
+            pending = self._pending
+            self._pending = None
+            if len(pending) > 0:
+                self.feed.add_candles([candle.timestamp for candle in pending],
+                                      pending)
+        return pending
+    
+    def flush(self):
+        """Close the open bar, e.g. at the end of a session.
+        
+        Returns
+        -------
+        Candle or None:
+            The closed bar or None if there was no open bar.
+        """
+        if self._bar is None:
+            return None
+        return self._close()
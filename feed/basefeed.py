@@ -1,38 +1,158 @@
-from PyTrest.types import DateSeries, Candle
+from PyTrest.types import DateSeries, Candle, CandleArray, ValueArray
+from PyTrest.currency import Money
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+import bisect
 import datetime
-import yfinance as yf
 import numpy as np
 import pandas
 import os
-import requests
+import warnings
 
 
 class SubFeed(DateSeries):
+    """A DateSeries that holds one attribute (e.g. `close`) of all
+    candles of a CandleFeed. Candles that are inserted into the parent
+    CandleFeed are added to the SubFeed as well.
+    
+    Use the properties `open`, `close`, `high`, `low` and `volume` of
+    the CandleFeed to obtain a SubFeed.
+    """
     def __init__(self, candle_attribute='open', **kwargs):
         super().__init__(**kwargs)
         self.candle_attribute = candle_attribute
         self.handler.listen('insert_value', self.insert_value_action)
+        self.handler.listen('__setitem__', self.setitem_action)
     
     def insert_value_action(self, event):
-        if event.emitter is self.parent:
-            dateindex = event.args[1]
-            if 'value' in kwargs:
-                candle = kwargs['value']
-            else:
-                candle = args[2]
-            print(f"SubFeed for {self.parent.name}.{self.candle_attribute} received valid insert_value")
-            self.insert_value(dateindex,
-                              value=getattr(candle, self.candle_attribute))
+        if event.emitter is not self.parent:
+            return
+        if len(self.parent) != len(self) + 1:
+            # The parent was changed without sending an event for every
+            # new candle.
+            self.synchronize()
+            return
+        dateindex = event.args[1]
+        idx = bisect.bisect_left(self.parent.index, dateindex)
+        candle = self.parent.data[idx]
+        self.insert_value(dateindex,
+                          value=getattr(candle, self.candle_attribute))
+    
+    def setitem_action(self, event):
+        """Update the value of a candle that was replaced or changed in
+        place in the parent.
+        """
+        if event.emitter is not self.parent:
+            return
+        dateindex = event.args[1]
+        if not isinstance(dateindex, datetime.datetime):
+            return
+        idx = bisect.bisect_left(self.parent.index, dateindex)
+        if idx == len(self.parent.index) or self.parent.index[idx] != dateindex:
+            return
+        own = bisect.bisect_left(self.index, dateindex)
+        if own == len(self.index) or self.index[own] != dateindex:
+            self.synchronize()
+            return
+        self[dateindex] = getattr(self.parent.data[idx], self.candle_attribute)
+    
+    def synchronize(self):
+        """Insert the values of all candles of the parent whose
+        dateindex is missing in this SubFeed.
+        """
+        known = set(self.index)
+        for dateindex, candle in zip(self.parent.index, self.parent.data):
+            if dateindex not in known:
+                self.insert_value(dateindex,
+                                  value=getattr(candle, self.candle_attribute))
+
+
+FEED_OPERATORS = {'__add__': np.add,
+                  '__radd__': lambda a, b: np.add(b, a),
+                  '__sub__': np.subtract,
+                  '__rsub__': lambda a, b: np.subtract(b, a),
+                  '__mul__': np.multiply,
+                  '__rmul__': lambda a, b: np.multiply(b, a),
+                  '__truediv__': np.true_divide,
+                  '__rtruediv__': lambda a, b: np.true_divide(b, a)}
+
 
 class CandleFeed(DateSeries):
+    """A DateSeries of Candles.
+    
+    Arguments
+    ---------
+    name : {str, 'N/A'}
+        The name of the feed. Usually the ticker symbol.
+    currency : {str, 'USD'}
+        The currency of all candles in the feed. Candles in other
+        currencies are converted when they are added.
+    data : {list of Candle or CandleArray or None, None}
+        The candles to start from.
+    index : {list of datetime or None, None}
+        The datetimes of the candles.
+    datetime_format : {str, '%d.%m.%Y %H:%M:%S'}
+        See DateSeries.
+    handler : {EventHandler or None, None}
+        See DateSeries.
+    columnar : {bool, False}
+        Store the candles in a CandleArray, i.e. as one float64 array
+        per key instead of one Candle object per dateindex. This uses
+        far less memory and gives access to the columns without copying
+        (see `column`). The candles are then returned as CandleRows,
+        which are created on access. Is set automatically when `data` is
+        a CandleArray.
+    """
     def __init__(self, name='N/A', currency='USD', data=None, index=None,
-                 datetime_format='%d.%m.%Y %H:%M:%S'):
+                 datetime_format='%d.%m.%Y %H:%M:%S', handler=None,
+                 columnar=False):
+        if columnar and not isinstance(data, CandleArray):
+            data = CandleArray.from_candles(data if data is not None else [],
+                                            currency=currency)
         super().__init__(data=data, index=index,
-                         datetime_format=datetime_format)
+                         datetime_format=datetime_format, handler=handler)
+        if self.columnar:
+            self.data.index = self.index
+            if self.data.currency is None:
+                self.data.currency = currency
         self.name = name
         self.currency = currency
+        self._sub_feeds = {}
+        self._datetime_index = None
+    
+    @property
+    def columnar(self):
+        """Whether the candles are stored in a CandleArray.
+        """
+        return isinstance(self.data, CandleArray)
+    
+    def column(self, name):
+        """Return the values of one key of all candles as a float64
+        array.
+        
+        For columnar feeds the returned array is a view on the stored
+        data. Otherwise a new array is created.
+        
+        Arguments
+        ---------
+        name : str
+            Either a key of the names dictionary of the candles (e.g.
+            `close`) or a key of the candle data (e.g. `Close`).
+        
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if self.columnar:
+            if name in self.data.names:
+                name = self.data.names[name]
+            return self.data.column(name)
+        ret = np.full(len(self), np.nan)
+        for i, candle in enumerate(self.data):
+            key = candle.names.get(name, name)
+            val = candle.data.get(key)
+            if val is not None:
+                ret[i] = float(val)
+        return ret
     
     def __hash__(self):
         return hash(self.name)
@@ -51,84 +171,371 @@ class CandleFeed(DateSeries):
                             timestamp=dateindex, names=names)
             self.insert_value(dateindex, value=candle)
     
+    def add_candles(self, dateindices, candles, names=None):
+        """Add multiple candles at once.
+        
+        Candles in a currency other than the currency of the feed are
+        converted with one vectorized step per source currency (see
+        `ConvType.rates`), instead of one conversion per price. If all
+        dateindices lie after the current end of the feed, the candles
+        are appended in bulk with a single `insert_value` event (see
+        `DateSeries.extend`). Otherwise they are inserted one by one.
+        
+        Arguments
+        ---------
+        dateindices : list of datetime
+            The datetimes of the candles.
+        candles : list of Candle or dict or CandleArray
+            The candles to add. Dictionaries are interpreted as candles
+            in the currency of the feed.
+        names : {dict or None, None}
+            The names dictionary of the candles, if dictionaries are
+            given.
+        """
+        dateindices = list(dateindices)
+        if len(dateindices) != len(candles):
+            raise ValueError('Need exactly one dateindex per candle.')
+        if len(dateindices) == 0:
+            return
+        if isinstance(candles, CandleArray):
+            array = candles.copy()
+            currencies = [candles.currency] * len(candles)
+        else:
+            if names is None and isinstance(candles[0], Candle):
+                names = candles[0].names
+            array = CandleArray(names=names)
+            array.extend(candles)
+            currencies = [getattr(candle, 'currency', None) for candle in candles]
+        currencies = np.array([self.currency if cur is None else cur
+                               for cur in currencies])
+        for currency in set(currencies):
+            if currency == self.currency:
+                continue
+            mask = currencies == currency
+            dates = [date for date, use in zip(dateindices, mask) if use]
+            rates = Money.converter.rates(currency, self.currency, dates)
+            for name in ['open', 'close', 'high', 'low']:
+                array.column_by_name(name)[mask] *= rates
+        array.currency = self.currency
+        array.index = dateindices
+        
+        is_sorted = all(nxt > prev for prev, nxt in zip(dateindices[:-1],
+                                                         dateindices[1:]))
+        appends = len(self) == 0 or dateindices[0] > self.index[-1]
+        if is_sorted and appends:
+            data = array if self.columnar else array.to_list()
+            self.extend(dateindices, data)
+        else:
+            for dateindex, candle in zip(dateindices, array.to_list()):
+                self.add_candle(dateindex, candle)
+    
+    def convert(self, currency, conv_type=None, ratio=None):
+        """Convert the entire feed to another currency.
+        
+        The exchange rates for all dateindices are resolved at once (see
+        `ConvType.rates`) and the open, close, high and low prices are
+        multiplied by them in a single vectorized step.
+        
+        Arguments
+        ---------
+        currency : str
+            The currency to convert to.
+        conv_type : {`online` or `cached` or `fixed` or None, None}
+            The type of conversion to use. See `ConvType.convert`.
+        ratio : {float or None, None}
+            The conversion ratio for a fixed conversion.
+        
+        Returns
+        -------
+        CandleFeed:
+            A new columnar CandleFeed in the given currency.
+        """
+        if self.columnar:
+            array = self.data.copy()
+        else:
+            array = CandleArray.from_candles(self.data,
+                                             currency=self.currency)
+        rates = Money.converter.rates(self.currency, currency, self.index,
+                                      conv_type=conv_type, ratio=ratio)
+        for name in ['open', 'close', 'high', 'low']:
+            array.column_by_name(name)[:] *= rates
+        array.currency = currency
+        return CandleFeed(name=self.name, currency=currency, data=array,
+                          index=list(self.index),
+                          datetime_format=self.datetime_format)
+    
+    def as_candle_array(self):
+        """Return the candles of this feed as a CandleArray. For
+        columnar feeds the stored array is returned without copying.
+        """
+        if self.columnar:
+            return self.data
+        return CandleArray.from_candles(self.data, currency=self.currency,
+                                        index=self.index)
+    
+    def binary_operation(self, other, function_name):
+        """Apply an arithmetic operator to all candles at once.
+        
+        Supports the operators +, -, * and / (including their reflected
+        versions) with a number or another CandleFeed. For two feeds
+        the operation is applied to all dateindices contained in both
+        feeds and to the standard keys as well as all other keys that
+        are contained in both feeds. Numbers are applied to all keys.
+        The computation is done on the column arrays in one pass. All
+        other operations fall back to DateSeries.binary_operation.
+        
+        Returns
+        -------
+        CandleFeed:
+            A new columnar CandleFeed.
+        """
+        if function_name not in FEED_OPERATORS:
+            return super().binary_operation(other, function_name)
+        func = FEED_OPERATORS[function_name]
+        this = self.as_candle_array()
+        if isinstance(other, CandleFeed):
+            that = other.as_candle_array()
+            if self.index == other.index:
+                index = list(self.index)
+                self_idxs = slice(None)
+                other_idxs = slice(None)
+            else:
+                other_positions = {date: i for i, date in enumerate(other.index)}
+                pairs = [(i, other_positions[date])
+                         for i, date in enumerate(self.index)
+                         if date in other_positions]
+                index = [self.index[i] for i, _ in pairs]
+                self_idxs = np.array([i for i, _ in pairs], dtype=int)
+                other_idxs = np.array([j for _, j in pairs], dtype=int)
+            columns = {}
+            for name in this.required_keys:
+                columns[this.names[name]] = func(this.column_by_name(name)[self_idxs],
+                                                 that.column_by_name(name)[other_idxs])
+            self_required = {this.names[name] for name in this.required_keys}
+            other_required = {that.names[name] for name in that.required_keys}
+            extra = (this.keys() - self_required) & (that.keys() - other_required)
+            for key in extra:
+                columns[key] = func(this.column(key)[self_idxs],
+                                    that.column(key)[other_idxs])
+        elif isinstance(other, (int, float, np.number)):
+            index = list(self.index)
+            columns = {key: func(this.column(key), other)
+                       for key in this.keys()}
+        else:
+            return super().binary_operation(other, function_name)
+        data = CandleArray(columns=columns, names=this.names.copy(),
+                           currency=self.currency)
+        return CandleFeed(name=self.name, currency=self.currency, data=data,
+                          index=index, datetime_format=self.datetime_format)
+    
+    def __neg__(self):
+        return self.binary_operation(-1, '__mul__')
+    
+    def typical_price(self):
+        """The typical price (high + low + close) / 3 of all candles.
+        
+        Returns
+        -------
+        DateSeries:
+            A DateSeries of floats with the same index as this feed.
+        """
+        data = (self.column('high') + self.column('low') + self.column('close')) / 3
+        return DateSeries(data=data.tolist(), index=list(self.index),
+                          datetime_format=self.datetime_format)
+    
+    def log_returns(self, name='close'):
+        """The logarithmic returns log(x_t / x_{t-1}) of one attribute
+        of the candles.
+        
+        Arguments
+        ---------
+        name : {str, 'close'}
+            The attribute of the candles to compute the returns of.
+        
+        Returns
+        -------
+        DateSeries:
+            A DateSeries of floats with the same index as this feed. The
+            first value is None.
+        """
+        values = self.column(name)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(values[1:] / values[:-1])
+        data = [None] + returns.tolist() if len(values) > 0 else []
+        return DateSeries(data=data, index=list(self.index),
+                          datetime_format=self.datetime_format)
+    
     def value_by_name(self, name):
         return self.value.get_by_name(name)
     
+    def sub_feed(self, candle_attribute):
+        """Return the SubFeed of a candle attribute.
+        
+        The SubFeed is created on the first call and cached afterwards.
+        It is kept in sync with this feed when candles are inserted.
+        The SubFeed of a columnar feed copies the column into a
+        ValueArray, which wraps the values as Money only on access.
+        
+        Arguments
+        ---------
+        candle_attribute : str
+            The attribute of the candles to collect, i.e. one of `open`,
+            `close`, `high`, `low` or `volume`.
+        
+        Returns
+        -------
+        SubFeed
+        """
+        if candle_attribute not in self._sub_feeds:
+            if self.columnar:
+                currency = self.data.currency
+                if candle_attribute == 'volume':
+                    currency = None
+                data = ValueArray(self.column(candle_attribute),
+                                  currency=currency, nan_as_none=False)
+            else:
+                data = [getattr(candle, candle_attribute) for candle in self.data]
+            self._sub_feeds[candle_attribute] = SubFeed(data=data,
+                                                        index=list(self.index),
+                                                        datetime_format=self.datetime_format,
+                                                        parent=self,
+                                                        candle_attribute=candle_attribute)
+        return self._sub_feeds[candle_attribute]
+    
     @property
     def open(self):
-        data = []
-        for candle in self.data:
-            data.append(candle.open)
-        return SubFeed(data=data, index=self.index,
-                       datetime_format=self.datetime_format,
-                       parent=self, candle_attribute='open')
+        return self.sub_feed('open')
     
     @property
     def close(self):
-        data = []
-        for candle in self.data:
-            data.append(candle.close)
-        return SubFeed(data=data, index=self.index,
-                       datetime_format=self.datetime_format,
-                       parent=self, candle_attribute='close')
+        return self.sub_feed('close')
     
     @property
     def high(self):
-        data = []
-        for candle in self.data:
-            data.append(candle.high)
-        return SubFeed(data=data, index=self.index,
-                       datetime_format=self.datetime_format,
-                       parent=self, candle_attribute='high')
+        return self.sub_feed('high')
     
     @property
     def low(self):
-        data = []
-        for candle in self.data:
-            data.append(candle.low)
-        return SubFeed(data=data, index=self.index,
-                       datetime_format=self.datetime_format,
-                       parent=self, candle_attribute='low')
+        return self.sub_feed('low')
     
     @property
     def volume(self):
-        data = []
-        for candle in self.data:
-            data.append(candle.volume)
-        return SubFeed(data=data, index=self.index,
-                       datetime_format=self.datetime_format,
-                       parent=self, candle_attribute='volume')
+        return self.sub_feed('volume')
     vol = volume
     
     def to_dataframe(self):
-        length = 0
-        data = {}
-        for candle in self.data:
-            for key, val in candle.data.items():
-                if key not in data:
-                    data[key] = [np.nan for _ in range(length)]
-                data[key].append(float(val))
-            length += 1
-        df = pandas.DataFrame(data=data, index=self.index)
-        return df
+        """Convert the feed to a pandas DataFrame with one column per
+        key of the candles and a DatetimeIndex.
+        """
+        array = self.as_candle_array()
+        data = {key: array.column(key).copy() for key in array.keys()}
+        return pandas.DataFrame(data=data, index=self.datetime_index())
+    
+    def datetime_index(self):
+        """Return the index as a pandas.DatetimeIndex.
+        
+        Converting a list of datetimes is slow, especially for timezone
+        aware datetimes. Therefore the result is cached and reused as
+        long as the length and the first and last dateindex of the feed
+        are unchanged.
+        """
+        cached = self._datetime_index
+        if cached is not None and len(cached) == len(self.index):
+            if len(cached) == 0 or (cached[0] == self.index[0] and cached[-1] == self.index[-1]):
+                return cached
+        self._datetime_index = pandas.DatetimeIndex(self.index)
+        return self._datetime_index
+    
+    @staticmethod
+    def columns_from_dataframe(dataframe, names=None):
+        """Extract the index and the columns of a DataFrame in a form
+        that can be stored in a CandleArray.
+        
+        Arguments
+        ---------
+        dataframe : pandas.DataFrame
+            A DataFrame with a DatetimeIndex and numeric columns.
+        names : {dict or None, None}
+            The names dictionary of the candles. Used to warn about
+            missing columns.
+        
+        Returns
+        -------
+        index : list of datetime
+            The index of the DataFrame.
+        columns : dict
+            A dictionary of the form {column name: float64 array}.
+        """
+        if names is None:
+            names = Candle().names
+        index = dataframe.index.to_pydatetime().tolist()
+        columns = {str(key): dataframe[key].to_numpy(dtype=np.float64,
+                                                     na_value=np.nan)
+                   for key in dataframe.columns}
+        missing_data = [val for val in names.values() if val not in columns]
+        if len(missing_data) > 0:
+            msg = 'Data is missing required keys {}.'.format(missing_data)
+            warnings.warn(msg, RuntimeWarning)
+        return index, columns
     
     @classmethod
     def from_dataframe(cls, dataframe, name='N/A', currency='USD',
                        datetime_format='%d.%m.%Y %H:%M:%S', names=None):
-        if names is None:
-            names = Candle().names
+        """Create a columnar CandleFeed from a pandas DataFrame.
+        
+        The columns of the DataFrame are copied into the CandleArray of
+        the feed as a whole. All columns must be numeric.
+        """
+        index, columns = cls.columns_from_dataframe(dataframe, names=names)
+        data = CandleArray(columns=columns, names=names, currency=currency)
+        ret = CandleFeed(name=name, currency=currency, data=data,
+                         index=index, datetime_format=datetime_format)
+        if isinstance(dataframe.index, pandas.DatetimeIndex):
+            ret._datetime_index = dataframe.index
+        return ret
+    
+    @classmethod
+    def from_csv(cls, file_path, name='N/A', currency='USD', **kwargs):
+        """Create a columnar CandleFeed from a CSV file. The file is
+        read in chunks. See PyTrest.feed.ingest.iter_csv for the
+        supported keyword arguments.
+        """
+        from PyTrest.feed.ingest import read_csv
+        return read_csv(file_path, name=name, currency=currency, **kwargs)
+    
+    def plot(self, fig=None, ax=None, up_color='green', down_color='red',
+             max_candles=None, **kwargs):
+        """Plot the candles.
+        
+        The wicks and bodies are drawn as one collection each. Only the
+        visible candles are drawn and if there are more than fit the
+        width of the axes, they are combined into one candle per pixel
+        bucket. Zooming redraws the candles at the new resolution. See
+        `candle_renderer` to access the renderer.
+        
+        Arguments
+        ---------
+        fig : {matplotlib.pyplot.Figure or None, None}
+            The figure to plot to.
+        ax : {matplotlib.pyplot.Axes or None, None}
+            The axes to plot to.
+        up_color : {str, 'green'}
+            The color of candles that close above their open.
+        down_color : {str, 'red'}
+            The color of all other candles.
+        max_candles : {int or None, None}
+            The maximum number of drawn candles. If None it is derived
+            from the width of the axes.
+        **kwargs :
+            Passed to CandleRenderer.
         
-        index = [date.to_pydatetime() for date in dataframe.index]
-        data = []
-        for i in range(len(dataframe)):
-            data.append(Candle(data=dict(dataframe.iloc[i]),
-                               currency=currency,
-                               timestamp=index[i],
-                               names=names))
-        return CandleFeed(name=name, currency=currency, data=data,
-                          index=index, datetime_format=datetime_format)
-    
-    def plot(self, fig=None, ax=None, **kwargs):
+        Returns
+        -------
+        fig : matplotlib.pyplot.Figure
+            The figure that was used for plotting.
+        ax : matplotlib.pyplot.Axes
+            The axes that was used for plotting.
+        """
         if fig is None:
             if ax is None:
                 fig, ax = plt.subplots()
@@ -138,23 +545,85 @@ class CandleFeed(DateSeries):
         else:
             if ax is None:
                 ax = fig.add_subplot(111)
-        width = datetime.timedelta(days=0.5)
-        for date, candle in zip(self.index, self.data):
-            if candle.open < candle.close:
-                color = 'green'
-            else:
-                color = 'red'
-            ax.plot([date, date],
-                    [float(candle.low), float(candle.high)],
-                    color=color)
-            height = float(candle.close - candle.open)
-            ax.add_patch(Rectangle((date-width/2, float(candle.open)),
-                                   width,
-                                   height,
-                                   color=color))
+        self.candle_renderer(ax, up_color=up_color, down_color=down_color,
+                             max_candles=max_candles, **kwargs)
         return fig, ax
     
-    def save(self, file_path, overwrite=True):
+    def candle_renderer(self, ax, up_color='green', down_color='red',
+                        max_candles=None, **kwargs):
+        """Draw the candles on an axes and return the renderer that
+        redraws them when the axes is zoomed.
+        
+        The candles are positioned like datetimes that are plotted with
+        matplotlib, such that other DateSeries can be plotted on the
+        same axes. The dates of the axis are shown in the timezone of
+        the feed.
+        
+        Arguments
+        ---------
+        ax : matplotlib.pyplot.Axes
+            The axes to draw on.
+        up_color : {str, 'green'}
+            The color of candles that close above their open.
+        down_color : {str, 'red'}
+            The color of all other candles.
+        max_candles : {int or None, None}
+            The maximum number of drawn candles. If None it is derived
+            from the width of the axes.
+        **kwargs :
+            Passed to CandleRenderer.
+        
+        Returns
+        -------
+        PyTrest.utils.plotting.CandleRenderer
+        """
+        from PyTrest.utils.plotting import CandleRenderer
+        import matplotlib.dates as mdates
+        dtindex = self.datetime_index()
+        tz = dtindex.tz
+        if tz is not None:
+            dtindex = dtindex.tz_convert('UTC').tz_localize(None)
+        x = mdates.date2num(dtindex.to_numpy())
+        return CandleRenderer(ax, x,
+                              self.column('open'),
+                              self.column('high'),
+                              self.column('low'),
+                              self.column('close'),
+                              up_color=up_color,
+                              down_color=down_color,
+                              max_candles=max_candles,
+                              tz=tz,
+                              **kwargs)
+    
+    HDF_EXTENSIONS = ('.hdf', '.h5', '.hdf5')
+    
+    def save(self, file_path, overwrite=True, append=False):
+        """Save the feed to disk.
+        
+        Paths with one of the extensions in HDF_EXTENSIONS are written
+        as a single HDF5 file. All other paths are written as a
+        columnar FeedStore directory, which supports reading only a
+        date range (see `load`).
+        
+        Arguments
+        ---------
+        file_path : str
+            The path to save the feed to.
+        overwrite : {bool, True}
+            Whether to overwrite existing data.
+        append : {bool, False}
+            Only write the candles after the last stored dateindex to
+            an existing FeedStore instead of rewriting all of it. See
+            FeedStore.append. Ignored for HDF5 files.
+        """
+        if os.path.splitext(file_path)[1].lower() not in self.HDF_EXTENSIONS:
+            from PyTrest.feed.store import FeedStore
+            store = FeedStore(file_path)
+            if append:
+                store.append(self)
+            else:
+                store.write(self, overwrite=overwrite)
+            return
         if os.path.isfile(file_path) and not overwrite:
             raise IOError(f'File {file_path} already exists. Use overwrite to overwrite it.')
         with pandas.HDFStore(file_path, 'w') as store:
@@ -165,13 +634,43 @@ class CandleFeed(DateSeries):
             store['aux_info'] = aux_info
     
     @classmethod
-    def load(cls, file_path):
+    def load(cls, file_path, start=None, end=None, mmap=True):
+        """Load a feed that was stored with `save`.
+        
+        Arguments
+        ---------
+        file_path : str
+            The path the feed was saved to.
+        start : {datetime or None, None}
+            Only load candles at or after this datetime.
+        end : {datetime or None, None}
+            Only load candles at or before this datetime.
+        mmap : {bool, True}
+            Memory-map the columns of a FeedStore instead of reading
+            them into memory. Only the rows within the date range are
+            read from disk. Ignored for HDF5 files.
+        
+        Returns
+        -------
+        CandleFeed
+        
+        Notes
+        -----
+        -HDF5 files are always read completely. The date range is
+         applied afterwards.
+        """
+        if os.path.splitext(file_path)[1].lower() not in cls.HDF_EXTENSIONS:
+            from PyTrest.feed.store import FeedStore
+            return FeedStore(file_path).read(start=start, end=end,
+                                             mmap=mmap)
         with pandas.HDFStore(file_path, 'r') as store:
             df = store['df']
             aux_info = store['aux_info']
             name = aux_info['name'].iloc[0]
             currency = aux_info['currency'].iloc[0]
             datetime_format = aux_info['datetime_format'].iloc[0]
+        if start is not None or end is not None:
+            df = df.loc[start:end]
         return cls.from_dataframe(df, name=name, currency=currency,
                                   datetime_format=datetime_format)
     
@@ -188,40 +687,42 @@ class CandleFeed(DateSeries):
 
 
 class YahooFeed(CandleFeed):
+    """A CandleFeed with the history of a ticker from Yahoo Finance in
+    the form of yfinance.Ticker.history, i.e. with prices adjusted for
+    dividends and splits and an index in the timezone of the exchange.
+    
+    The data is downloaded with the chart API through a Fetcher, such
+    that the pooled session, the retries and the rate limit of the
+    Fetcher apply and the response is cached by the ResponseCache.
+    
+    Arguments
+    ---------
+    ticker : str
+        The ticker symbol.
+    datetime_format : {str, '%d.%m.%Y %H:%M:%S'}
+        The datetime format of the feed.
+    fetcher : {Fetcher or None, None}
+        The Fetcher to download with. Defaults to the shared Fetcher
+        (see PyTrest.feed.fetch.get_fetcher).
+    **kwargs :
+        The arguments of Fetcher.history, e.g. period (defaults to
+        `max`), interval, start, end and auto_adjust.
+    """
     def __init__(self, ticker, datetime_format='%d.%m.%Y %H:%M:%S',
-                 **kwargs):
+                 fetcher=None, **kwargs):
+        if fetcher is None:
+            from PyTrest.feed.fetch import get_fetcher
+            fetcher = get_fetcher()
         ticker_name = str(ticker)
-        ticker = yf.Ticker(ticker)
-        url = f'https://query2.finance.yahoo.com/v8/finance/chart/{ticker_name}'
-        header = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36"}
-        params = {}
-        params['range'] = "30d"
-        params['interval'] = "1d"
-        params['includePrePost'] = False
-        params['events'] = 'div,splits'
-        try:
-            response = requests.get(url=url,
-                                    params=params,
-                                    headers=header)
-
-            data = response.json()["chart"]["result"][0]
-            currency = data["meta"]["currency"]
-        except Exception:
-            currency = ticker.info['currency']
         if 'period' not in kwargs:
             kwargs['period'] = 'max'
-        dataframe = ticker.history(**kwargs)
-        
-        names = Candle().names
-        index = [date.to_pydatetime() for date in dataframe.index]
-        data = []
-        for i in range(len(dataframe)):
-            data.append(Candle(data=dict(dataframe.iloc[i]),
-                               currency=currency,
-                               timestamp=index[i],
-                               names=names))
+        dataframe, currency = fetcher.history(ticker_name, **kwargs)
+        
+        index, columns = self.columns_from_dataframe(dataframe)
+        data = CandleArray(columns=columns, currency=currency)
         super().__init__(name=ticker_name, currency=currency, data=data,
                          index=index, datetime_format=datetime_format)
+        self._datetime_index = dataframe.index
     
     def __str__(self):
         return f"YahooFeed({self.name}, start={self.min_dateindex}, end={self.max_dateindex})"
@@ -231,40 +732,41 @@ class YahooFeed(CandleFeed):
 
 
 class YahooFeedFast(CandleFeed):
-    def __init__(self, ticker, period='1y', interval='1d'):
-        url = f'https://query2.finance.yahoo.com/v8/finance/chart/{ticker}'
-
-        header = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36"}
-
-        params = {}
-        params['range'] = period.lower()
-        params['interval'] = interval.lower()
-        params['includePrePost'] = False
-        params['events'] = 'div,splits'
-
-        response = requests.get(url=url,
-                                params=params,
-                                headers=header)
-
-        data = response.json()["chart"]["result"][0]
+    """A CandleFeed with data downloaded directly from the chart API of
+    Yahoo Finance in a single request.
+    
+    Arguments
+    ---------
+    ticker : str
+        The ticker symbol.
+    period : {str, '1y'}
+        The range of the data, e.g. `1mo`, `1y` or `max`. Ignored if
+        start is given.
+    interval : {str, '1d'}
+        The length of a candle, e.g. `1m`, `1h` or `1d`.
+    start : {datetime or None, None}
+        The first datetime to download.
+    end : {datetime or None, None}
+        The last datetime to download.
+    fetcher : {Fetcher or None, None}
+        The Fetcher to download with. Defaults to the shared Fetcher
+        (see PyTrest.feed.fetch.get_fetcher). Use Fetcher.fetch_many to
+        download many tickers concurrently.
+    """
+    def __init__(self, ticker, period='1y', interval='1d', start=None,
+                 end=None, fetcher=None):
+        if fetcher is None:
+            from PyTrest.feed.fetch import get_fetcher
+            fetcher = get_fetcher()
+        data = fetcher.chart(ticker, period=period, interval=interval,
+                             start=start, end=end)
         currency = data["meta"]["currency"]
 
         times = data["timestamp"]
         prices = data["indicators"]["quote"][0]
-        payload = []
-        index = []
-        for t, h, l, o, c, v in zip(times, prices["high"], prices["low"],
-                                    prices["open"], prices["close"],
-                                    prices['volume']):
-            t = datetime.datetime.fromtimestamp(t)
-            candle = Candle(data={"High": h,
-                                  "Low": l,
-                                  "Open": o,
-                                  "Close": c,
-                                  "Volume": v},
-                            currency=currency,
-                            timestamp=t)
-            payload.append(candle)
-            index.append(t)
+        index = [datetime.datetime.fromtimestamp(t) for t in times]
+        columns = {key.capitalize(): np.array(prices[key], dtype=np.float64)
+                   for key in ['high', 'low', 'open', 'close', 'volume']}
+        payload = CandleArray(columns=columns, currency=currency)
         super().__init__(name=ticker, currency=currency, data=payload,
                          index=index)
@@ -0,0 +1,418 @@
+from PyTrest.feed.store import FeedStore, _store_lock, _compaction_pool
+from collections.abc import MutableSequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import pandas
+
+
+class FeedCatalog(object):
+    """A directory of FeedStores with an indexed metadata table.
+    
+    Each ticker is stored as FeedStore `<ticker>.feed` in the directory
+    of the catalog. The SQLite database `catalog.sqlite` holds one row
+    per ticker with its currency, timezone, first and last timestamp,
+    number of rows, the path of the store and the row offsets of its
+    segments. Queries about the stored data are answered from this table
+    without opening any data files. Feeds are only read when they are
+    accessed and are kept in memory afterwards.
+    
+    Arguments
+    ---------
+    path : str
+        The directory of the catalog. It is created if it does not
+        exist.
+    max_workers : {int or None, None}
+        The number of threads used by `load_many`. If None the default
+        of concurrent.futures.ThreadPoolExecutor is used.
+    
+    Examples
+    --------
+    >>> catalog = FeedCatalog('data')
+    >>> catalog.add(feed)
+    >>> catalog.query(start=datetime.datetime(2015, 1, 1),
+    ...               end=datetime.datetime(2020, 12, 31))
+    ['AAPL', 'MSFT']
+    >>> feed = catalog['AAPL']
+    
+    Notes
+    -----
+    -Timestamps are compared as stored by FeedStore, i.e. in UTC for
+     timezone aware feeds and as wall time for naive feeds. Naive
+     datetimes given to `query` are compared as they are.
+    """
+    db_file = 'catalog.sqlite'
+    store_extension = '.feed'
+    
+    def __init__(self, path, max_workers=None):
+        self.path = path
+        self.max_workers = max_workers
+        self._feeds = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS feeds ('
+                         'ticker TEXT PRIMARY KEY, '
+                         'name TEXT, '
+                         'currency TEXT, '
+                         'tz TEXT, '
+                         'start INTEGER, '
+                         'end INTEGER, '
+                         'rows INTEGER, '
+                         'path TEXT, '
+                         'segments TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS feeds_coverage '
+                         'ON feeds (start, end)')
+            conn.execute('CREATE INDEX IF NOT EXISTS feeds_currency '
+                         'ON feeds (currency)')
+    
+    @classmethod
+    def is_catalog(cls, path):
+        """Whether the directory contains a FeedCatalog.
+        """
+        return os.path.isfile(os.path.join(path, cls.db_file))
+    
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.path, self.db_file))
+    
+    def store_path(self, ticker):
+        return os.path.join(self.path, ticker + self.store_extension)
+    
+    def register(self, ticker):
+        """Update the metadata of a ticker from its FeedStore.
+        
+        The store is locked while its metadata is read and written to
+        the catalog, such that the registered segments are not replaced
+        by an append or compaction in the meantime.
+        """
+        store = FeedStore(self.store_path(ticker))
+        with _store_lock(store.path):
+            self._register(ticker, store)
+    
+    def _register(self, ticker, store):
+        meta = store.reload()
+        segments = []
+        offset = 0
+        for segment in meta['segments']:
+            segments.append({'id': segment['id'],
+                             'offset': offset,
+                             'rows': segment['rows'],
+                             'start': segment['start'],
+                             'end': segment['end']})
+            offset += segment['rows']
+        start = None
+        end = None
+        if len(segments) > 0:
+            start = segments[0]['start']
+            end = segments[-1]['end']
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO feeds VALUES '
+                         '(?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (ticker, meta['name'], meta['currency'],
+                          meta['tz'], start, end, offset,
+                          os.path.relpath(store.path, self.path),
+                          json.dumps(segments)))
+    
+    def refresh(self):
+        """Register all FeedStores in the directory of the catalog and
+        remove entries whose store no longer exists.
+        """
+        tickers = set()
+        for entry in os.listdir(self.path):
+            ticker, ext = os.path.splitext(entry)
+            if ext == self.store_extension and FeedStore.is_store(os.path.join(self.path, entry)):
+                tickers.add(ticker)
+                self.register(ticker)
+        with closing(self._connect()) as conn, conn:
+            for ticker in set(self.tickers()) - tickers:
+                conn.execute('DELETE FROM feeds WHERE ticker = ?',
+                             (ticker,))
+    
+    def add(self, feed, ticker=None, append=True):
+        """Store a feed and register it in the catalog.
+        
+        Arguments
+        ---------
+        feed : CandleFeed
+            The feed to store.
+        ticker : {str or None, None}
+            The ticker to store the feed under. Defaults to the name of
+            the feed.
+        append : {bool, True}
+            Only append the new candles to an existing store (see
+            FeedStore.append). Otherwise the store is rewritten.
+        
+        Returns
+        -------
+        concurrent.futures.Future or None:
+            If appending left the store with too many small segments,
+            the future of the background compaction, which finishes
+            once the ticker is registered again. Otherwise None.
+        """
+        if ticker is None:
+            ticker = feed.name
+        store = FeedStore(self.store_path(ticker))
+        with _store_lock(store.path):
+            if append:
+                store.append(feed, compact=False)
+            else:
+                store.write(feed)
+            self._register(ticker, store)
+        with self._lock:
+            self._feeds[ticker] = feed
+        if not (append and store.needs_compaction()):
+            return None
+        return _compaction_pool().submit(self._compact, ticker, store)
+    
+    def _compact(self, ticker, store):
+        """Compact the store of a ticker and register the new segments,
+        unless the ticker was removed from the catalog in the meantime.
+        """
+        with _store_lock(store.path):
+            ret = store.compact()
+            if ticker in self and store.exists():
+                self._register(ticker, store)
+        return ret
+    
+    def remove(self, ticker, delete=False):
+        """Remove a ticker from the catalog.
+        
+        Arguments
+        ---------
+        ticker : str
+            The ticker to remove.
+        delete : {bool, False}
+            Whether to delete the stored data as well.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM feeds WHERE ticker = ?', (ticker,))
+        with self._lock:
+            self._feeds.pop(ticker, None)
+        if delete:
+            shutil.rmtree(self.store_path(ticker), ignore_errors=True)
+    
+    def tickers(self):
+        """Return all tickers in the catalog in alphabetical order.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT ticker FROM feeds ORDER BY ticker')
+            return [row[0] for row in rows]
+    
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM feeds').fetchone()[0]
+    
+    def __contains__(self, ticker):
+        return self.info(ticker) is not None
+    
+    def info(self, ticker):
+        """Return the metadata of a ticker as dictionary or None if the
+        ticker is not in the catalog. The first and last timestamp are
+        returned as pandas.Timestamp.
+        """
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM feeds WHERE ticker = ?',
+                               (ticker,)).fetchone()
+        if row is None:
+            return None
+        ret = dict(row)
+        ret['segments'] = json.loads(ret['segments'])
+        ret['path'] = os.path.join(self.path, ret['path'])
+        for key in ['start', 'end']:
+            if ret[key] is not None:
+                ret[key] = pandas.Timestamp(ret[key], unit='ns')
+                if ret['tz'] is not None:
+                    ret[key] = ret[key].tz_localize('UTC').tz_convert(ret['tz'])
+        return ret
+    
+    @staticmethod
+    def _to_int(dateindex):
+        ret = pandas.Timestamp(dateindex)
+        if ret.tz is not None:
+            ret = ret.tz_convert('UTC').tz_localize(None)
+        return ret.value
+    
+    def query(self, start=None, end=None, currency=None, min_rows=None):
+        """Return the tickers whose stored data covers a date range.
+        
+        Only the metadata table is read.
+        
+        Arguments
+        ---------
+        start : {datetime or None, None}
+            Only return tickers with data at or before this datetime.
+        end : {datetime or None, None}
+            Only return tickers with data at or after this datetime.
+        currency : {str or None, None}
+            Only return tickers in this currency.
+        min_rows : {int or None, None}
+            Only return tickers with at least this many candles.
+        
+        Returns
+        -------
+        list of str:
+            The matching tickers in alphabetical order.
+        """
+        conditions = ['rows > 0']
+        params = []
+        if start is not None:
+            conditions.append('start <= ?')
+            params.append(self._to_int(start))
+        if end is not None:
+            conditions.append('end >= ?')
+            params.append(self._to_int(end))
+        if currency is not None:
+            conditions.append('currency = ?')
+            params.append(currency)
+        if min_rows is not None:
+            conditions.append('rows >= ?')
+            params.append(int(min_rows))
+        sql = 'SELECT ticker FROM feeds WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY ticker'
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute(sql, params)]
+    
+    def load(self, ticker, start=None, end=None, mmap=True):
+        """Read the feed of a ticker from disk.
+        
+        Unlike indexing the catalog, this always reads the data and does
+        not keep the feed in memory.
+        
+        Arguments
+        ---------
+        ticker : str
+            The ticker to load.
+        start : {datetime or None, None}
+            See FeedStore.read.
+        end : {datetime or None, None}
+            See FeedStore.read.
+        mmap : {bool, True}
+            See FeedStore.read.
+        
+        Returns
+        -------
+        CandleFeed
+        """
+        if ticker not in self:
+            raise KeyError(f'Ticker {ticker} is not in the catalog.')
+        return FeedStore(self.store_path(ticker)).read(start=start, end=end,
+                                                        mmap=mmap)
+    
+    def __getitem__(self, ticker):
+        """Return the feed of a ticker. The feed is read from disk on the
+        first access and kept in memory afterwards.
+        """
+        return self.load_many([ticker])[0]
+    
+    def is_loaded(self, ticker):
+        return ticker in self._feeds
+    
+    def load_many(self, tickers):
+        """Return the feeds of multiple tickers. Feeds that are not in
+        memory yet are read concurrently.
+        
+        Arguments
+        ---------
+        tickers : list of str
+            The tickers to load.
+        
+        Returns
+        -------
+        list of CandleFeed:
+            The feeds in the order of the tickers.
+        """
+        futures = {}
+        with self._lock:
+            missing = [ticker for ticker in dict.fromkeys(tickers)
+                       if ticker not in self._feeds]
+            to_start = [ticker for ticker in missing
+                        if ticker not in self._loading]
+            if len(to_start) > 0:
+                executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                for ticker in to_start:
+                    self._loading[ticker] = executor.submit(self.load, ticker)
+                executor.shutdown(wait=False)
+            for ticker in missing:
+                futures[ticker] = self._loading[ticker]
+        for ticker, future in futures.items():
+            try:
+                feed = future.result()
+            finally:
+                with self._lock:
+                    if self._loading.get(ticker) is future:
+                        del self._loading[ticker]
+            with self._lock:
+                self._feeds.setdefault(ticker, feed)
+        with self._lock:
+            return [self._feeds[ticker] for ticker in tickers]
+    
+    def feeds(self, tickers=None):
+        """Return a list of the feeds of the given tickers that is
+        filled on first access.
+        
+        Arguments
+        ---------
+        tickers : {list of str or None, None}
+            The tickers. If None all tickers in the catalog are used.
+        
+        Returns
+        -------
+        LazyFeedList
+        """
+        if tickers is None:
+            tickers = self.tickers()
+        return LazyFeedList(self, tickers)
+
+
+class LazyFeedList(MutableSequence):
+    """A list of the feeds of a FeedCatalog that loads all feeds
+    concurrently when any of them is accessed for the first time.
+    
+    Arguments
+    ---------
+    catalog : FeedCatalog
+        The catalog to load the feeds from.
+    tickers : list of str
+        The tickers of the feeds.
+    """
+    def __init__(self, catalog, tickers):
+        self.catalog = catalog
+        self.tickers = list(tickers)
+        self._feeds = None
+    
+    @property
+    def loaded(self):
+        return self._feeds is not None
+    
+    def _load(self):
+        if self._feeds is None:
+            self._feeds = self.catalog.load_many(self.tickers)
+        return self._feeds
+    
+    def __len__(self):
+        if self._feeds is None:
+            return len(self.tickers)
+        return len(self._feeds)
+    
+    def __getitem__(self, index):
+        return self._load()[index]
+    
+    def __setitem__(self, index, feed):
+        self._load()[index] = feed
+    
+    def __delitem__(self, index):
+        del self._load()[index]
+    
+    def insert(self, index, feed):
+        self._load().insert(index, feed)
+    
+    def __repr__(self):
+        if self._feeds is None:
+            return f'LazyFeedList({self.tickers}, not loaded)'
+        return repr(self._feeds)
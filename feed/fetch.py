@@ -0,0 +1,444 @@
+from PyTrest.feed.http_cache import get_http_cache
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import threading
+import time
+import numpy as np
+import pandas
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36"}
+
+
+class RateLimiter(object):
+    """A token bucket per host that limits the number of requests per
+    second.
+    
+    Arguments
+    ---------
+    rate : {float or None, None}
+        The number of requests per second that are allowed per host. If
+        None requests are not limited.
+    burst : {int, 1}
+        The number of requests that may be sent at once before the
+        rate applies.
+    """
+    def __init__(self, rate=None, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, host):
+        """Block until a request to the host may be sent.
+        """
+        if self.rate is None:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+def chart_dataframe(data, interval='1d', auto_adjust=True):
+    """Convert a chart result of the Yahoo Finance API into a DataFrame
+    of the form returned by yfinance.Ticker.history.
+    
+    Arguments
+    ---------
+    data : dict
+        The chart result as returned by `Fetcher.chart`.
+    interval : {str, '1d'}
+        The interval the data was requested with. The index of daily and
+        longer intervals is set to midnight.
+    auto_adjust : {bool, True}
+        Adjust the prices for dividends and splits.
+    
+    Returns
+    -------
+    pandas.DataFrame:
+        A DataFrame with the columns Open, High, Low, Close, Volume,
+        Dividends and Stock Splits and a DatetimeIndex in the timezone
+        of the exchange.
+    """
+    keys = ['open', 'high', 'low', 'close', 'volume']
+    times = data.get("timestamp", [])
+    quote = data.get("indicators", {}).get("quote", [{}])[0]
+    columns = {key.capitalize(): np.array(quote.get(key, [np.nan] * len(times)),
+                                          dtype=np.float64)
+               for key in keys}
+    if auto_adjust:
+        adjclose = data.get("indicators", {}).get("adjclose")
+        if adjclose:
+            adjusted = np.array(adjclose[0]["adjclose"], dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = adjusted / columns['Close']
+            for key in ['Open', 'High', 'Low']:
+                columns[key] = columns[key] * ratio
+            columns['Close'] = adjusted
+    tz = data.get("meta", {}).get("exchangeTimezoneName") or 'UTC'
+    daily = interval[-1:] in ('d', 'k', 'o')
+    
+    def to_index(timestamps):
+        index = pandas.to_datetime(np.array(timestamps, dtype=np.int64),
+                                   unit='s', utc=True).tz_convert(tz)
+        return index.normalize() if daily else index
+    index = to_index(times)
+    dataframe = pandas.DataFrame(columns, index=index)
+    events = data.get("events", {})
+    for column, name, value in [('Dividends', 'dividends',
+                                 lambda event: event["amount"]),
+                                ('Stock Splits', 'splits',
+                                 lambda event: event["numerator"] / event["denominator"])]:
+        values = np.zeros(len(index))
+        found = list(events.get(name, {}).values())
+        # Events belong to the candle they fall into
+        positions = index.searchsorted(to_index([event["date"] for event in found]),
+                                       side='right') - 1
+        for position, event in zip(positions, found):
+            if position >= 0:
+                values[position] = value(event)
+        dataframe[column] = values
+    return dataframe.dropna(how='all', subset=['Open', 'High', 'Low', 'Close'])
+
+
+class Fetcher(object):
+    """Download data over HTTP with a pooled session.
+    
+    All requests share one requests.Session, such that connections to
+    a host are reused. Multiple downloads run concurrently on a bounded
+    thread pool (see `map`). Failed requests are retried with
+    exponential backoff and requests to a host can be rate limited.
+    
+    Arguments
+    ---------
+    base_url : {str, 'https://query2.finance.yahoo.com'}
+        The URL of the Yahoo Finance API. Can be pointed to a local
+        server for testing.
+    max_workers : {int, 8}
+        The maximum number of concurrent downloads. Also the number of
+        pooled connections per host.
+    retries : {int, 3}
+        How often a failed request is retried.
+    backoff : {float, 0.5}
+        The time in seconds to wait before the first retry. The time is
+        doubled for each further retry. A Retry-After header of the
+        response takes precedence.
+    rate : {float or None, None}
+        The maximum number of requests per second per host. If None
+        requests are not limited.
+    timeout : {float, 10}
+        The timeout of a single request in seconds.
+    headers : {dict or None, None}
+        Headers sent with every request. Defaults to DEFAULT_HEADERS.
+    session : {requests.Session or None, None}
+        The session to use. If None a new session is created.
+    cache : {ResponseCache or None, None}
+        The cache for successful responses. If None the cache set with
+        set_http_cache is used.
+    """
+    retry_status = (429, 500, 502, 503, 504)
+    
+    def __init__(self, base_url='https://query2.finance.yahoo.com',
+                 max_workers=8, retries=3, backoff=0.5, rate=None,
+                 timeout=10, headers=None, session=None, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate=rate)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers,
+                                  pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        self.cache = cache
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='Fetcher')
+            return self._executor
+    
+    def close(self):
+        """Shut down the thread pool and close the session.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _retry_wait(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            try:
+                return float(retry_after)
+            except (TypeError, ValueError):
+                pass
+        return self.backoff * 2 ** attempt
+    
+    def get(self, url, params=None, key_params=None, **kwargs):
+        """Send a GET request and return the response.
+        
+        Connection errors, timeouts and responses with a status in
+        `retry_status` are retried. Other error responses raise a
+        requests.HTTPError immediately. Successful responses are stored
+        in and served from the ResponseCache, if there is one.
+        
+        Arguments
+        ---------
+        url : str
+            The URL to request.
+        params : {dict or None, None}
+            The query parameters.
+        key_params : {dict or None, None}
+            The parameters that identify the response in the cache. Only
+            needed if they differ from params, e.g. if params contain
+            the current time. Defaults to params.
+        **kwargs :
+            Passed to requests.Session.get.
+        
+        Returns
+        -------
+        requests.Response
+        """
+        cache = self.cache if self.cache is not None else get_http_cache()
+        if cache is None or cache.mode == 'off':
+            return self._get(url, params=params, **kwargs)
+        if key_params is None:
+            key_params = params
+        
+        def fetch():
+            return self._get(url, params=params, **kwargs).content
+        content = cache.get(url, key_params, fetch)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = content
+        return response
+    
+    def _get(self, url, params=None, **kwargs):
+        host = urlparse(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(host)
+            try:
+                response = self.session.get(url, params=params, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._retry_wait(attempt))
+                continue
+            if response.status_code in self.retry_status and attempt < self.retries:
+                time.sleep(self._retry_wait(attempt, response=response))
+                continue
+            response.raise_for_status()
+            return response
+    
+    def get_json(self, url, params=None, key_params=None, **kwargs):
+        return self.get(url, params=params, key_params=key_params,
+                        **kwargs).json()
+    
+    def chart(self, ticker, period='1y', interval='1d', start=None,
+              end=None):
+        """Download the chart data of a ticker from the Yahoo Finance
+        API.
+        
+        Arguments
+        ---------
+        ticker : str
+            The ticker symbol.
+        period : {str, '1y'}
+            The range of the data, e.g. `1mo`, `1y` or `max`. Ignored if
+            start is given.
+        interval : {str, '1d'}
+            The length of a candle, e.g. `1m`, `1h` or `1d`.
+        start : {datetime or None, None}
+            The first datetime to download.
+        end : {datetime or None, None}
+            The last datetime to download. Defaults to now if start is
+            given. In that case the response is cached under the current
+            date instead of the current time, such that it is found
+            again by the ResponseCache on the same day.
+        
+        Returns
+        -------
+        dict:
+            The chart result with the keys `meta`, `timestamp` and
+            `indicators`.
+        """
+        params = {'interval': interval.lower(),
+                  'includePrePost': False,
+                  'events': 'div,splits'}
+        key_params = None
+        if start is None:
+            params['range'] = period.lower()
+        else:
+            params['period1'] = int(start.timestamp())
+            if end is not None:
+                params['period2'] = int(end.timestamp())
+            else:
+                params['period2'] = int(time.time())
+                key_params = dict(params)
+                key_params['period2'] = time.strftime('%Y-%m-%d', time.gmtime())
+        url = f'{self.base_url}/v8/finance/chart/{ticker}'
+        data = self.get_json(url, params=params, key_params=key_params)
+        return data["chart"]["result"][0]
+    
+    def history(self, ticker, period='max', interval='1d', start=None,
+                end=None, auto_adjust=True):
+        """Download the history of a ticker through the chart API in the
+        form of yfinance.Ticker.history.
+        
+        Arguments
+        ---------
+        ticker : str
+            The ticker symbol.
+        period : {str, 'max'}
+            See `chart`.
+        interval : {str, '1d'}
+            See `chart`.
+        start : {datetime or str or None, None}
+            See `chart`. Strings are parsed by pandas.
+        end : {datetime or str or None, None}
+            See `chart`. Strings are parsed by pandas.
+        auto_adjust : {bool, True}
+            Adjust the prices for dividends and splits.
+        
+        Returns
+        -------
+        dataframe : pandas.DataFrame
+            See `chart_dataframe`.
+        currency : str or None
+            The currency of the prices.
+        """
+        if start is not None:
+            start = pandas.Timestamp(start).to_pydatetime()
+        if end is not None:
+            end = pandas.Timestamp(end).to_pydatetime()
+        data = self.chart(ticker, period=period, interval=interval,
+                          start=start, end=end)
+        dataframe = chart_dataframe(data, interval=interval.lower(),
+                                    auto_adjust=auto_adjust)
+        return dataframe, data["meta"].get("currency")
+    
+    def map(self, func, items, return_exceptions=False):
+        """Apply a function to all items concurrently on the thread pool
+        of the fetcher.
+        
+        Arguments
+        ---------
+        func : callable
+            The function to apply. It is called with a single item.
+        items : iterable
+            The items.
+        return_exceptions : {bool, False}
+            If True, exceptions raised by func are returned in place of
+            the result. Otherwise the first exception is raised.
+        
+        Returns
+        -------
+        list:
+            The results in the order of the items.
+        """
+        futures = [self.executor.submit(func, item) for item in items]
+        ret = []
+        for future in futures:
+            if return_exceptions:
+                try:
+                    ret.append(future.result())
+                except Exception as exc:
+                    ret.append(exc)
+            else:
+                ret.append(future.result())
+        return ret
+    
+    def fetch_many(self, tickers, period='1y', interval='1d', start=None,
+                   end=None, return_exceptions=False):
+        """Download multiple tickers concurrently as YahooFeedFast.
+        
+        Arguments
+        ---------
+        tickers : list of str
+            The ticker symbols.
+        period : {str, '1y'}
+            See `chart`.
+        interval : {str, '1d'}
+            See `chart`.
+        start : {datetime or None, None}
+            See `chart`.
+        end : {datetime or None, None}
+            See `chart`.
+        return_exceptions : {bool, False}
+            See `map`.
+        
+        Returns
+        -------
+        dict:
+            A dictionary of the form {ticker: YahooFeedFast}. With
+            return_exceptions the values of failed downloads are the
+            exceptions.
+        """
+        from PyTrest.feed import YahooFeedFast
+        
+        def fetch(ticker):
+            return YahooFeedFast(ticker, period=period, interval=interval,
+                                 start=start, end=end, fetcher=self)
+        tickers = list(tickers)
+        feeds = self.map(fetch, tickers,
+                         return_exceptions=return_exceptions)
+        return dict(zip(tickers, feeds))
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the Fetcher that is used when none is given explicitly.
+    It is created on first use.
+    """
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = Fetcher()
+        return _fetcher
+
+
+def set_fetcher(fetcher):
+    """Set the Fetcher that is used when none is given explicitly.
+    
+    Arguments
+    ---------
+    fetcher : Fetcher or None
+        The new default Fetcher. If None a new one is created on the
+        next use.
+    """
+    global _fetcher
+    with _fetcher_lock:
+        _fetcher = fetcher
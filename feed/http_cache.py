@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+
+
+MODES = ('off', 'record', 'replay', 'offline')
+
+
+class ResponseCache(object):
+    """An on-disk cache for downloaded data.
+    
+    Entries are keyed by a hash of a URL and its parameters. The
+    content is stored separately under the SHA-256 hash of its bytes,
+    such that identical responses are only stored once.
+    
+    The cache has four modes:
+    
+    off:
+        The cache is neither read nor written.
+    record:
+        Entries that are younger than their TTL are served from the
+        cache. Everything else is downloaded and stored.
+    replay:
+        All cached entries are served regardless of their age. Only
+        missing entries are downloaded and stored.
+    offline:
+        All cached entries are served regardless of their age. A missing
+        entry raises a KeyError instead of being downloaded.
+    
+    Recording a backtest once and running it again in replay or
+    offline mode makes it independent of the network and deterministic.
+    
+    Arguments
+    ---------
+    path : str
+        The directory of the cache. It is created if it does not exist.
+    mode : {str, 'record'}
+        One of 'off', 'record', 'replay' or 'offline'.
+    ttl : {float or datetime.timedelta or None, None}
+        The time after which entries are downloaded again in record
+        mode. If None entries do not expire.
+    
+    Examples
+    --------
+    >>> set_http_cache('~/.cache/pytrest', mode='record')
+    >>> feed = YahooFeed('AAPL', start='2015-01-01', end='2020-01-01')
+    >>> set_http_cache('~/.cache/pytrest', mode='offline')
+    >>> feed = YahooFeed('AAPL', start='2015-01-01', end='2020-01-01')
+    """
+    def __init__(self, path, mode='record', ttl=None):
+        if mode not in MODES:
+            raise ValueError(f'Unknown cache mode {mode}. Use one of {MODES}.')
+        self.path = os.path.expanduser(path)
+        self.mode = mode
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.path, 'keys'), exist_ok=True)
+        os.makedirs(os.path.join(self.path, 'objects'), exist_ok=True)
+    
+    @staticmethod
+    def key(url, params=None):
+        """Return the key of a URL and its parameters.
+        """
+        if params is None:
+            params = {}
+        params = sorted((str(key), str(val)) for key, val in dict(params).items())
+        raw = json.dumps([str(url), params])
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    def _key_path(self, key):
+        return os.path.join(self.path, 'keys', key + '.json')
+    
+    def _object_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], digest)
+    
+    @staticmethod
+    def _write(file_path, content, mode='wb'):
+        tmp_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, mode) as fp:
+            fp.write(content)
+        os.replace(tmp_path, file_path)
+    
+    def _seconds(self, ttl):
+        if ttl is None:
+            ttl = self.ttl
+        if ttl is None:
+            return None
+        if hasattr(ttl, 'total_seconds'):
+            return ttl.total_seconds()
+        return float(ttl)
+    
+    def lookup(self, url, params=None, ttl=None):
+        """Return the cached content of a URL or None.
+        
+        In record mode entries that are older than the TTL are treated
+        as missing.
+        
+        Arguments
+        ---------
+        url : str
+            The URL.
+        params : {dict or None, None}
+            The parameters of the request.
+        ttl : {float or datetime.timedelta or None, None}
+            Overrides the TTL of the cache.
+        
+        Returns
+        -------
+        bytes or None
+        """
+        if self.mode == 'off':
+            return None
+        try:
+            with open(self._key_path(self.key(url, params)), 'r') as fp:
+                entry = json.load(fp)
+            with open(self._object_path(entry['content']), 'rb') as fp:
+                content = fp.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        if self.mode == 'record':
+            ttl = self._seconds(ttl)
+            if ttl is not None and time.time() - entry['created'] > ttl:
+                return None
+        return content
+    
+    def store(self, url, params, content):
+        """Store the content of a URL.
+        
+        Arguments
+        ---------
+        url : str
+            The URL.
+        params : dict or None
+            The parameters of the request.
+        content : bytes
+            The content to store.
+        """
+        if self.mode in ('off', 'offline'):
+            return
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.isfile(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            self._write(object_path, content)
+        entry = {'url': str(url),
+                 'params': {str(key): str(val) for key, val in dict(params or {}).items()},
+                 'created': time.time(),
+                 'content': digest}
+        self._write(self._key_path(self.key(url, params)),
+                    json.dumps(entry), mode='w')
+    
+    def get(self, url, params, fetch, ttl=None):
+        """Return the content of a URL from the cache or fetch it.
+        
+        Arguments
+        ---------
+        url : str
+            The URL.
+        params : dict or None
+            The parameters of the request.
+        fetch : callable
+            Called without arguments on a cache miss. Must return the
+            content as bytes.
+        ttl : {float or datetime.timedelta or None, None}
+            Overrides the TTL of the cache.
+        
+        Returns
+        -------
+        bytes
+        """
+        content = self.lookup(url, params, ttl=ttl)
+        if content is not None:
+            with self._lock:
+                self.hits += 1
+            return content
+        with self._lock:
+            self.misses += 1
+        if self.mode == 'offline':
+            raise KeyError(f'{url} with parameters {params} is not cached and the cache is offline.')
+        content = fetch()
+        self.store(url, params, content)
+        return content
+    
+    def get_object(self, url, params, fetch, ttl=None):
+        """Same as `get` for arbitrary picklable objects, e.g. the
+        DataFrames returned by yfinance.
+        """
+        def fetch_bytes():
+            return pickle.dumps(fetch())
+        return pickle.loads(self.get(url, params, fetch_bytes, ttl=ttl))
+    
+    def clear(self):
+        """Delete all entries.
+        """
+        for sub in ['keys', 'objects']:
+            shutil.rmtree(os.path.join(self.path, sub), ignore_errors=True)
+            os.makedirs(os.path.join(self.path, sub), exist_ok=True)
+
+
+_http_cache = None
+
+
+def get_http_cache():
+    """Return the ResponseCache that is used for downloads or None if
+    downloads are not cached.
+    """
+    return _http_cache
+
+
+def set_http_cache(cache, mode='record', ttl=None):
+    """Set the ResponseCache that is used for all downloads of PyTrest.
+    
+    Arguments
+    ---------
+    cache : ResponseCache or str or None
+        The cache or the directory of a new cache. If None downloads are
+        not cached.
+    mode : {str, 'record'}
+        The mode of a new cache. Ignored if a ResponseCache is given.
+    ttl : {float or datetime.timedelta or None, None}
+        The TTL of a new cache. Ignored if a ResponseCache is given.
+    
+    Returns
+    -------
+    ResponseCache or None:
+        The new cache.
+    """
+    global _http_cache
+    if isinstance(cache, str):
+        cache = ResponseCache(cache, mode=mode, ttl=ttl)
+    _http_cache = cache
+    return cache
+
+
+def cached_call(url, params, fetch, ttl=None):
+    """Call fetch through the ResponseCache set with set_http_cache and
+    return its (unpickled) result. Without a cache fetch is called
+    directly.
+    
+    Arguments
+    ---------
+    url : str
+        A URL-like key of the call, e.g. `yfinance://feed/AAPL`.
+    params : dict or None
+        The parameters of the call.
+    fetch : callable
+        Called without arguments on a cache miss. The result must be
+        picklable.
+    ttl : {float or datetime.timedelta or None, None}
+        Overrides the TTL of the cache.
+    """
+    cache = _http_cache
+    if cache is None or cache.mode == 'off':
+        return fetch()
+    return cache.get_object(url, params, fetch, ttl=ttl)
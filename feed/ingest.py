@@ -0,0 +1,174 @@
+from PyTrest.types import Candle, CandleArray
+from PyTrest.feed.basefeed import CandleFeed
+from PyTrest.feed.store import FeedStore
+import numpy as np
+import pandas
+
+
+def iter_csv(file_path, names=None, date_column='Date', currency='USD',
+             chunksize=100000, date_format=None, date_unit=None, tz=None,
+             extra_columns=None, **kwargs):
+    """Read a CSV file with one candle per row in chunks.
+    
+    Only the date column and the columns of the candles are parsed and
+    each chunk is converted to float64 arrays at once, such that the
+    memory usage is bounded by the chunk size and not by the size of
+    the file. Compressed files (e.g. `.csv.gz`) are decompressed on the
+    fly.
+    
+    Arguments
+    ---------
+    file_path : str or file-like
+        The CSV file.
+    names : {dict or None, None}
+        A names dictionary as used by Candle that maps the keys `open`,
+        `close`, `high`, `low` and `volume` to the columns of the file,
+        e.g. {'open': 'o', 'close': 'c', ...}. Missing keys default to
+        the names of Candle.
+    date_column : {str, 'Date'}
+        The column that holds the timestamps.
+    currency : {str, 'USD'}
+        The currency of the prices in the file.
+    chunksize : {int, 100000}
+        The number of rows to parse at once.
+    date_format : {str or None, None}
+        The format of the timestamps as understood by
+        pandas.to_datetime. If None it is inferred.
+    date_unit : {str or None, None}
+        If the timestamps are numbers, the unit of the numbers, e.g.
+        `s` or `ms` for seconds or milliseconds since the epoch.
+    tz : {str or None, None}
+        The timezone of naive timestamps. Timezone aware timestamps are
+        converted to this timezone.
+    extra_columns : {list of str or None, None}
+        Further numeric columns to keep as data of the candles.
+    **kwargs :
+        Passed to pandas.read_csv, e.g. `sep` or `compression`.
+    
+    Yields
+    ------
+    index : pandas.DatetimeIndex
+        The timestamps of the chunk.
+    array : CandleArray
+        The candles of the chunk.
+    
+    Raises
+    ------
+    ValueError:
+        If the timestamps are not increasing across chunks. Rows within
+        a chunk are sorted and duplicate timestamps are dropped, keeping
+        the last row.
+    """
+    full_names = Candle().names
+    if names is not None:
+        full_names.update(names)
+    value_columns = list(dict.fromkeys(list(full_names.values()) + list(extra_columns or [])))
+    usecols = [date_column] + value_columns
+    dtype = {col: np.float64 for col in value_columns}
+    if date_unit is not None:
+        dtype[date_column] = np.float64
+    reader = pandas.read_csv(file_path, usecols=usecols, dtype=dtype,
+                             chunksize=chunksize, **kwargs)
+    last = None
+    with reader:
+        for chunk in reader:
+            if date_unit is not None:
+                dates = pandas.to_datetime(chunk[date_column], unit=date_unit)
+            else:
+                dates = pandas.to_datetime(chunk[date_column],
+                                           format=date_format)
+            index = pandas.DatetimeIndex(dates)
+            if tz is not None:
+                if index.tz is None:
+                    index = index.tz_localize(tz)
+                else:
+                    index = index.tz_convert(tz)
+            values = {col: chunk[col].to_numpy(dtype=np.float64)
+                      for col in value_columns}
+            if not index.is_monotonic_increasing or not index.is_unique:
+                order = np.argsort(index.asi8, kind='stable')
+                index = index[order]
+                keep = np.ones(len(index), dtype=bool)
+                keep[:-1] = index.asi8[1:] != index.asi8[:-1]
+                index = index[keep]
+                values = {col: val[order][keep] for col, val in values.items()}
+            if len(index) == 0:
+                continue
+            if last is not None and index[0] <= last:
+                msg = f'The timestamps in {file_path} are not increasing '
+                msg += f'across chunks ({index[0]} follows {last}).'
+                raise ValueError(msg)
+            last = index[-1]
+            yield index, CandleArray(columns=values, names=full_names,
+                                     currency=currency, copy=False)
+
+
+def read_csv(file_path, name='N/A', currency='USD', feed=None, **kwargs):
+    """Stream a CSV file into a columnar CandleFeed.
+    
+    Arguments
+    ---------
+    file_path : str or file-like
+        The CSV file.
+    name : {str, 'N/A'}
+        The name of a new feed.
+    currency : {str, 'USD'}
+        The currency of the prices in the file. If it differs from the
+        currency of the feed, the prices are converted.
+    feed : {CandleFeed or None, None}
+        A feed to append to. The file must only contain candles after
+        the end of the feed. If None a new columnar feed is created.
+    **kwargs :
+        See iter_csv.
+    
+    Returns
+    -------
+    CandleFeed
+    """
+    if feed is None:
+        feed = CandleFeed(name=name, currency=currency, columnar=True)
+    for index, array in iter_csv(file_path, currency=currency, **kwargs):
+        feed.add_candles(index.to_pydatetime().tolist(), array)
+    return feed
+
+
+def csv_to_store(file_path, store_path, name='N/A', currency='USD',
+                 append=False, **kwargs):
+    """Stream a CSV file into a FeedStore without keeping more than one
+    chunk in memory. Every chunk is written as a segment of the store.
+    
+    Arguments
+    ---------
+    file_path : str or file-like
+        The CSV file.
+    store_path : str
+        The directory of the FeedStore.
+    name : {str, 'N/A'}
+        The name of the stored feed.
+    currency : {str, 'USD'}
+        The currency of the prices in the file.
+    append : {bool, False}
+        Append to an existing store instead of replacing it. Only
+        candles after the end of the store are added.
+    **kwargs :
+        See iter_csv.
+    
+    Returns
+    -------
+    int:
+        The number of rows written.
+    """
+    store = FeedStore(store_path)
+    written = 0
+    for i, (index, array) in enumerate(iter_csv(file_path,
+                                                currency=currency,
+                                                **kwargs)):
+        chunk = CandleFeed(name=name, currency=currency, data=array,
+                           index=index.to_pydatetime().tolist())
+        chunk._datetime_index = index
+        if i == 0 and not append:
+            store.write(chunk)
+            written += len(chunk)
+        else:
+            written += store.append(chunk)
+    return written
@@ -0,0 +1,433 @@
+from PyTrest.types import Candle
+from PyTrest.feed.basefeed import CandleFeed
+from PyTrest.feed.bars import BarBuilder
+from collections import deque
+import bisect
+import datetime
+import threading
+import time
+import numpy as np
+
+
+POLICIES = ('block', 'drop_oldest', 'drop_newest', 'merge')
+
+
+def merge_candles(first, second):
+    """Combine two consecutive candles into one that spans both.
+    
+    Returns
+    -------
+    Candle:
+        A candle with the open of the first, the close of the second, the
+        extreme high and low and the summed volume of both.
+    """
+    data = {'Open': first.get_raw('open'),
+            'High': max(first.get_raw('high'), second.get_raw('high')),
+            'Low': min(first.get_raw('low'), second.get_raw('low')),
+            'Close': second.get_raw('close'),
+            'Volume': first.get_raw('volume') + second.get_raw('volume')}
+    return Candle(data=data, currency=first.currency,
+                  timestamp=first.timestamp)
+
+
+class LiveFeed(object):
+    """Push new candles or ticks into a CandleFeed from another thread.
+    
+    Sources push items into a bounded queue with `put_candle` or
+    `put_tick`. A consumer thread takes up to `batch_size` items at a
+    time and applies them to the feed in one step: candles through
+    CandleFeed.add_candles and ticks through a BarBuilder. Listeners of
+    the feed therefore receive a single event per batch instead of one
+    per item.
+    
+    If the queue is full, i.e. the consumer cannot keep up, the policy
+    decides what happens:
+    block:
+        The source waits until there is space in the queue.
+    drop_oldest:
+        The oldest queued item is discarded.
+    drop_newest:
+        The new item is discarded.
+    merge:
+        The two oldest queued candles are merged into one (see
+        merge_candles), such that no price range is lost. Ticks cannot
+        be merged; the oldest tick is discarded instead.
+    
+    Arguments
+    ---------
+    feed : {CandleFeed or None, None}
+        The feed to update. If None a new columnar CandleFeed is
+        created.
+    maxsize : {int, 1000}
+        The maximum number of queued items.
+    policy : {str, 'block'}
+        One of 'block', 'drop_oldest', 'drop_newest' or 'merge'.
+    batch_size : {int, 500}
+        The maximum number of items that are applied at once.
+    bars : {BarBuilder or None, None}
+        The BarBuilder that turns ticks into candles. It must add to the
+        same feed. If None a BarBuilder with one minute time bars is
+        created when the first tick arrives.
+    
+    Notes
+    -----
+    -The listeners of the feed run on the thread that applies the items:
+     the consumer thread started by `start`, or the thread that calls
+     `drain`. To run them on a thread of your choice (e.g. the thread of
+     a backtest or a GUI), do not start the consumer and call `drain`
+     from that thread periodically.
+    -A candle for a dateindex that is already part of the feed replaces
+     the existing candle. If a batch contains multiple candles for the
+     same dateindex, only the last one is applied.
+    
+    Examples
+    --------
+    >>> live = LiveFeed(policy='merge')
+    >>> source = SimulatedSource(live, interval=datetime.timedelta(minutes=1))
+    >>> with live:
+    ...     source.start()
+    ...     source.join()
+    >>> live.feed
+    """
+    def __init__(self, feed=None, maxsize=1000, policy='block',
+                 batch_size=500, bars=None):
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown policy {policy}. Use one of {POLICIES}.')
+        if feed is None:
+            feed = CandleFeed(columnar=True)
+        if bars is not None and bars.feed is not feed:
+            raise ValueError('The BarBuilder must add to the feed of the LiveFeed.')
+        self.feed = feed
+        self.maxsize = maxsize
+        self.policy = policy
+        self.batch_size = batch_size
+        self.bars = bars
+        self.queue = deque()
+        self.dropped = 0
+        self.merged = 0
+        self.applied = 0
+        self.batches = 0
+        self.error = None
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+    
+    def __len__(self):
+        return len(self.queue)
+    
+    @property
+    def running(self):
+        return self._running
+    
+    def _put(self, item, timeout=None):
+        with self._cond:
+            if len(self.queue) >= self.maxsize:
+                if self.policy == 'block':
+                    ok = self._cond.wait_for(lambda: len(self.queue) < self.maxsize or self.error is not None,
+                                             timeout=timeout)
+                    if not ok:
+                        return False
+                    if self.error is not None:
+                        raise RuntimeError('The consumer of the LiveFeed failed.') from self.error
+                elif self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                elif self.policy == 'drop_oldest':
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    self._merge_oldest()
+            self.queue.append(item)
+            self._cond.notify_all()
+        return True
+    
+    def _merge_oldest(self):
+        first = self.queue.popleft()
+        if first[0] == 'candle' and len(self.queue) > 0 and self.queue[0][0] == 'candle':
+            second = self.queue.popleft()
+            self.queue.appendleft(('candle', first[1],
+                                   merge_candles(first[2], second[2])))
+            self.merged += 1
+        else:
+            self.dropped += 1
+    
+    def put_candle(self, dateindex, candle, timeout=None):
+        """Queue a candle.
+        
+        Arguments
+        ---------
+        dateindex : datetime
+            The dateindex of the candle.
+        candle : Candle or dict
+            The candle. Dictionaries are interpreted as data of a candle
+            in the currency of the feed.
+        timeout : {float or None, None}
+            With the block policy, the maximum time in seconds to wait
+            for space in the queue.
+        
+        Returns
+        -------
+        bool:
+            Whether the candle was queued.
+        """
+        if not isinstance(candle, Candle):
+            candle = Candle(data=candle, currency=self.feed.currency,
+                            timestamp=dateindex)
+        return self._put(('candle', dateindex, candle), timeout=timeout)
+    
+    def put_tick(self, timestamp, price, size=0., timeout=None):
+        """Queue a tick. See `put_candle`.
+        """
+        return self._put(('tick', timestamp, price, size), timeout=timeout)
+    
+    def _take(self):
+        with self._cond:
+            items = []
+            while len(self.queue) > 0 and len(items) < self.batch_size:
+                items.append(self.queue.popleft())
+            self._in_flight += len(items)
+            self._cond.notify_all()
+        return items
+    
+    def _apply_taken(self, items):
+        """Apply items returned by `_take` and mark them as done.
+        """
+        try:
+            self.apply(items)
+        finally:
+            with self._cond:
+                self._in_flight -= len(items)
+                self._cond.notify_all()
+    
+    def apply_candles(self, dateindices, candles):
+        """Apply candles to the feed. New candles are added in one step.
+        Candles for dateindices that are already part of the feed
+        replace the existing candles. Of multiple candles for the same
+        dateindex, the last one is used.
+        """
+        latest = {}
+        for dateindex, candle in zip(dateindices, candles):
+            latest[dateindex] = candle
+        index = self.feed.index
+        new_index, new_candles = [], []
+        for dateindex, candle in latest.items():
+            pos = bisect.bisect_left(index, dateindex)
+            if pos < len(index) and index[pos] == dateindex:
+                self.feed[dateindex] = candle
+            else:
+                new_index.append(dateindex)
+                new_candles.append(candle)
+        if len(new_index) > 0:
+            self.feed.add_candles(new_index, new_candles)
+    
+    def apply(self, items):
+        """Apply items to the feed. Consecutive candles and consecutive
+        ticks are applied in one step each. See `apply_candles`.
+        """
+        i = 0
+        while i < len(items):
+            kind = items[i][0]
+            j = i
+            while j < len(items) and items[j][0] == kind:
+                j += 1
+            group = items[i:j]
+            if kind == 'candle':
+                self.apply_candles([item[1] for item in group],
+                                   [item[2] for item in group])
+            else:
+                if self.bars is None:
+                    self.bars = BarBuilder(feed=self.feed)
+                self.bars.add_ticks([item[1] for item in group],
+                                    [item[2] for item in group],
+                                    [item[3] for item in group])
+            i = j
+        self.applied += len(items)
+        self.batches += 1
+    
+    def drain(self):
+        """Apply all queued items in the calling thread.
+        
+        Returns
+        -------
+        int:
+            The number of applied items.
+        """
+        count = 0
+        while True:
+            items = self._take()
+            if len(items) == 0:
+                return count
+            self._apply_taken(items)
+            count += len(items)
+    
+    def _consume(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: len(self.queue) > 0 or not self._running)
+                    if not self._running and len(self.queue) == 0:
+                        return
+                items = self._take()
+                if len(items) > 0:
+                    self._apply_taken(items)
+        except Exception as exc:
+            with self._cond:
+                self.error = exc
+                self._running = False
+                self._cond.notify_all()
+    
+    def start(self):
+        """Start the consumer thread.
+        """
+        if self._running:
+            return
+        self._running = True
+        self.error = None
+        self._thread = threading.Thread(target=self._consume,
+                                        name='LiveFeedConsumer',
+                                        daemon=True)
+        self._thread.start()
+    
+    def stop(self, drain=True):
+        """Stop the consumer thread.
+        
+        Arguments
+        ---------
+        drain : {bool, True}
+            Whether to apply the remaining queued items before stopping.
+            Otherwise they are discarded.
+        """
+        with self._cond:
+            if not drain:
+                self.dropped += len(self.queue)
+                self.queue.clear()
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            raise RuntimeError('The consumer of the LiveFeed failed.') from self.error
+    
+    def wait(self, timeout=None):
+        """Wait until the queue is empty and all taken items were
+        applied to the feed.
+        
+        Returns
+        -------
+        bool:
+            False if the timeout expired first.
+        """
+        def done():
+            idle = len(self.queue) == 0 and self._in_flight == 0
+            return idle or self.error is not None
+        
+        with self._cond:
+            return self._cond.wait_for(done, timeout=timeout)
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class SimulatedSource(object):
+    """A source that pushes random-walk candles or ticks into a LiveFeed
+    from a background thread. Meant for testing without a network.
+    
+    Arguments
+    ---------
+    live_feed : LiveFeed
+        The LiveFeed to push to.
+    start : {datetime or None, None}
+        The timestamp of the first item. Defaults to now.
+    interval : {datetime.timedelta, datetime.timedelta(minutes=1)}
+        The time between two items.
+    count : {int, 1000}
+        The number of items to push.
+    kind : {str, 'candles'}
+        Either 'candles' or 'ticks'.
+    rate : {float or None, None}
+        The number of items pushed per second. If None the items are
+        pushed as fast as possible.
+    price : {float, 100.}
+        The initial price.
+    volatility : {float, 0.001}
+        The standard deviation of the relative price change per item.
+    seed : {int or None, None}
+        The seed of the random numbers.
+    """
+    def __init__(self, live_feed, start=None, interval=datetime.timedelta(minutes=1),
+                 count=1000, kind='candles', rate=None, price=100.,
+                 volatility=0.001, seed=None):
+        if kind not in ('candles', 'ticks'):
+            raise ValueError("kind must be 'candles' or 'ticks'.")
+        if start is None:
+            start = datetime.datetime.now().replace(microsecond=0)
+        self.live_feed = live_feed
+        self.start_time = start
+        self.interval = interval
+        self.count = count
+        self.kind = kind
+        self.rate = rate
+        self.price = price
+        self.volatility = volatility
+        self.rng = np.random.default_rng(seed)
+        self.pushed = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def items(self):
+        """Generate the items that are pushed.
+        """
+        returns = self.rng.normal(0., self.volatility, size=(self.count, 4))
+        volumes = self.rng.integers(1, 1000, size=self.count).astype(float)
+        price = self.price
+        for i in range(self.count):
+            timestamp = self.start_time + i * self.interval
+            path = price * np.cumprod(1 + returns[i])
+            if self.kind == 'ticks':
+                yield timestamp, path[-1], volumes[i]
+            else:
+                data = {'Open': price,
+                        'High': max(price, path.max()),
+                        'Low': min(price, path.min()),
+                        'Close': path[-1],
+                        'Volume': volumes[i]}
+                yield timestamp, data
+            price = path[-1]
+    
+    def run(self):
+        """Push all items in the calling thread.
+        """
+        delay = None if self.rate is None else 1. / self.rate
+        for item in self.items():
+            if self._stop.is_set():
+                return
+            if self.kind == 'ticks':
+                self.live_feed.put_tick(*item)
+            else:
+                self.live_feed.put_candle(*item)
+            self.pushed += 1
+            if delay is not None:
+                time.sleep(delay)
+    
+    def start(self):
+        """Push the items from a background thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run,
+                                        name='SimulatedSource',
+                                        daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self.join()
+    
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,311 @@
+from PyTrest.types import CandleArray
+import bisect
+import numpy as np
+import pandas
+
+
+class FeedPanel(object):
+    """Many CandleFeeds aligned on a common timeline as one dense array.
+    
+    The panel holds a float64 array of shape (time, ticker, field). The
+    timeline is the sorted union of the dateindices of all feeds. Where
+    a feed has no candle at a dateindex the values are NaN. Since the
+    array is C-contiguous, the values of all tickers at one dateindex
+    (`row`, `loc`, `asof`) are a view and no copy is made.
+    
+    Arguments
+    ---------
+    feeds : list of CandleFeed
+        The feeds to align. All indices must either be timezone aware or
+        naive.
+    tickers : {list of str or None, None}
+        The names of the feeds. Defaults to the names of the feeds.
+    fields : {tuple of str, ('open', 'high', 'low', 'close', 'volume')}
+        The values of the candles to keep. Either keys of the names
+        dictionary of the candles (e.g. `close`) or keys of their data.
+    auto_update : {bool, False}
+        Whether to call `update` whenever one of the feeds sends an
+        `insert_value` event.
+    
+    Examples
+    --------
+    >>> panel = FeedPanel(feeds)
+    >>> closes = panel.field('close')  # shape (time, ticker)
+    >>> today = panel.asof(datetime.datetime(2020, 5, 4))
+    >>> today[:, panel.field_index('close')]
+    
+    Notes
+    -----
+    -The values are plain floats in the currency of each feed (see
+     `currencies`).
+    -Candles that are appended to the feeds are added by `update`
+     without rebuilding the array, unless a feed received candles that
+     lie before dateindices that are already in the panel.
+    """
+    def __init__(self, feeds, tickers=None, fields=('open', 'high', 'low', 'close', 'volume'),
+                 auto_update=False):
+        self.feeds = list(feeds)
+        if tickers is None:
+            tickers = [feed.name for feed in self.feeds]
+        if len(tickers) != len(self.feeds):
+            raise ValueError('Need exactly one ticker per feed.')
+        self.tickers = list(tickers)
+        self.fields = tuple(fields)
+        self.currencies = [feed.currency for feed in self.feeds]
+        self._build()
+        if auto_update:
+            handlers = []
+            for feed in self.feeds:
+                if not any(feed.handler is handler for handler in handlers):
+                    handlers.append(feed.handler)
+                    feed.handler.listen('insert_value', self._insert_value_action)
+    
+    def __len__(self):
+        return self._length
+    
+    def __getitem__(self, key):
+        """Return the values of all tickers at a position (int) or a
+        dateindex as a view of shape (ticker, field).
+        """
+        if isinstance(key, (int, np.integer)):
+            return self.row(key)
+        return self.loc(key)
+    
+    @property
+    def shape(self):
+        return (self._length, len(self.feeds), len(self.fields))
+    
+    @property
+    def values(self):
+        """The array of shape (time, ticker, field). A view on the data
+        of the panel.
+        """
+        return self._values[:self._length]
+    
+    @property
+    def timestamps(self):
+        """The timeline as int64 nanoseconds (UTC for timezone aware
+        feeds).
+        """
+        return self._ns[:self._length]
+    
+    def field_index(self, name):
+        return self.fields.index(name)
+    
+    def ticker_index(self, ticker):
+        return self.tickers.index(ticker)
+    
+    def field(self, name):
+        """Return the values of one field of all tickers as a view of
+        shape (time, ticker).
+        """
+        return self.values[:, :, self.field_index(name)]
+    
+    def get(self, ticker):
+        """Return the values of one ticker as a view of shape
+        (time, field).
+        """
+        return self.values[:, self.ticker_index(ticker), :]
+    
+    def row(self, position):
+        """Return the values of all tickers at a position of the
+        timeline as a view of shape (ticker, field).
+        """
+        return self.values[position]
+    
+    def position(self, dateindex, asof=False):
+        """Return the position of a dateindex in the timeline.
+        
+        Arguments
+        ---------
+        dateindex : datetime
+            The datetime to look up.
+        asof : {bool, False}
+            If True, return the position of the last dateindex at or
+            before the given one.
+        
+        Returns
+        -------
+        int or None:
+            None if the dateindex is not in the timeline or, with asof,
+            before its start.
+        """
+        if asof:
+            pos = bisect.bisect_right(self.index, dateindex) - 1
+            return None if pos < 0 else pos
+        pos = bisect.bisect_left(self.index, dateindex)
+        if pos < self._length and self.index[pos] == dateindex:
+            return pos
+        return None
+    
+    def loc(self, dateindex):
+        """Return the values of all tickers at a dateindex as a view of
+        shape (ticker, field).
+        """
+        pos = self.position(dateindex)
+        if pos is None:
+            raise KeyError(f'Dateindex {dateindex} not in FeedPanel.')
+        return self.values[pos]
+    
+    def asof(self, dateindex):
+        """Return the values of all tickers at the last dateindex at or
+        before the given one as a view of shape (ticker, field).
+        
+        The values of tickers without a candle at that dateindex are
+        NaN. Use `ffill` to carry the last known values forward.
+        """
+        pos = self.position(dateindex, asof=True)
+        if pos is None:
+            raise KeyError(f'Dateindex {dateindex} is before the start of the FeedPanel.')
+        return self.values[pos]
+    
+    def ffill(self):
+        """Return a copy of the values where NaN values are replaced by
+        the last valid value of the same ticker and field.
+        """
+        values = self.values
+        valid = ~np.isnan(values)
+        idx = np.where(valid, np.arange(len(values))[:, None, None], 0)
+        np.maximum.accumulate(idx, axis=0, out=idx)
+        ret = np.take_along_axis(values, idx, axis=0)
+        ret[~np.maximum.accumulate(valid, axis=0)] = np.nan
+        return ret
+    
+    def to_dataframe(self, name):
+        """Return one field as a DataFrame with one column per ticker.
+        """
+        index = pandas.DatetimeIndex(self.timestamps.view('datetime64[ns]'))
+        if self._tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self._tz)
+        return pandas.DataFrame(self.field(name).copy(), index=index,
+                                columns=self.tickers)
+    
+    @staticmethod
+    def _to_ns(dtindex):
+        """Return the int64 nanoseconds and timezone of a
+        DatetimeIndex.
+        """
+        tz = None if dtindex.tz is None else str(dtindex.tz)
+        if tz is not None:
+            dtindex = dtindex.tz_convert('UTC').tz_localize(None)
+        return dtindex.as_unit('ns').asi8, tz
+    
+    def _feed_columns(self, feed, start):
+        """Return the fields of the candles of a feed from a position
+        on as a float64 array of shape (rows, field).
+        """
+        if feed.columnar:
+            array = feed.data
+        else:
+            array = CandleArray.from_candles(feed.data[start:])
+            start = 0
+        ret = np.empty((len(array) - start, len(self.fields)))
+        for k, name in enumerate(self.fields):
+            key = array.names.get(name, name)
+            if key in array.keys():
+                ret[:, k] = array.column(key)[start:]
+            else:
+                ret[:, k] = np.nan
+        return ret
+    
+    def _feed_ns(self, feed, start):
+        if start == 0:
+            dtindex = feed.datetime_index()
+        else:
+            dtindex = pandas.DatetimeIndex(feed.index[start:])
+        ns, tz = self._to_ns(dtindex)
+        if len(ns) > 0:
+            if self._tz is False:
+                self._tz = tz
+            elif tz != self._tz:
+                raise ValueError('All feeds of a FeedPanel must use the same timezone.')
+        return ns
+    
+    def _reserve(self, capacity):
+        if capacity <= len(self._ns):
+            return
+        capacity = max(capacity, 2 * len(self._ns), 16)
+        values = np.full((capacity, len(self.feeds), len(self.fields)), np.nan)
+        values[:self._length] = self._values[:self._length]
+        ns = np.zeros(capacity, dtype=np.int64)
+        ns[:self._length] = self._ns[:self._length]
+        self._values = values
+        self._ns = ns
+    
+    def _build(self):
+        """Align all feeds from scratch.
+        """
+        self._tz = False
+        feed_ns = [self._feed_ns(feed, 0) for feed in self.feeds]
+        if len(feed_ns) > 0:
+            timeline = np.unique(np.concatenate(feed_ns))
+        else:
+            timeline = np.zeros(0, dtype=np.int64)
+        self._length = len(timeline)
+        self._ns = timeline.copy()
+        self._values = np.full((len(timeline), len(self.feeds), len(self.fields)),
+                               np.nan)
+        for j, (feed, ns) in enumerate(zip(self.feeds, feed_ns)):
+            pos = np.searchsorted(timeline, ns)
+            self._values[pos, j, :] = self._feed_columns(feed, 0)
+        self._consumed = [len(feed) for feed in self.feeds]
+        self._last = [feed.index[-1] if len(feed) > 0 else None
+                      for feed in self.feeds]
+        self.index = self._timeline_index(timeline)
+    
+    def _timeline_index(self, ns):
+        dtindex = pandas.DatetimeIndex(ns.view('datetime64[ns]'))
+        if self._tz not in (None, False):
+            dtindex = dtindex.tz_localize('UTC').tz_convert(self._tz)
+        return dtindex.to_pydatetime().tolist()
+    
+    def update(self):
+        """Add the candles that were appended to the feeds since the
+        panel was built or last updated.
+        
+        New dateindices after the end of the timeline are appended to
+        the array. If a feed received candles before dateindices that
+        are already in the panel, the panel is rebuilt.
+        
+        Returns
+        -------
+        int:
+            The number of dateindices that were added to the timeline.
+        """
+        length = self._length
+        new_ns = []
+        for j, feed in enumerate(self.feeds):
+            consumed = self._consumed[j]
+            if consumed > len(feed) or (consumed > 0 and feed.index[consumed-1] != self._last[j]):
+                self._build()
+                return self._length - length
+            new_ns.append(self._feed_ns(feed, consumed))
+        if all(len(ns) == 0 for ns in new_ns):
+            return 0
+        timeline = self.timestamps
+        added = np.unique(np.concatenate(new_ns))
+        if length > 0:
+            known = np.searchsorted(timeline, added)
+            known = np.minimum(known, length - 1)
+            is_known = timeline[known] == added
+            if np.any(added[~is_known] <= timeline[-1]):
+                self._build()
+                return self._length - length
+            added = added[~is_known]
+        self._reserve(length + len(added))
+        self._ns[length:length+len(added)] = added
+        self._length = length + len(added)
+        timeline = self.timestamps
+        for j, (feed, ns) in enumerate(zip(self.feeds, new_ns)):
+            if len(ns) == 0:
+                continue
+            pos = np.searchsorted(timeline, ns)
+            self._values[pos, j, :] = self._feed_columns(feed, self._consumed[j])
+            self._consumed[j] = len(feed)
+            self._last[j] = feed.index[-1]
+        self.index.extend(self._timeline_index(added))
+        return len(added)
+    
+    def _insert_value_action(self, event):
+        if any(event.emitter is feed for feed in self.feeds):
+            self.update()
@@ -0,0 +1,545 @@
+from PyTrest.types import CandleArray
+from concurrent.futures import ThreadPoolExecutor
+import bisect
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas
+
+
+_locks = {}
+_locks_lock = threading.Lock()
+_compaction_executor = None
+
+
+def _store_lock(path):
+    """Return the lock that serializes all changes to the store at
+    path within this process.
+    """
+    path = os.path.realpath(path)
+    with _locks_lock:
+        if path not in _locks:
+            _locks[path] = threading.RLock()
+        return _locks[path]
+
+
+def _compaction_pool():
+    global _compaction_executor
+    with _locks_lock:
+        if _compaction_executor is None:
+            _compaction_executor = ThreadPoolExecutor(max_workers=1,
+                                                      thread_name_prefix='FeedStoreCompaction')
+        return _compaction_executor
+
+
+def _save_array(file_path, array):
+    """Save an array as .npy file and flush it to disk.
+    """
+    with open(file_path, 'wb') as fp:
+        np.save(fp, array)
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def _fsync_dir(path):
+    """Flush the directory entries of path to disk, if the platform
+    supports it.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class FeedStore(object):
+    """A columnar on-disk store for a single CandleFeed.
+    
+    The store is a directory that contains a metadata file `meta.json`
+    and one or more segments. Each segment is a subdirectory holding
+    one NumPy `.npy` file per column of the candles and a file
+    `index.npy` with the timestamps of the rows as int64 nanoseconds.
+    Timezone aware timestamps are stored in UTC, the timezone is kept in
+    the metadata. For every segment the metadata contains the number of
+    rows and the first and last timestamp. Segments are sorted and do
+    not overlap.
+    
+    Reading a date range skips all segments that do not overlap the
+    range without opening them. The remaining segments are
+    memory-mapped and only the rows within the range are accessed.
+    
+    The store is append-only: `append` writes only the candles after
+    the last stored timestamp into a new segment. Small segments are
+    merged by `compact`, which `append` schedules on a background thread
+    once there are more than `max_small_segments` of them.
+    
+    Changes are crash-safe. The arrays of a segment are flushed to disk
+    before the metadata file is atomically replaced to reference them.
+    Segments are only deleted after they are no longer referenced.
+    Segment directories that were left behind by an interrupted write
+    are removed by the next change.
+    
+    Arguments
+    ---------
+    path : str
+        The directory of the store.
+    
+    Examples
+    --------
+    >>> store = FeedStore('AAPL.feed')
+    >>> store.write(feed)
+    >>> recent = store.read(start=datetime.datetime(2020, 1, 1))
+    >>> # later, after new candles were added to the feed
+    >>> store.append(feed)
+    
+    Notes
+    -----
+    -Changes from multiple threads of one process are serialized.
+     Concurrent writes from multiple processes are not supported.
+    """
+    meta_file = 'meta.json'
+    index_file = 'index.npy'
+    version = 1
+    small_segment_rows = 4096
+    max_small_segments = 8
+    
+    def __init__(self, path):
+        self.path = path
+        self._meta = None
+    
+    @staticmethod
+    def is_store(path):
+        """Whether the path points to a FeedStore.
+        """
+        return os.path.isfile(os.path.join(path, FeedStore.meta_file))
+    
+    def exists(self):
+        return self.is_store(self.path)
+    
+    @property
+    def meta(self):
+        """The contents of the metadata file.
+        """
+        if self._meta is None:
+            self.reload()
+        return self._meta
+    
+    def reload(self):
+        """Read the metadata file again, e.g. after the store was changed
+        by another FeedStore instance.
+        """
+        with open(os.path.join(self.path, self.meta_file), 'r') as fp:
+            self._meta = json.load(fp)
+        return self._meta
+    
+    @property
+    def segments(self):
+        return self.meta['segments']
+    
+    def __len__(self):
+        if not self.exists():
+            return 0
+        return sum(seg['rows'] for seg in self.segments)
+    
+    @property
+    def start(self):
+        """The first timestamp in the store as pandas.Timestamp.
+        """
+        if len(self) == 0:
+            return None
+        return self._to_timestamp(self.segments[0]['start'])
+    
+    @property
+    def end(self):
+        """The last timestamp in the store as pandas.Timestamp.
+        """
+        if len(self) == 0:
+            return None
+        return self._to_timestamp(self.segments[-1]['end'])
+    
+    def _to_timestamp(self, value):
+        ret = pandas.Timestamp(value, unit='ns')
+        tz = self.meta['tz']
+        if tz is not None:
+            ret = ret.tz_localize('UTC').tz_convert(tz)
+        return ret
+    
+    def _to_int(self, dateindex):
+        """Convert a datetime to the int64 representation of the
+        timestamps in the store.
+        """
+        ret = pandas.Timestamp(dateindex)
+        tz = self.meta['tz']
+        if tz is None and ret.tz is not None:
+            ret = ret.tz_localize(None)
+        elif tz is not None and ret.tz is None:
+            ret = ret.tz_localize(tz)
+        return ret.value
+    
+    def _segment_path(self, segment):
+        return os.path.join(self.path, segment['id'])
+    
+    def _write_meta(self, meta):
+        """Atomically replace the metadata file.
+        """
+        file_path = os.path.join(self.path, self.meta_file)
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(meta, fp, indent=1)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, file_path)
+        _fsync_dir(self.path)
+        self._meta = meta
+    
+    def _remove_orphans(self, meta):
+        """Delete segment directories that are not referenced by the
+        metadata.
+        """
+        referenced = set(seg['id'] for seg in meta['segments'])
+        for entry in os.listdir(self.path):
+            if entry.startswith('segment-') and entry not in referenced:
+                shutil.rmtree(os.path.join(self.path, entry),
+                              ignore_errors=True)
+    
+    def _write_segment(self, meta, index, columns):
+        """Write the arrays of a new segment and return its metadata
+        entry.
+        
+        Arguments
+        ---------
+        meta : dict
+            The metadata of the store. The counter of segment ids is
+            increased.
+        index : numpy.ndarray
+            The timestamps as int64 nanoseconds.
+        columns : dict
+            A dictionary of the form {key: float64 array}.
+        """
+        seg_id = 'segment-{:06d}'.format(meta['next_segment'])
+        meta['next_segment'] += 1
+        seg_path = os.path.join(self.path, seg_id)
+        os.makedirs(seg_path)
+        _save_array(os.path.join(seg_path, self.index_file),
+                    np.ascontiguousarray(index, dtype=np.int64))
+        for i, key in enumerate(meta['keys']):
+            if key in columns:
+                col = np.ascontiguousarray(columns[key], dtype=np.float64)
+            else:
+                col = np.full(len(index), np.nan)
+            _save_array(os.path.join(seg_path, f'column-{i}.npy'), col)
+        _fsync_dir(seg_path)
+        _fsync_dir(self.path)
+        return {'id': seg_id,
+                'rows': len(index),
+                'start': int(index[0]),
+                'end': int(index[-1])}
+    
+    @staticmethod
+    def _feed_arrays(feed, position=0):
+        """Return the timestamps as int64 array, the timezone, the names
+        dictionary and the columns of a CandleFeed, starting at the
+        given position.
+        """
+        if position == 0:
+            dtindex = feed.datetime_index()
+        else:
+            dtindex = pandas.DatetimeIndex(feed.index[position:])
+        tz = None if dtindex.tz is None else str(dtindex.tz)
+        if tz is not None:
+            dtindex = dtindex.tz_convert('UTC').tz_localize(None)
+        index = dtindex.as_unit('ns').asi8
+        if feed.columnar:
+            array = feed.data
+            columns = {key: array.column(key)[position:]
+                       for key in array.keys()}
+        else:
+            array = CandleArray.from_candles(feed.data[position:])
+            columns = {key: array.column(key) for key in array.keys()}
+        return index, tz, array.names, columns
+    
+    def write(self, feed, overwrite=True):
+        """Write a CandleFeed to the store, replacing its contents.
+        
+        Arguments
+        ---------
+        feed : CandleFeed
+            The feed to store.
+        overwrite : {bool, True}
+            Whether to replace an existing store. If False and the store
+            exists an IOError is raised.
+        """
+        with _store_lock(self.path):
+            if self.exists() and not overwrite:
+                raise IOError(f'Store {self.path} already exists. Use overwrite to overwrite it.')
+            self._write(feed)
+    
+    def _write(self, feed):
+        index, tz, names, columns = self._feed_arrays(feed)
+        if len(index) > 1 and np.any(np.diff(index) <= 0):
+            raise ValueError('The index of the feed must be strictly increasing.')
+        next_segment = 0
+        if self.exists():
+            next_segment = self.reload()['next_segment']
+        os.makedirs(self.path, exist_ok=True)
+        meta = {'version': self.version,
+                'name': feed.name,
+                'currency': feed.currency,
+                'datetime_format': feed.datetime_format,
+                'names': dict(names),
+                'keys': list(columns.keys()),
+                'tz': tz,
+                'next_segment': next_segment,
+                'segments': []}
+        if len(index) > 0:
+            meta['segments'].append(self._write_segment(meta, index,
+                                                        columns))
+        self._write_meta(meta)
+        self._remove_orphans(meta)
+    
+    def append(self, feed, compact=True):
+        """Append the candles of a feed that are later than the last
+        stored timestamp as a new segment.
+        
+        Only the new rows are written, the existing segments are not
+        touched. Candles at or before the last stored timestamp are
+        ignored, even if they differ from the stored ones. Use `write`
+        to replace the contents of the store. If the store does not
+        exist yet, the whole feed is written.
+        
+        Arguments
+        ---------
+        feed : CandleFeed
+            The feed to take the new candles from. Its index must use
+            the same timezone as the stored data.
+        compact : {bool, True}
+            Whether to schedule a background compaction if there are
+            more than `max_small_segments` small segments afterwards.
+        
+        Returns
+        -------
+        int:
+            The number of appended rows.
+        """
+        with _store_lock(self.path):
+            if not self.exists():
+                self._write(feed)
+                return len(feed)
+            meta = self.reload()
+            if feed.currency != meta['currency']:
+                msg = f'Cannot append a feed in {feed.currency} to a '
+                msg += f'store in {meta["currency"]}.'
+                raise ValueError(msg)
+            position = 0
+            if len(meta['segments']) > 0:
+                end = self._to_timestamp(meta['segments'][-1]['end'])
+                position = bisect.bisect_right(feed.index,
+                                               end.to_pydatetime())
+            if position >= len(feed):
+                return 0
+            index, tz, names, columns = self._feed_arrays(feed,
+                                                          position=position)
+            if tz != meta['tz']:
+                msg = f'The timezone of the feed ({tz}) does not match '
+                msg += f'the timezone of the store ({meta["tz"]}).'
+                raise ValueError(msg)
+            if len(index) > 1 and np.any(np.diff(index) <= 0):
+                raise ValueError('The index of the feed must be strictly increasing.')
+            new_meta = dict(meta)
+            new_meta['keys'] = list(meta['keys'])
+            for key in columns:
+                if key not in new_meta['keys']:
+                    new_meta['keys'].append(key)
+            self._remove_orphans(meta)
+            segment = self._write_segment(new_meta, index, columns)
+            new_meta['segments'] = meta['segments'] + [segment]
+            self._write_meta(new_meta)
+        if compact and self.needs_compaction():
+            self.compact_in_background()
+        return len(index)
+    
+    def small_segments(self):
+        """Return the number of segments with less than
+        `small_segment_rows` rows.
+        """
+        return sum(seg['rows'] < self.small_segment_rows
+                   for seg in self.meta['segments'])
+    
+    def needs_compaction(self):
+        return self.small_segments() > self.max_small_segments
+    
+    def compact(self):
+        """Merge consecutive small segments into segments of at least
+        `small_segment_rows` rows.
+        
+        The merged segments are written next to the existing ones and
+        only replace them once they are complete. Appends to the store
+        wait until the compaction is finished.
+        
+        Returns
+        -------
+        int:
+            The number of segments that were merged.
+        """
+        with _store_lock(self.path):
+            meta = self.reload()
+            runs = []
+            run = []
+            rows = 0
+            for segment in meta['segments']:
+                if segment['rows'] >= self.small_segment_rows:
+                    if len(run) > 1:
+                        runs.append(run)
+                    run = []
+                    rows = 0
+                    continue
+                run.append(segment)
+                rows += segment['rows']
+                if rows >= self.small_segment_rows:
+                    if len(run) > 1:
+                        runs.append(run)
+                    run = []
+                    rows = 0
+            if len(run) > 1:
+                runs.append(run)
+            if len(runs) == 0:
+                return 0
+            
+            self._remove_orphans(meta)
+            new_meta = dict(meta)
+            segments = list(meta['segments'])
+            for run in runs:
+                index, columns = self._read_segments(run, mmap=False)
+                segment = self._write_segment(new_meta, index, columns)
+                pos = segments.index(run[0])
+                segments[pos:pos+len(run)] = [segment]
+            new_meta['segments'] = segments
+            self._write_meta(new_meta)
+            self._remove_orphans(new_meta)
+        return sum(len(run) for run in runs)
+    
+    def compact_in_background(self):
+        """Run `compact` on a background thread.
+        
+        All stores share a single background thread, such that
+        compactions do not compete with each other.
+        
+        Returns
+        -------
+        concurrent.futures.Future:
+            The future of the compaction.
+        """
+        return _compaction_pool().submit(self.compact)
+    
+    def read_arrays(self, start=None, end=None, mmap=True):
+        """Read the timestamps and columns of all rows with
+        start <= timestamp <= end.
+        
+        Arguments
+        ---------
+        start : {datetime or None, None}
+            The first datetime to read. If None, read from the beginning.
+        end : {datetime or None, None}
+            The last datetime to read. If None, read until the end.
+        mmap : {bool, True}
+            Memory-map the files instead of reading them. If the range
+            lies within a single segment the returned columns are views
+            on the memory map and are only read from disk when accessed.
+        
+        Returns
+        -------
+        index : numpy.ndarray
+            The timestamps as int64 nanoseconds.
+        columns : dict
+            A dictionary of the form {key: float64 array}.
+        """
+        meta = self.reload()
+        lo_val = None if start is None else self._to_int(start)
+        hi_val = None if end is None else self._to_int(end)
+        segments = [seg for seg in meta['segments']
+                    if (lo_val is None or seg['end'] >= lo_val)
+                    and (hi_val is None or seg['start'] <= hi_val)]
+        return self._read_segments(segments, lo_val=lo_val, hi_val=hi_val,
+                                   mmap=mmap)
+    
+    def _read_segments(self, segments, lo_val=None, hi_val=None,
+                       mmap=True):
+        """Read the rows of the given segments with
+        lo_val <= timestamp <= hi_val. See `read_arrays`.
+        """
+        keys = self.meta['keys']
+        mmap_mode = 'c' if mmap else None
+        indices = []
+        columns = {key: [] for key in keys}
+        for segment in segments:
+            seg_path = self._segment_path(segment)
+            index = np.load(os.path.join(seg_path, self.index_file),
+                            mmap_mode=mmap_mode)
+            lo = 0
+            hi = len(index)
+            if lo_val is not None and segment['start'] < lo_val:
+                lo = int(np.searchsorted(index, lo_val, side='left'))
+            if hi_val is not None and segment['end'] > hi_val:
+                hi = int(np.searchsorted(index, hi_val, side='right'))
+            if hi <= lo:
+                continue
+            indices.append(np.asarray(index[lo:hi]))
+            for i, key in enumerate(keys):
+                file_path = os.path.join(seg_path, f'column-{i}.npy')
+                if os.path.isfile(file_path):
+                    col = np.load(file_path, mmap_mode=mmap_mode)[lo:hi]
+                else:
+                    col = np.full(hi - lo, np.nan)
+                columns[key].append(col)
+        if len(indices) == 0:
+            return (np.zeros(0, dtype=np.int64),
+                    {key: np.zeros(0) for key in keys})
+        if len(indices) == 1:
+            return indices[0], {key: val[0] for key, val in columns.items()}
+        return (np.concatenate(indices),
+                {key: np.concatenate(val) for key, val in columns.items()})
+    
+    def datetime_index(self, index):
+        """Convert int64 timestamps as returned by `read_arrays` to a
+        pandas.DatetimeIndex.
+        """
+        ret = pandas.DatetimeIndex(np.asarray(index).view('datetime64[ns]'))
+        if self.meta['tz'] is not None:
+            ret = ret.tz_localize('UTC').tz_convert(self.meta['tz'])
+        return ret
+    
+    def read(self, start=None, end=None, mmap=True):
+        """Read the rows with start <= timestamp <= end into a columnar
+        CandleFeed.
+        
+        Arguments
+        ---------
+        start : {datetime or None, None}
+            The first datetime to read. If None, read from the beginning.
+        end : {datetime or None, None}
+            The last datetime to read. If None, read until the end.
+        mmap : {bool, True}
+            See `read_arrays`.
+        
+        Returns
+        -------
+        CandleFeed
+        """
+        from PyTrest.feed import CandleFeed
+        index, columns = self.read_arrays(start=start, end=end, mmap=mmap)
+        meta = self.meta
+        dtindex = self.datetime_index(index)
+        data = CandleArray(columns=columns, names=meta['names'],
+                           currency=meta['currency'], copy=False)
+        ret = CandleFeed(name=meta['name'], currency=meta['currency'],
+                         data=data, index=dtindex.to_pydatetime().tolist(),
+                         datetime_format=meta['datetime_format'])
+        ret._datetime_index = dtindex
+        return ret
@@ -0,0 +1,406 @@
+from PyTrest.types import CandleArray
+from PyTrest.feed.basefeed import CandleFeed
+import datetime
+import numpy as np
+import pandas
+
+
+MODELS = ('gbm', 'jump', 'regime')
+
+TRADING_DAYS = 252
+
+
+def synthetic_index(periods, start=datetime.datetime(2010, 1, 4),
+                    interval=datetime.timedelta(days=1),
+                    session=(datetime.time(9, 30), datetime.time(16, 0))):
+    """Return the timestamps of synthetic bars.
+    
+    Intraday bars are placed on business days within the trading
+    session. Daily bars are placed on business days. Longer intervals
+    are spaced regularly.
+    
+    Arguments
+    ---------
+    periods : int
+        The number of bars.
+    start : {datetime, datetime.datetime(2010, 1, 4)}
+        The first day.
+    interval : {datetime.timedelta, datetime.timedelta(days=1)}
+        The time between two bars.
+    session : {tuple of datetime.time, (09:30, 16:00)}
+        The start and end of the trading session of intraday bars.
+    
+    Returns
+    -------
+    pandas.DatetimeIndex
+    """
+    if interval <= datetime.timedelta(0):
+        raise ValueError('The interval must be positive.')
+    if interval > datetime.timedelta(days=1):
+        return pandas.date_range(start, periods=periods, freq=interval)
+    day = pandas.Timestamp(start).normalize()
+    if interval == datetime.timedelta(days=1):
+        return pandas.bdate_range(day, periods=periods)
+    bars_per_day = _bars_per_day(interval, session)
+    days = pandas.bdate_range(day, periods=-(-periods // bars_per_day))
+    session_start = datetime.timedelta(hours=session[0].hour,
+                                       minutes=session[0].minute,
+                                       seconds=session[0].second)
+    offsets = pandas.to_timedelta(session_start + np.arange(bars_per_day) * interval)
+    ns = days.as_unit('ns').asi8[:, None] + offsets.as_unit('ns').asi8[None, :]
+    return pandas.DatetimeIndex(ns.ravel()[:periods].view('datetime64[ns]'))
+
+
+def _bars_per_day(interval, session):
+    if interval >= datetime.timedelta(days=1):
+        return 1
+    length = (datetime.datetime.combine(datetime.date.min, session[1])
+              - datetime.datetime.combine(datetime.date.min, session[0]))
+    if length <= datetime.timedelta(0):
+        raise ValueError('The session must end after it starts.')
+    return max(1, length // interval)
+
+
+def volume_seasonality(bars_per_day, amplitude=2.):
+    """Return the relative intraday volume of every bar of a session.
+    
+    The profile is U-shaped: the volume at the open and close of the
+    session is `1 + amplitude` times the volume at noon. The mean of
+    the profile is 1.
+    """
+    if bars_per_day <= 1:
+        return np.ones(1)
+    x = np.linspace(-1., 1., bars_per_day)
+    profile = 1. + amplitude * x ** 2
+    return profile / profile.mean()
+
+
+def log_returns(periods, rng, model='gbm', drift=0.05, volatility=0.2,
+                dt=1./TRADING_DAYS, jump_intensity=5., jump_mean=-0.02,
+                jump_volatility=0.05, regimes=((0.1, 0.15), (-0.2, 0.4)),
+                switch_probability=(0.01, 0.05)):
+    """Draw the log returns of a price path.
+    
+    Arguments
+    ---------
+    periods : int
+        The number of returns.
+    rng : numpy.random.Generator
+        The source of randomness.
+    model : {str, 'gbm'}
+        gbm:
+            Geometric Brownian motion with annual drift and volatility.
+        jump:
+            Merton jump diffusion, i.e. GBM plus normally distributed
+            log jumps that arrive `jump_intensity` times per year on
+            average.
+        regime:
+            GBM whose annual (drift, volatility) switches between the
+            `regimes` according to a Markov chain. `switch_probability`
+            holds the probability to leave each regime per bar.
+    drift : {float, 0.05}
+        The annual drift.
+    volatility : {float, 0.2}
+        The annual volatility.
+    dt : {float, 1/252}
+        The length of a bar in years.
+    
+    Returns
+    -------
+    numpy.ndarray
+    """
+    if model not in MODELS:
+        raise ValueError(f'Unknown model {model}. Use one of {MODELS}.')
+    noise = rng.standard_normal(periods)
+    if model == 'regime':
+        states = regime_path(periods, rng, switch_probability)
+        params = np.asarray(regimes, dtype=np.float64)
+        drift = params[states, 0]
+        volatility = params[states, 1]
+    ret = (drift - 0.5 * volatility ** 2) * dt + volatility * np.sqrt(dt) * noise
+    if model == 'jump':
+        counts = rng.poisson(jump_intensity * dt, size=periods)
+        jumps = np.flatnonzero(counts)
+        ret[jumps] += (jump_mean * counts[jumps]
+                       + jump_volatility * np.sqrt(counts[jumps])
+                       * rng.standard_normal(len(jumps)))
+    return ret
+
+
+def regime_path(periods, rng, switch_probability=(0.01, 0.05)):
+    """Draw the states of a Markov chain that leaves state i with
+    probability `switch_probability[i]` per step and moves to the next
+    state.
+    
+    The lengths of the regimes are drawn from geometric distributions,
+    such that the cost depends on the number of regimes and not on the
+    number of steps.
+    
+    Returns
+    -------
+    numpy.ndarray of int
+    """
+    probs = np.asarray(switch_probability, dtype=np.float64)
+    num = len(probs)
+    state = int(rng.integers(num))
+    if periods <= 0:
+        return np.zeros(0, dtype=np.int64)
+    states = []
+    lengths = []
+    total = 0
+    while total < periods:
+        batch = np.arange(state, state + 64) % num
+        durations = rng.geometric(probs[batch])
+        states.append(batch)
+        lengths.append(durations)
+        total += durations.sum()
+        state = (batch[-1] + 1) % num
+    return np.repeat(np.concatenate(states), np.concatenate(lengths))[:periods]
+
+
+def ohlcv(returns, rng, price=100., volume=1e6, bars_per_day=1,
+          seasonality=2.):
+    """Turn log returns into open, high, low, close and volume columns.
+    
+    The open of a bar is the close of the previous bar. High and low
+    extend the range of open and close by half-normal excursions that
+    scale with the size of the returns. The volume follows the
+    intraday seasonality (see volume_seasonality), grows with the
+    absolute return and has log-normal noise.
+    
+    Returns
+    -------
+    dict:
+        The columns keyed by the default names of Candle.
+    """
+    periods = len(returns)
+    if periods == 0:
+        return {name: np.zeros(0) for name in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    close = price * np.exp(np.cumsum(returns))
+    opens = np.empty(periods)
+    opens[0] = price
+    opens[1:] = close[:-1]
+    scale = np.std(returns) if periods > 1 else 0.
+    excursion = np.abs(rng.standard_normal((2, periods))) * 0.5 * scale
+    high = np.maximum(opens, close) * np.exp(excursion[0])
+    low = np.minimum(opens, close) * np.exp(-excursion[1])
+    profile = volume_seasonality(bars_per_day, amplitude=seasonality)
+    profile = np.resize(profile, periods)
+    activity = 1. + np.abs(returns) / scale if scale > 0 else 1.
+    noise = rng.lognormal(0., 0.25, size=periods)
+    volume = np.round(volume / bars_per_day * profile * activity * noise)
+    return {'Open': opens,
+            'High': high,
+            'Low': low,
+            'Close': close,
+            'Volume': volume}
+
+
+class SyntheticUniverse(object):
+    """A universe of tickers with synthetic candles.
+    
+    The candles of a ticker are only generated when its feed is
+    requested. Every ticker draws from its own random number generator,
+    spawned from the seed of the universe, such that the candles of a
+    ticker are identical no matter in which order or how many tickers
+    are generated. All tickers share one timeline.
+    
+    Arguments
+    ---------
+    tickers : {int or list of str, 100}
+        The names of the tickers or their number. Numbers create the
+        tickers `SYN0`, `SYN1`, ...
+    periods : {int, 252}
+        The number of bars per ticker.
+    start : {datetime, datetime.datetime(2010, 1, 4)}
+        The first day.
+    interval : {datetime.timedelta, datetime.timedelta(days=1)}
+        The time between two bars. Intraday bars are placed within
+        `session` on business days.
+    model : {str, 'gbm'}
+        One of 'gbm', 'jump' or 'regime'. See log_returns.
+    seed : {int or None, None}
+        The seed of the universe.
+    currency : {str, 'USD'}
+        The currency of the feeds.
+    price : {float, 100.}
+        The mean initial price. The initial prices are log-normally
+        distributed around it.
+    volume : {float, 1e6}
+        The mean daily volume.
+    seasonality : {float, 2.}
+        The amplitude of the intraday volume profile.
+    session : {tuple of datetime.time, (09:30, 16:00)}
+        The trading session of intraday bars.
+    **model_kwargs :
+        The parameters of the model, e.g. `drift` and `volatility`. See
+        log_returns.
+    
+    Examples
+    --------
+    >>> universe = SyntheticUniverse(10000, periods=10*252*390,
+    ...                              interval=datetime.timedelta(minutes=1),
+    ...                              model='jump', seed=42)
+    >>> feed = universe['SYN123']
+    """
+    def __init__(self, tickers=100, periods=252,
+                 start=datetime.datetime(2010, 1, 4),
+                 interval=datetime.timedelta(days=1), model='gbm',
+                 seed=None, currency='USD', price=100., volume=1e6,
+                 seasonality=2., session=(datetime.time(9, 30), datetime.time(16, 0)),
+                 **model_kwargs):
+        if model not in MODELS:
+            raise ValueError(f'Unknown model {model}. Use one of {MODELS}.')
+        if isinstance(tickers, int):
+            tickers = [f'SYN{i}' for i in range(tickers)]
+        self.tickers = list(tickers)
+        self.periods = periods
+        self.start = start
+        self.interval = interval
+        self.model = model
+        self.currency = currency
+        self.price = price
+        self.volume = volume
+        self.seasonality = seasonality
+        self.session = session
+        self.model_kwargs = model_kwargs
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self._seeds = self.seed_sequence.spawn(len(self.tickers))
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.bars_per_day = _bars_per_day(interval, session)
+        if interval < datetime.timedelta(days=1):
+            self.dt = 1. / (TRADING_DAYS * self.bars_per_day)
+        else:
+            self.dt = interval / datetime.timedelta(days=365.25)
+            if interval == datetime.timedelta(days=1):
+                self.dt = 1. / TRADING_DAYS
+        self._index = None
+        self._index_list = None
+    
+    def __len__(self):
+        return len(self.tickers)
+    
+    def __contains__(self, ticker):
+        return ticker in self._positions
+    
+    def __iter__(self):
+        for i in range(len(self.tickers)):
+            yield self.feed(i)
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.feed(key)
+        if isinstance(key, slice):
+            return [self.feed(i) for i in range(len(self.tickers))[key]]
+        return self.feed(key)
+    
+    @property
+    def index(self):
+        """The timeline of all tickers as pandas.DatetimeIndex.
+        """
+        if self._index is None:
+            self._index = synthetic_index(self.periods, start=self.start,
+                                          interval=self.interval,
+                                          session=self.session)
+        return self._index
+    
+    def rng(self, ticker):
+        """Return a new random number generator of a ticker (name or
+        position).
+        """
+        if isinstance(ticker, str):
+            ticker = self._positions[ticker]
+        return np.random.default_rng(self._seeds[ticker])
+    
+    def _returns(self, ticker):
+        rng = self.rng(ticker)
+        price = self.price * np.exp(0.5 * rng.standard_normal())
+        returns = log_returns(self.periods, rng, model=self.model,
+                              dt=self.dt, **self.model_kwargs)
+        return rng, price, returns
+    
+    def columns(self, ticker):
+        """Generate the columns of the candles of a ticker (name or
+        position).
+        
+        Returns
+        -------
+        dict:
+            The float64 columns keyed by the default names of Candle.
+        """
+        rng, price, returns = self._returns(ticker)
+        return ohlcv(returns, rng, price=price, volume=self.volume,
+                     bars_per_day=self.bars_per_day,
+                     seasonality=self.seasonality)
+    
+    def feed(self, ticker):
+        """Generate the columnar CandleFeed of a ticker (name or
+        position).
+        """
+        if not isinstance(ticker, str):
+            ticker = self.tickers[ticker]
+        if self._index_list is None:
+            self._index_list = self.index.to_pydatetime().tolist()
+        array = CandleArray(columns=self.columns(ticker),
+                            currency=self.currency, copy=False)
+        feed = CandleFeed(name=ticker, currency=self.currency, data=array,
+                          index=list(self._index_list))
+        feed._datetime_index = self.index
+        return feed
+    
+    def feeds(self, tickers=None):
+        """Generate the feeds of multiple tickers.
+        
+        Arguments
+        ---------
+        tickers : {list of str or int or None, None}
+            The tickers to generate. If None all tickers are generated.
+        
+        Returns
+        -------
+        list of CandleFeed
+        """
+        if tickers is None:
+            tickers = range(len(self.tickers))
+        return [self.feed(ticker) for ticker in tickers]
+    
+    def closes(self, tickers=None):
+        """Generate the close prices of multiple tickers without creating
+        feeds.
+        
+        Returns
+        -------
+        numpy.ndarray:
+            An array of shape (time, ticker).
+        """
+        if tickers is None:
+            tickers = range(len(self.tickers))
+        tickers = list(tickers)
+        ret = np.empty((self.periods, len(tickers)))
+        for j, ticker in enumerate(tickers):
+            _, price, returns = self._returns(ticker)
+            np.cumsum(returns, out=returns)
+            ret[:, j] = price * np.exp(returns)
+        return ret
+
+
+def synthetic_feed(periods=252, name='SYN', seed=None, **kwargs):
+    """Generate a single synthetic CandleFeed.
+    
+    Arguments
+    ---------
+    periods : {int, 252}
+        The number of bars.
+    name : {str, 'SYN'}
+        The name of the feed.
+    seed : {int or None, None}
+        The seed of the random numbers.
+    **kwargs :
+        See SyntheticUniverse.
+    
+    Returns
+    -------
+    CandleFeed
+    """
+    return SyntheticUniverse([name], periods=periods, seed=seed,
+                             **kwargs).feed(0)
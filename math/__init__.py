@@ -1,3 +1,5 @@
 from .moving_window import MovingWindow, SMA, Min, Max, Std
 from .moving_averages import EMA, DMA
 from .indicators import MACDLine, MACDSignal, Crossover
+from .registry import IndicatorRegistry, default_registry
+from .cache import IndicatorCache
@@ -0,0 +1,334 @@
+from .moving_window import series_values
+from .moving_averages import EMA, DMA
+from .indicators import MACDSignal
+from ..types.valuearray import ValueArray
+import hashlib
+import json
+import os
+import numpy as np
+import pandas
+
+
+def _to_us(dtindex):
+    if dtindex.tz is not None:
+        dtindex = dtindex.tz_convert('UTC').tz_localize(None)
+    return dtindex.as_unit('us').asi8
+
+
+def series_timestamps(series):
+    """Return the index of a DateSeries as int64 microseconds, the
+    resolution of datetime (UTC for timezone aware indices).
+    
+    The index of a SubFeed is taken from the cached DatetimeIndex of its
+    CandleFeed.
+    """
+    feed = getattr(series, 'parent', None)
+    if hasattr(feed, 'datetime_index') and len(feed) == len(series):
+        return _to_us(feed.datetime_index())
+    return _to_us(pandas.DatetimeIndex(series.index))
+
+
+def _timestamp(dateindex):
+    return int(_to_us(pandas.DatetimeIndex([dateindex]))[0])
+
+
+def _digest(timestamps, values):
+    # SHA-256 is hardware accelerated on most CPUs and hashes the
+    # buffers of the arrays faster than blake2b
+    hasher = hashlib.sha256()
+    hasher.update(np.ascontiguousarray(timestamps, dtype=np.int64))
+    hasher.update(np.ascontiguousarray(values, dtype=np.float64))
+    return hasher.hexdigest()
+
+
+def _replace_file(file_path, write):
+    """Write a file through a temporary file that atomically replaces
+    it, such that readers never see a partially written file.
+    """
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'wb') as fp:
+        write(fp)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp_path, file_path)
+
+
+class IndicatorCache(object):
+    """An on-disk cache of the values of indicators, such that they are
+    not recomputed over the full history on every start.
+    
+    Every cached indicator is a subdirectory of the cache that holds a
+    file `values.npy` with the values as float64 (NaN for None) and a
+    metadata file `meta.json`. The name of the subdirectory is a hash of
+    the class and parameters of the indicator and of the label, the
+    first dateindex and the first value of the parent. The metadata
+    holds the fingerprint of the part of the parent the values were
+    computed from: its number of rows, its first and last timestamp and
+    a hash of its timestamps and values.
+    
+    `get` validates an entry in two steps. The number of rows and the
+    first and last timestamp are compared first, which only touches two
+    dateindices of the parent. Only if they match, the hash of the same
+    number of rows of the parent is compared. If the parent is unchanged
+    the values are memory-mapped and used as they are. If the parent has
+    only grown, the indicator is continued from the cached values and
+    only the new rows are computed. Otherwise the indicator is computed
+    from scratch. In the latter two cases the entry is rewritten.
+    
+    Only indicators that can continue from cached values (EMA and the
+    kernel based moving windows SMA, Std, Min and Max, see `cacheable`)
+    are cached. Other indicators, e.g. a MovingWindow with an arbitrary
+    window operation, are computed as usual. So are indicators that are
+    built from other indicators (MACDSignal and DMA), since restoring
+    their values would not restore the inner indicators.
+    
+    Arguments
+    ---------
+    path : str
+        The directory of the cache. It is created if it does not exist.
+    
+    Examples
+    --------
+    >>> cache = IndicatorCache('indicators.cache')
+    >>> ema = cache.get(EMA, feed.close, window_size=200)
+    >>> # later, after new candles were added to the feed
+    >>> cache.save(ema)
+    
+    Notes
+    -----
+    -The parameters are part of the key through their repr. They should
+     be plain numbers, strings or tuples thereof.
+    -The values are restored as a ValueArray on top of the memory-mapped
+     file in the currency of the parent values. They are only wrapped
+     (e.g. as Money) when they are accessed.
+    -Concurrent writes to the same entry from multiple processes are
+     not supported.
+    """
+    meta_file = 'meta.json'
+    values_file = 'values.npy'
+    version = 2
+    
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+        self._entries = {}
+        os.makedirs(path, exist_ok=True)
+    
+    @staticmethod
+    def label(parent):
+        """Return a description of the parent that distinguishes series
+        with the same dateindices, e.g. the name of the feed and the
+        candle attribute of a SubFeed.
+        """
+        feed = getattr(parent, 'parent', None)
+        return [str(getattr(feed, 'name', None)),
+                str(getattr(parent, 'candle_attribute', None))]
+    
+    def key(self, cls, parent, params, name=None):
+        """Return the name of the subdirectory of an indicator.
+        
+        Arguments
+        ---------
+        cls : type
+            The class of the indicator.
+        parent : DateSeries
+            The parent of the indicator.
+        params : dict
+            The keyword arguments of the indicator.
+        name : {str or None, None}
+            A name of the parent that replaces its label.
+        
+        Returns
+        -------
+        str or None:
+            None if the parent is empty or its first value is not a
+            number.
+        """
+        if len(parent) == 0:
+            return None
+        first = parent.data[0]
+        try:
+            first = None if first is None else float(first)
+        except (TypeError, ValueError):
+            return None
+        description = {'class': f'{cls.__module__}.{cls.__qualname__}',
+                       'params': repr(sorted(params.items())),
+                       'parent': self.label(parent) if name is None else str(name),
+                       'first': _timestamp(parent.index[0]),
+                       'first_value': first}
+        text = json.dumps(description, sort_keys=True)
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    
+    def _entry_path(self, key):
+        return os.path.join(self.path, key)
+    
+    def read_meta(self, key):
+        file_path = os.path.join(self._entry_path(key), self.meta_file)
+        try:
+            with open(file_path, 'r') as fp:
+                meta = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != self.version:
+            return None
+        return meta
+    
+    def load(self, key, parent, timestamps=None, values=None):
+        """Return the cached values of an entry if they were computed
+        from a prefix of the parent.
+        
+        The number of rows and the first and last timestamp are checked
+        before the values and timestamps of the parent are read and
+        hashed. They are read from the parent if they are not given.
+        
+        Returns
+        -------
+        numpy.ndarray or None:
+            The memory-mapped values for the first rows of the parent or
+            None if there is no valid entry.
+        """
+        meta = self.read_meta(key)
+        if meta is None:
+            return None
+        rows = meta['rows']
+        if rows == 0 or rows > len(parent):
+            return None
+        if _timestamp(parent.index[0]) != meta['first']:
+            return None
+        if _timestamp(parent.index[rows-1]) != meta['last']:
+            return None
+        if timestamps is None:
+            timestamps = series_timestamps(parent)
+        if values is None:
+            values, _ = series_values(parent)
+            if values is None:
+                return None
+        if _digest(timestamps[:rows], values[:rows]) != meta['digest']:
+            return None
+        try:
+            cached = np.load(os.path.join(self._entry_path(key), self.values_file),
+                             mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if len(cached) != rows:
+            return None
+        return cached
+    
+    @staticmethod
+    def restore(cached, parent):
+        """Convert cached values to the values of an indicator, i.e. a
+        ValueArray in the currency of the parent values that uses the
+        cached array without copying it.
+        """
+        if isinstance(parent.data, ValueArray):
+            currency = parent.data.currency
+        else:
+            template = next((value for value in parent.data if value is not None), None)
+            currency = getattr(template, 'currency', None)
+        return ValueArray(cached, currency=currency, copy=False)
+    
+    def write(self, key, indicator, timestamps, values):
+        """Write the values of an indicator and the fingerprint of the
+        parent values they were computed from.
+        """
+        rows = min(len(indicator), len(timestamps))
+        path = self._entry_path(key)
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, self.meta_file)
+        # Without metadata the entry is invalid while the values are
+        # replaced
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        result = np.array(indicator.data[:rows], dtype=np.float64)
+        _replace_file(os.path.join(path, self.values_file),
+                      lambda fp: np.save(fp, result))
+        meta = {'version': self.version,
+                'class': f'{type(indicator).__module__}.{type(indicator).__qualname__}',
+                'rows': rows,
+                'first': int(timestamps[0]),
+                'last': int(timestamps[rows-1]),
+                'digest': _digest(timestamps[:rows], values[:rows])}
+        _replace_file(meta_path,
+                      lambda fp: fp.write(json.dumps(meta, indent=1).encode()))
+    
+    @staticmethod
+    def cacheable(cls):
+        """Whether the values of an indicator class are single floats
+        that it can continue from, i.e. whether it is an EMA or a moving
+        window with a kernel. Indicators that create inner indicators
+        from their parent are excluded.
+        """
+        if not isinstance(cls, type):
+            return False
+        if issubclass(cls, (MACDSignal, DMA)):
+            return False
+        return issubclass(cls, EMA) or getattr(cls, 'kernel', None) is not None
+    
+    def get(self, cls, parent, name=None, **params):
+        """Return the indicator `cls(parent, **params)`, continued from
+        or loaded from the cache if possible.
+        
+        Arguments
+        ---------
+        cls : type
+            The class of the indicator.
+        parent : DateSeries
+            The parent of the indicator.
+        name : {str or None, None}
+            A name of the parent. See `key`.
+        **params :
+            The keyword arguments of the indicator.
+        
+        Returns
+        -------
+        indicator
+        """
+        if not self.cacheable(cls):
+            return cls(parent, **params)
+        key = self.key(cls, parent, params, name=name)
+        if key is None:
+            return cls(parent, **params)
+        cached = self.load(key, parent)
+        if cached is None:
+            values, _ = series_values(parent)
+            if values is None:
+                return cls(parent, **params)
+            self.misses += 1
+            indicator = cls(parent, **params)
+        else:
+            indicator = cls(parent, cached=self.restore(cached, parent), **params)
+            if len(cached) == len(parent):
+                self.hits += 1
+            else:
+                self.extensions += 1
+                values, _ = series_values(parent)
+        if cached is None or len(cached) < len(parent):
+            self.write(key, indicator, series_timestamps(parent), values)
+        self._entries[id(indicator)] = (key, indicator, parent)
+        return indicator
+    
+    def save(self, indicator):
+        """Write the current values of an indicator that was returned by
+        `get`, e.g. after its parent was extended.
+        
+        Raises
+        ------
+        KeyError:
+            If the indicator was not returned by `get` of this cache.
+        """
+        entry = self._entries.get(id(indicator))
+        if entry is None or entry[1] is not indicator:
+            raise KeyError('The indicator was not loaded from this cache.')
+        parent = entry[2]
+        values, _ = series_values(parent)
+        self.write(entry[0], indicator, series_timestamps(parent), values)
+    
+    def stats(self):
+        """Return the number of indicators that were loaded completely,
+        continued from or not found in the cache.
+        """
+        return {'hits': self.hits,
+                'extensions': self.extensions,
+                'misses': self.misses}
@@ -2,6 +2,55 @@ from ..types.dateseries import DateSeries
 from .moving_window import SMA
 from .moving_averages import EMA, DMA
 from ..types.events import EventMultiHandler, EventManager
+from .moving_window import event_range
+import bisect
+
+
+def lookup(series, dateindex):
+    """Return whether a DateSeries holds a dateindex and its value.
+    """
+    i = bisect.bisect_left(series.index, dateindex)
+    if i < len(series.index) and series.index[i] == dateindex:
+        return True, series.data[i]
+    return False, None
+
+
+def changed(old, new):
+    if old is None or new is None:
+        return old is not new
+    try:
+        return bool(old != new)
+    except TypeError:
+        return True
+
+
+def write_values(series, index, data):
+    """Write values into a DateSeries. Values after its end are appended
+    with a single event. Missing dateindices are inserted and changed
+    values are set with a single slice assignment.
+    """
+    if len(index) == 0:
+        return
+    update = []
+    for i, (dateindex, value) in enumerate(zip(index, data)):
+        if len(series) == 0 or dateindex > series.index[-1]:
+            series.extend(index[i:], data[i:])
+            break
+        pos = bisect.bisect_left(series.index, dateindex)
+        if series.index[pos] != dateindex:
+            series.insert_value(dateindex, value=value)
+            update = [(p + 1 if p >= pos else p, val) for p, val in update]
+        elif changed(series.data[pos], value):
+            update.append((pos, value))
+    if len(update) == 1:
+        series[series.index[update[0][0]]] = update[0][1]
+    elif len(update) > 1:
+        first, last = update[0][0], update[-1][0]
+        values = series.data[first:last+1]
+        for pos, value in update:
+            values[pos-first] = value
+        series[first:last+1] = values
+
 
 class DualBaseWrapper(object):
     manager = EventManager()
@@ -58,33 +107,76 @@ class DualBaseWrapper(object):
         return False
 
 class MACDLine(DateSeries):
-    def __init__(self, parent, l_fast=None, l_slow=None, **kwargs):
+    """The difference of a fast and a slow EMA of the parent.
+    
+    New values of the EMAs are appended in O(1) each. If a value of an
+    EMA changes, only the value at that dateindex is recomputed.
+    
+    If a registry (see IndicatorRegistry) is given, the EMAs are taken
+    from it, such that they are shared with other indicators of the same
+    parent.
+    """
+    def __init__(self, parent, l_fast=None, l_slow=None, registry=None,
+                 **kwargs):
         super().__init__(parent)
         self.l_fast = l_fast if l_fast is not None else 12
         self.l_slow = l_slow if l_slow is not None else 26
-        self.ema_fast = EMA(parent, window_size=self.l_fast)
-        self.ema_slow = EMA(parent, window_size=self.l_slow)
+        if registry is None:
+            self.ema_fast = EMA(parent, window_size=self.l_fast)
+            self.ema_slow = EMA(parent, window_size=self.l_slow)
+        else:
+            self.ema_fast = registry.get(EMA, parent, window_size=self.l_fast)
+            self.ema_slow = registry.get(EMA, parent, window_size=self.l_slow)
         self.handler.listen('insert_value', self.insert_value_action)
         self.handler.listen('__setitem__', self.setitem_action)
         self.recalulate()
     
+    @staticmethod
+    def difference(fast, slow):
+        if fast is None or slow is None:
+            return None
+        return fast - slow
+    
+    def update_from(self, dateindex, count=None):
+        """Recompute the values from a dateindex on.
+        
+        Arguments
+        ---------
+        dateindex : datetime
+            The first dateindex to recompute.
+        count : {int or None, None}
+            The maximum number of values to recompute. If None all
+            values up to the end are recomputed.
+        """
+        fast = self.ema_fast
+        start = bisect.bisect_left(fast.index, dateindex)
+        stop = len(fast) if count is None else min(len(fast), start + count)
+        index, data = [], []
+        for i in range(start, stop):
+            found, slow = lookup(self.ema_slow, fast.index[i])
+            if not found:
+                continue
+            index.append(fast.index[i])
+            data.append(self.difference(fast.data[i], slow))
+        write_values(self, index, data)
+    
     def recalulate(self):
-        ema_diff = self.ema_fast - self.ema_slow
-        for dateindex, val in zip(ema_diff.index, ema_diff.data):
-            if dateindex in self:
-                self[dateindex] = val
-            else:
-                self.insert_value(dateindex, value=val)
+        if len(self.ema_fast) > 0:
+            self.update_from(self.ema_fast.index[0])
     
     def setitem_action(self, event):
         if not (event.emitter is self.ema_fast or event.emitter is self.ema_slow):
             return
-        self.recalulate()
+        start, stop = event_range(event)
+        if start >= len(event.emitter):
+            return
+        count = None if stop is None else stop - start
+        self.update_from(event.emitter.index[start], count=count)
     
     def insert_value_action(self, event):
         if not (event.emitter is self.ema_fast or event.emitter is self.ema_slow):
             return
-        self.recalulate()
+        self.update_from(event.args[1])
     
     def copy(self):
         return self.__class__(self.parent, l_fast=self.l_fast,
@@ -94,10 +186,16 @@ class MACDLine(DateSeries):
 
 class MACDSignal(EMA):
     def __init__(self, parent, l_signal=9, l_fast=None, l_slow=None,
-                 **kwargs):
+                 registry=None, **kwargs):
         self.l_signal = l_signal
         if not isinstance(parent, MACDLine):
-            parent = MACDLine(parent, l_fast=l_fast, l_slow=l_slow)
+            if registry is None:
+                parent = MACDLine(parent, l_fast=l_fast, l_slow=l_slow)
+            else:
+                parent = registry.get(MACDLine, parent,
+                                      l_fast=l_fast if l_fast is not None else 12,
+                                      l_slow=l_slow if l_slow is not None else 26,
+                                      registry=registry)
         self.l_fast = parent.l_fast
         self.l_slow = parent.l_slow
         super().__init__(parent, window_size=self.l_signal, **kwargs)
@@ -124,6 +222,7 @@ class Crossover(DateSeries):
         self.from_below = from_below
         parent = DualBaseWrapper(self.part1, self.part2)
         super().__init__(parent=parent, **kwargs)
+        self.handler.listen('insert_value', self.insert_value_action)
         self.handler.listen('__setitem__', self.setitem_action)
         self.recalculate()
     
@@ -136,45 +235,75 @@ class Crossover(DateSeries):
         #dateindex = event.args[1]
         #self.set_head(dateindex)
     
-    def recalculate(self):
-        from_above = False
-        if self.from_above:
-            tmp = self.part1 > self.part2
-            data = []
-            for i in range(len(tmp)):
-                if i == 0:
-                    data.append(False)
-                else:
-                    data.append(tmp.iloc(i-1) and not tmp.iloc(i))
-            from_above = DateSeries(data=data, index=tmp.index,
-                                    datetime_format=tmp.datetime_format)
-        from_below = False
-        if self.from_below:
-            tmp = self.part1 < self.part2
-            data = []
-            for i in range(len(tmp)):
-                if i == 0:
-                    data.append(False)
-                else:
-                    data.append(tmp[i-1] and not tmp[i])
-            from_below = DateSeries(data=data, index=tmp.index,
-                                    datetime_format=tmp.datetime_format)
-        combined = from_above or from_below
-        if not isinstance(combined, DateSeries):
-            tmp = self.parent
-            combined = DateSeries(data=[False for _ in range(len(tmp))],
-                                  index=tmp.index,
-                                  datetime_format=tmp.datetime_format)
+    @staticmethod
+    def state(value1, value2):
+        """Return whether the first value is above and whether it is
+        below the second one.
+        """
+        if value1 is None or value2 is None:
+            return False, False
+        return bool(value1 > value2), bool(value1 < value2)
+    
+    def crossed(self, previous, current):
+        above = self.from_above and previous[0] and not current[0]
+        below = self.from_below and previous[1] and not current[1]
+        return bool(above or below)
+    
+    def update_from(self, dateindex, count=None):
+        """Recompute the values from a dateindex on.
         
-        for dateindex, data_pt in zip(combined.index, combined.data):
-            if dateindex not in self:
-                self.insert_value(dateindex, value=data_pt)
-            else:
-                self[dateindex] = data_pt
+        The value at a dateindex only depends on the parts at that and
+        the previous common dateindex.
+        
+        Arguments
+        ---------
+        dateindex : datetime
+            The first dateindex to recompute.
+        count : {int or None, None}
+            The maximum number of values to recompute. If None all
+            values up to the end are recomputed.
+        """
+        part1 = self.part1
+        previous = None
+        pos = bisect.bisect_left(self.index, dateindex)
+        if pos > 0:
+            prev_dateindex = self.index[pos-1]
+            found1, value1 = lookup(part1, prev_dateindex)
+            found2, value2 = lookup(self.part2, prev_dateindex)
+            if found1 and found2:
+                previous = self.state(value1, value2)
+        index, data = [], []
+        for i in range(bisect.bisect_left(part1.index, dateindex), len(part1)):
+            if count is not None and len(index) >= count:
+                break
+            found, value2 = lookup(self.part2, part1.index[i])
+            if not found:
+                continue
+            current = self.state(part1.data[i], value2)
+            index.append(part1.index[i])
+            data.append(False if previous is None else self.crossed(previous, current))
+            previous = current
+        write_values(self, index, data)
+    
+    def recalculate(self):
+        if len(self.part1) > 0:
+            self.update_from(self.part1.index[0])
+    
+    def insert_value_action(self, event):
+        if not (event.emitter is self.part1 or event.emitter is self.part2):
+            return
+        self.update_from(event.args[1])
     
     def setitem_action(self, event):
-        if self.parent.is_parent(event.emitter):
-            self.recalculate()
+        if not (event.emitter is self.part1 or event.emitter is self.part2):
+            return
+        start, stop = event_range(event)
+        if start >= len(event.emitter):
+            return
+        # The value at the following dateindex depends on the changed
+        # ones as well
+        count = None if stop is None else stop - start + 1
+        self.update_from(event.emitter.index[start], count=count)
     
     #def set_head_action(self, event):
         #if self.parent.is_parent(event.emitter):
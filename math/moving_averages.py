@@ -1,6 +1,56 @@
 import warnings
 from ..types.dateseries import DateSeries
+from .moving_window import series_values, event_range, write_aligned, wrap_results, own_values
+import bisect
 import datetime
+import math
+import numpy as np
+
+
+def ema_recurrence(values, alpha, initial=None):
+    """Evaluate y[i] = alpha * values[i] + (1 - alpha) * y[i-1].
+    
+    The recurrence is solved in closed form block by block:
+    y[j] = beta**j * (y[0] + alpha * sum_k beta**-k * values[k]) with
+    beta = 1 - alpha. The blocks are short enough that beta**-k does
+    not overflow, so the cost is linear and vectorized.
+    
+    Arguments
+    ---------
+    values : numpy.ndarray
+        The float64 input values.
+    alpha : float
+        The smoothing factor.
+    initial : {float or None, None}
+        The value before values[0]. If None, y[0] = values[0].
+    
+    Returns
+    -------
+    numpy.ndarray
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ret = np.empty(len(values))
+    if len(values) == 0:
+        return ret
+    beta = 1. - alpha
+    if initial is None:
+        ret[0] = values[0]
+        start = 1
+    else:
+        start = 0
+    last = ret[0] if initial is None else initial
+    if beta <= 0.:
+        ret[start:] = alpha * values[start:]
+        return ret
+    block = int(150. / -math.log10(beta)) if beta < 1. else len(values)
+    block = max(1, min(block, len(values)))
+    powers = beta ** np.arange(1, block + 1)
+    for i in range(start, len(values), block):
+        chunk = values[i:i+block]
+        weights = powers[:len(chunk)]
+        ret[i:i+len(chunk)] = weights * (last + alpha * np.cumsum(chunk / weights))
+        last = ret[i+len(chunk)-1]
+    return ret
 
 
 class EMA(DateSeries):
@@ -22,90 +72,140 @@ class EMA(DateSeries):
             self.alpha = alpha
         self.inv_alpha = 1 - self.alpha
         
-        # index, data = self.initialize_from_parent(parent)
-        index, data = [], []
+        self._last = None
+        self._position = -1
+        cached = kwargs.pop('cached', None)
+        if cached is None:
+            index, data = self.initialize_from_parent(parent)
+        else:
+            index, data = self.resume_from_parent(parent, cached)
         
         super().__init__(parent, index=index, data=data, **kwargs)
         self.handler.listen('insert_value', self.insert_value_action)
         self.handler.listen('__setitem__', self.setitem_action)
-        self.compute_from_index(0)
-        
+    
     def initialize_from_parent(self, parent):
-        index, data = [], []
-        for i in range(len(parent)):
-            index.append(parent.index[i])
-            if parent.data[i] is None:
-                data.append(None)
+        data = self.compute(parent, 0, None)
+        return list(parent.index), data
+    
+    def resume_from_parent(self, parent, cached):
+        """Continue the values that were computed for the first
+        dateindices of the parent (e.g. by an earlier run) up to the end
+        of the parent.
+        
+        Arguments
+        ---------
+        parent : DateSeries
+            The parent.
+        cached : list or ValueArray
+            The values for the first `len(cached)` dateindices of the
+            parent. A ValueArray is used without copying.
+        """
+        start = len(cached)
+        last = None
+        for value in reversed(cached):
+            if value is not None:
+                last = float(value)
+                break
+        data = own_values(cached, len(parent))
+        if start >= len(parent):
+            self._last = last
+            self._position = len(parent) - 1
+            return list(parent.index), data
+        data.extend(self.compute(parent, start, last))
+        return list(parent.index), data
+    
+    def compute(self, parent, start, last):
+        """Compute the values for the parent values from a position on.
+        
+        Arguments
+        ---------
+        parent : DateSeries
+            The parent.
+        start : int
+            The position of the first value to compute.
+        last : float or None
+            The last value before `start` that is not None. If None, the
+            average is seeded with the first parent value that is not
+            None.
+        
+        Returns
+        -------
+        ValueArray or list:
+            The values for the positions start to len(parent) - 1 (see
+            wrap_results). The state of the recurrence is updated to the
+            last position.
+        """
+        values, nones = series_values(parent)
+        if values is None:
+            data = []
+            for value in parent.data[start:]:
+                if value is not None:
+                    last = value if last is None else self.alpha * value + self.inv_alpha * last  # noqa: E501
+                    value = last
+                data.append(value)
+            self._last = None if last is None else float(last)
+            self._position = len(parent) - 1
+            return data
+        values = values[start:]
+        valid = np.flatnonzero(~nones[start:])
+        results = np.full(len(values), np.nan)
+        results[valid] = ema_recurrence(values[valid], self.alpha,
+                                        initial=None if last is None else float(last))
+        if len(valid) > 0:
+            last = results[valid[-1]]
+        self._last = None if last is None else float(last)
+        self._position = len(parent) - 1
+        return wrap_results(parent, results, start=start)
+    
+    def last_value_before(self, index):
+        """Return the last value before a position that is not None.
+        """
+        for i in range(min(index, len(self)) - 1, -1, -1):
+            if self.data[i] is not None and math.isfinite(float(self.data[i])):
+                return float(self.data[i])
+        return None
+    
+    def append_from_index(self, index):
+        """Append the values for the parent values that were appended at
+        and after a position. Costs O(1) per value.
+        """
+        parent = self.parent
+        last = self._last
+        data = []
+        for value in parent.data[index:]:
+            amount = None if value is None else float(value)
+            if amount is None or not math.isfinite(amount):
+                # Missing values, as in series_values
+                value = None
             else:
-                if all([pt is None for pt in data]):
-                    data.append(parent.data[i])
-                    continue
-                curr_data = None
-                j = 1
-                while curr_data is None and j <= i:
-                    curr_data = data[i-j]
-                    j += 1
-                if curr_data is None:
-                    val = None
+                last = amount if last is None else self.alpha * amount + self.inv_alpha * last  # noqa: E501
+                if hasattr(value, 'copy_new_amount'):
+                    value = value.copy_new_amount(last)
                 else:
-                    val = self.alpha * parent.data[i] + self.inv_alpha * curr_data  # noqa: E501
-                data.append(val)
-        return index, data
+                    value = last
+            data.append(value)
+        self._last = last
+        self._position = len(parent) - 1
+        self.extend(parent.index[index:], data)
     
     def compute_from_index(self, index):
-        if index >= len(self):
-            if index >= len(self.parent):
-                return
-            for i in range(len(self), index+1):
-                self.insert_value(self.parent.index[i], value=None)
-            
-        for i in range(index, len(self.parent)):
-            if self.parent.data[i] is None:
-                if i < len(self):
-                    self[i] = None
-                else:
-                    self.insert_value(self.parent.index[i], value=None)
-            else:
-                if i == index:
-                    if all([pt is None for pt in self.data]):
-                        self[i] = self.parent.data[i]
-                        continue
-                curr_data = None
-                j = 1
-                while curr_data is None and j <= i:
-                    curr_data = self.data[i-j]
-                    j += 1
-                if curr_data is None:
-                    val = None
-                else:
-                    val = self.alpha * self.parent.data[i] + self.inv_alpha * curr_data
-                curr_dateindex = self.parent.index[i]
-                if curr_dateindex in self:
-                    self[curr_dateindex] = val
-                else:
-                    self.insert_value(curr_dateindex, value=val)
-                    
+        parent = self.parent
+        if index >= len(parent):
+            return
+        if index == len(self) and self._position == index - 1:
+            self.append_from_index(index)
+            return
+        data = self.compute(parent, index, self.last_value_before(index))
+        write_aligned(self, parent, index, data)
+    
     def setitem_action(self, event):
         if event.emitter is self:
             return
         if not self.is_parent(event.emitter):
             return
-        dateindex = event.args[1]
-        if isinstance(dateindex, slice):
-            dateindex = slice.start
-            if dateindex is None:
-                dateindex = 0
-        if isinstance(dateindex, str):
-            datetime.datetime.strptime(start, self.parent.datetime_format)
-        if isinstance(dateindex, datetime.datetime):
-            if dateindex in self.parent.index:
-                dateindex = self.parent.index.index(dateindex)
-            else:
-                raise ValueError('Dateindex {} not in DateSeries.'.format(dateindex))
-        if isinstance(dateindex, int):
-            self.compute_from_index(dateindex)
-        else:
-            raise TypeError
+        start, _ = event_range(event)
+        self.compute_from_index(start)
     
     def insert_value_action(self, event):
         if event.emitter is self:
@@ -113,7 +213,7 @@ class EMA(DateSeries):
         if not self.is_parent(event.emitter):
             return
         dateindex = event.args[1]
-        i = self.parent.index.index(dateindex)
+        i = bisect.bisect_left(self.parent.index, dateindex)
         self.compute_from_index(i)
     
     def copy(self):
@@ -1,20 +1,457 @@
 import numpy as np
+import bisect
 import datetime
+import math
+from collections import deque
 from ..types.dateseries import DateSeries
+from ..types.valuearray import ValueArray
+
+
+def series_values(series):
+    """Return the values of a DateSeries as float64 array and a mask of
+    the values that are missing, i.e. None or not finite.
+    
+    Values stored in a ValueArray (e.g. the close, open, ... SubFeeds
+    of a columnar CandleFeed) are returned without copying.
+    
+    Returns
+    -------
+    values : numpy.ndarray or None
+        None if not all values can be converted to float. None values
+        are NaN.
+    nones : numpy.ndarray of bool or None
+    """
+    if isinstance(series.data, ValueArray):
+        values = series.data.values()
+        return values, ~np.isfinite(values)
+    try:
+        # None is converted to NaN
+        values = np.array(series.data, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None, None
+    if values.ndim != 1:
+        return None, None
+    # NaN and infinite values are missing values, just like None
+    nones = ~np.isfinite(values)
+    return values, nones
+
+
+def wrap_results(parent, results, start=0):
+    """Return float results for the dateindices of a parent from a
+    position on in the type of the parent values.
+    
+    If the parent stores its values in a ValueArray or its values are
+    plain numbers, the results are returned as ValueArray in the same
+    currency, which wraps them only on access. Otherwise every result is
+    wrapped with the `copy_new_amount` method of the parent value at the
+    same dateindex.
+    
+    Arguments
+    ---------
+    parent : DateSeries
+        The parent.
+    results : numpy.ndarray
+        The float64 results for the positions start, start + 1, ... of
+        the parent. NaN results are None.
+    start : {int, 0}
+        The position of the first result.
+    
+    Returns
+    -------
+    ValueArray or list
+    """
+    index = parent.index[start:start+len(results)]
+    if isinstance(parent.data, ValueArray):
+        return ValueArray(results, currency=parent.data.currency,
+                          index=index, copy=False)
+    templates = parent.data
+    template = next((value for value in templates[start:] if value is not None), None)
+    if not hasattr(template, 'copy_new_amount'):
+        return ValueArray(results, index=index, copy=False)
+    return [None if value != value else templates[start+i].copy_new_amount(value)
+            for i, value in enumerate(results.tolist())]
+
+
+def own_values(values, stop):
+    """Return the first `stop` values of a list or ValueArray as data
+    of a new DateSeries. A ValueArray that is not longer is returned as
+    it is, lists are copied.
+    """
+    if isinstance(values, ValueArray):
+        return values if len(values) <= stop else values[:stop]
+    return list(values[:stop])
+
+
+def event_range(event):
+    """Return the positions in the emitter of an `insert_value` or
+    `__setitem__` event that were changed.
+    
+    Returns
+    -------
+    start : int
+        The first changed position.
+    stop : int or None
+        The position after the last changed one. None if all values
+        from start on may have changed.
+    """
+    emitter = event.emitter
+    dateindex = event.args[1]
+    if isinstance(dateindex, slice):
+        start, stop, _ = emitter.sanitize_slice(dateindex)
+        if start < 0:
+            start += len(emitter)
+        if stop < 0:
+            stop += len(emitter)
+        return int(start), int(stop)
+    if isinstance(dateindex, str):
+        dateindex = datetime.datetime.strptime(dateindex,
+                                               emitter.datetime_format)
+    if isinstance(dateindex, datetime.datetime):
+        start = bisect.bisect_left(emitter.index, dateindex)
+        if start == len(emitter.index) or emitter.index[start] != dateindex:
+            raise ValueError(f'Dateindex {dateindex} not in DateSeries.')
+        return start, start + 1
+    if isinstance(dateindex, int):
+        if dateindex < 0:
+            dateindex += len(emitter)
+        return dateindex, dateindex + 1
+    raise TypeError
+
+
+def write_aligned(series, parent, start, data):
+    """Write the values for the positions start, start + 1, ... of the
+    parent into a DateSeries that shares the index of its parent.
+    
+    Missing dateindices are inserted. Existing values are set with a
+    single slice assignment and values after the end of the series are
+    appended with `extend`, such that listeners receive one event per
+    step instead of one per value.
+    """
+    stop = start + len(data)
+    for i in range(start, min(stop, len(series))):
+        if series.index[i] != parent.index[i]:
+            series.insert_value(parent.index[i], value=data[i-start])
+    end = min(len(series), stop)
+    if end - start == 1:
+        series[parent.index[start]] = data[0]
+    elif end > start:
+        series[start:end] = data[:end-start]
+    if end < stop:
+        series.extend(parent.index[end:stop], data[end-start:])
+
+
+class WindowKernel(object):
+    """Compute a window operation from the values that enter and leave
+    a window of fixed size, such that every new value costs O(1)
+    independent of the window size.
+    
+    The result is None while the window is not full or contains a
+    missing value, i.e. None, NaN or an infinite value. Missing values
+    are kept out of the computation. Note that a `window_operation`
+    like `np.mean` returns NaN for windows that contain NaN, so
+    indicators that use a kernel return None where they used to return
+    NaN. Values are converted with `float`
+    for the computation. If the values provide `copy_new_amount` (e.g.
+    Money), results are wrapped in the type of the newest value of the
+    window, i.e. of the value at the dateindex of the result.
+    
+    Arguments
+    ---------
+    size : int
+        The size of the window.
+    position : {int, -1}
+        The position of the last value that was pushed before the
+        kernel was created.
+    """
+    def __init__(self, size, position=-1):
+        self.size = size
+        self.position = position
+        self.window = deque()
+        self.nones = 0
+    
+    def push(self, value):
+        """Add the next value and return the result of the window that
+        ends with it.
+        """
+        self.position += 1
+        x = None if value is None else float(value)
+        if x is None or not math.isfinite(x):
+            value = None
+            self.nones += 1
+        else:
+            self.add(x, value)
+        self.window.append(value)
+        if len(self.window) > self.size:
+            old = self.window.popleft()
+            if old is None:
+                self.nones -= 1
+            else:
+                self.remove(float(old), old)
+        if len(self.window) < self.size or self.nones > 0:
+            return None
+        return self.result()
+    
+    def wrap(self, amount):
+        template = self.window[-1]
+        if hasattr(template, 'copy_new_amount'):
+            return template.copy_new_amount(amount)
+        return amount
+    
+    def add(self, x, value):
+        raise NotImplementedError
+    
+    def remove(self, x, value):
+        raise NotImplementedError
+    
+    def result(self):
+        raise NotImplementedError
+    
+    @classmethod
+    def bulk(cls, x, size):
+        """Compute the results of all full windows of a float64 array
+        at once.
+        
+        Returns
+        -------
+        numpy.ndarray:
+            The len(x) - size + 1 results. Windows that contain NaN
+            result in NaN.
+        """
+        raise NotImplementedError
+    
+    @classmethod
+    def bulk_windows(cls, x, size, func, max_elements=2**22):
+        """Apply a reduction along the windows of a sliding window view
+        block by block, such that at most `max_elements` values are
+        processed at once.
+        """
+        view = np.lib.stride_tricks.sliding_window_view(x, size)
+        ret = np.empty(len(view))
+        rows = max(1, max_elements // size)
+        for start in range(0, len(view), rows):
+            ret[start:start+rows] = func(view[start:start+rows], axis=1)
+        return ret
+
+
+class MeanKernel(WindowKernel):
+    """Mean of the window, updated with Welford's algorithm. The running
+    moments are recomputed from the window every `refresh` removals and
+    whenever the second moment drops by a factor of 1e6, to bound the
+    accumulation of rounding errors.
+    """
+    refresh = 1024
+    
+    def __init__(self, size, position=-1):
+        super().__init__(size, position=position)
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+        self._removed = 0
+        self._peak = 0.
+    
+    def add(self, x, value):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.m2 > self._peak:
+            self._peak = self.m2
+    
+    def remove(self, x, value):
+        self.count -= 1
+        if self.count == 0:
+            self.mean = 0.
+            self.m2 = 0.
+            return
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (x - self.mean)
+        self._removed += 1
+        if self._removed >= max(self.refresh, self.size) or self.m2 < 1e-6 * self._peak:
+            self._recompute()
+    
+    def _recompute(self):
+        values = [float(value) for value in self.window if value is not None]
+        self._removed = 0
+        self.count = len(values)
+        if self.count == 0:
+            self.mean = 0.
+            self.m2 = 0.
+            self._peak = 0.
+            return
+        self.mean = math.fsum(values) / self.count
+        self.m2 = math.fsum((x - self.mean) ** 2 for x in values)
+        self._peak = self.m2
+    
+    def result(self):
+        return self.wrap(self.mean)
+    
+    @classmethod
+    def bulk(cls, x, size):
+        """Sums of a suffix of one block of `size` values and a prefix of
+        the next, as in MinKernel.bulk. Unlike a cumulative sum over all
+        values, the rounding errors of a window only depend on the
+        values of its two blocks. Windows with non-finite values are
+        computed directly.
+        """
+        bad = ~np.isfinite(x)
+        clean = np.where(bad, 0., x)
+        num = len(x)
+        blocks = -(-num // size)
+        padded = np.zeros(blocks * size)
+        padded[:num] = clean
+        padded = padded.reshape(blocks, size)
+        prefix = np.cumsum(padded, axis=1).ravel()
+        suffix = np.cumsum(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+        starts = np.arange(num - size + 1)
+        ret = prefix[size-1:num].copy()
+        split = starts % size != 0
+        ret[split] += suffix[:num-size+1][split]
+        ret /= size
+        if bad.any():
+            counts = np.zeros(len(x) + 1, dtype=np.int64)
+            np.cumsum(bad, out=counts[1:])
+            for i in np.flatnonzero(counts[size:] - counts[:-size]):
+                ret[i] = np.mean(x[i:i+size])
+        return ret
+
+
+class StdKernel(MeanKernel):
+    """Population standard deviation of the window (as numpy.std).
+    """
+    def result(self):
+        return self.wrap(math.sqrt(max(self.m2, 0.) / self.count))
+    
+    @classmethod
+    def bulk(cls, x, size):
+        return cls.bulk_windows(x, size, np.std)
+
+
+class MinKernel(WindowKernel):
+    """Minimum of the window, kept in a monotonic deque of
+    (position, float, value). The minimum value itself is returned.
+    """
+    def __init__(self, size, position=-1):
+        super().__init__(size, position=position)
+        self.extrema = deque()
+    
+    def is_dominated(self, old, new):
+        return old > new
+    
+    def add(self, x, value):
+        while len(self.extrema) > 0 and self.is_dominated(self.extrema[-1][1], x):
+            self.extrema.pop()
+        self.extrema.append((self.position, x, value))
+    
+    def remove(self, x, value):
+        if self.extrema[0][0] <= self.position - self.size:
+            self.extrema.popleft()
+    
+    def result(self):
+        return self.wrap(self.extrema[0][1])
+    
+    @staticmethod
+    def ufunc():
+        return np.minimum
+    
+    @classmethod
+    def bulk(cls, x, size):
+        """Van Herk/Gil-Werman algorithm: every window spans at most two
+        blocks of `size` values, so its extreme value is the extreme
+        of a suffix of one block and a prefix of the next.
+        """
+        ufunc = cls.ufunc()
+        num = len(x)
+        blocks = -(-num // size)
+        padded = np.full(blocks * size, x[-1])
+        padded[:num] = x
+        padded = padded.reshape(blocks, size)
+        prefix = ufunc.accumulate(padded, axis=1).ravel()
+        suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+        return ufunc(suffix[:num-size+1], prefix[size-1:num])
+
+
+class MaxKernel(MinKernel):
+    """Maximum of the window. See MinKernel.
+    """
+    def is_dominated(self, old, new):
+        return old < new
+    
+    @staticmethod
+    def ufunc():
+        return np.maximum
 
 
 class MovingWindowOperation(DateSeries):
+    """A DateSeries that holds the result of a window operation applied
+    to the values of its parent.
+    
+    Subclasses that set `kernel` to a WindowKernel are computed in a
+    streaming fashion: appending to the parent costs O(1) per value and
+    changes to the parent are recomputed from the first value whose
+    window changed. Otherwise `window_operation` is called on a list of
+    the values of every window.
+    
+    Notes
+    -----
+    -With a kernel, windows that contain NaN or infinite values result
+     in None, like windows that contain None. Before SMA, Std, Min and
+     Max used kernels, NaN propagated into their results. Check results
+     with `is None` instead of `np.isnan`.
+    """
+    kernel = None
+    
     def __init__(self, parent, min_size=None, max_size=None, **kwargs):
         self.window_operation = kwargs.pop('window_operation', NotImplemented)
         self.min_size = min_size
         self.max_size = max_size
+        self._state = None
         self.set_window_operation()
-        index, data = self.initialize_from_parent(parent)
+        cached = kwargs.pop('cached', None)
+        if cached is None or self.kernel is None:
+            index, data = self.initialize_from_parent(parent)
+        else:
+            index, data = self.resume_from_parent(parent, cached)
         super().__init__(parent, index=index, data=data, **kwargs)
         self.handler.listen('insert_value', self.insert_value_action)
         self.handler.listen('__setitem__', self.setitem_action)
     
+    def bulk_from_parent(self, parent):
+        """Compute the values for all dateindices of the parent at once
+        with the bulk method of the kernel.
+        
+        Returns
+        -------
+        ValueArray or list or None:
+            None if the values of the parent are not numeric. See
+            `wrap_results` otherwise.
+        """
+        size = self.max_size
+        num = len(parent)
+        values, nones = series_values(parent)
+        if values is None:
+            return None
+        results = np.full(num, np.nan)
+        if num >= size:
+            results[size-1:] = self.kernel.bulk(values, size)
+            counts = np.zeros(num + 1, dtype=np.int64)
+            np.cumsum(nones, out=counts[1:])
+            invalid = counts[size:] != counts[:-size]
+            results[size-1:][invalid] = np.nan
+        return wrap_results(parent, results)
+    
     def initialize_from_parent(self, parent):
+        if self.kernel is not None:
+            data = self.bulk_from_parent(parent)
+            if data is None:
+                self._state = self.kernel(self.max_size)
+                data = [self._state.push(value) for value in parent.data]
+            else:
+                start = max(0, len(parent) - self.max_size)
+                self._state = self.kernel(self.max_size, position=start-1)
+                for value in parent.data[start:]:
+                    self._state.push(value)
+            return list(parent.index), data
         index, data = [], []
         for i in range(len(parent)):
             curr_dateindex = parent.index[i]
@@ -24,12 +461,71 @@ class MovingWindowOperation(DateSeries):
             else:
                 stop = i + 1
                 start = 0 if self.max_size is None else max(0, stop - self.max_size)  # noqa: E501
-                window = parent[start:stop].as_list()
-                val = self.window_operation(window)
+                val = self.window_operation(parent.data[start:stop])
                 data.append(val)
         return index, data
     
-    def calculate_windows_from_index(self, index):
+    def resume_from_parent(self, parent, cached):
+        """Continue the values that were computed for the first
+        dateindices of the parent (e.g. by an earlier run) up to the end
+        of the parent with the kernel. Only the last window of the
+        cached part is read from the parent again.
+        
+        Arguments
+        ---------
+        parent : DateSeries
+            The parent.
+        cached : list or ValueArray
+            The values for the first `len(cached)` dateindices of the
+            parent. A ValueArray is used without copying.
+        """
+        index = min(len(cached), len(parent))
+        start = max(0, index - self.max_size + 1)
+        self._state = self.kernel(self.max_size, position=start-1)
+        for value in parent.data[start:index]:
+            self._state.push(value)
+        data = own_values(cached, index)
+        data.extend(self._state.push(value) for value in parent.data[index:])
+        return list(parent.index), data
+    
+    def stream_from_index(self, index, count=None):
+        """Recompute the values from a position of the parent on with
+        the kernel.
+        
+        Arguments
+        ---------
+        index : int
+            The first position to recompute.
+        count : {int or None, None}
+            The number of positions to recompute. If None all values up
+            to the end are recomputed. Values that are missing at the
+            end are always computed.
+        """
+        parent = self.parent
+        if index >= len(parent):
+            return
+        state = self._state
+        if state is not None and index == len(self) and state.position == index - 1:
+            data = [state.push(value) for value in parent.data[index:]]
+            self.extend(parent.index[index:], data)
+            return
+        stop = len(parent) if count is None else min(len(parent), index + count)
+        start = max(0, index - self.max_size + 1)
+        state = self.kernel(self.max_size, position=start-1)
+        self._state = None
+        for i in range(start, index):
+            state.push(parent.data[i])
+        data = [state.push(value) for value in parent.data[index:stop]]
+        write_aligned(self, parent, index, data)
+        if stop == len(parent):
+            self._state = state
+        elif len(self) < len(parent):
+            self.stream_from_index(len(self))
+    
+    def calculate_windows_from_index(self, index, count=None):
+        if self.kernel is not None:
+            self.stream_from_index(index, count=count)
+            return
         if index >= len(self):
             if index >= len(self.parent):
                 return
@@ -46,8 +542,7 @@ class MovingWindowOperation(DateSeries):
             else:
                 stop = i + 1
                 start = 0 if self.max_size is None else max(0, stop - self.max_size)  # noqa: E501
-                window = self.parent[start:stop].as_list()
-                val = self.window_operation(window)
+                val = self.window_operation(self.parent.data[start:stop])
                 if curr_dateindex in self:
                     self[curr_dateindex] = val
                 else:
@@ -58,23 +553,12 @@ class MovingWindowOperation(DateSeries):
             return
         if not self.is_parent(event.emitter):
             return
-        dateindex = event.args[1]
-        if isinstance(dateindex, slice):
-            dateindex = slice.start
-            if dateindex is None:
-                dateindex = 0
-        if isinstance(dateindex, str):
-            dateindex = datetime.datetime.strptime(dateindex,
-                                                   self.parent.datetime_format)
-        if isinstance(dateindex, datetime.datetime):
-            if dateindex in self.parent.index:
-                dateindex = self.parent.index.index(dateindex)
-            else:
-                raise ValueError(f'Dateindex {dateindex} not in DateSeries.')
-        if isinstance(dateindex, int):
-            self.calculate_windows_from_index(dateindex)
-        else:
-            raise TypeError
+        start, stop = event_range(event)
+        count = None
+        if stop is not None and self.max_size is not None:
+            # Values change up to a window after the last changed one
+            count = stop - start + self.max_size - 1
+        self.calculate_windows_from_index(start, count=count)
     
     def insert_value_action(self, event):
         if event.emitter is self:
@@ -82,8 +566,8 @@ class MovingWindowOperation(DateSeries):
         if not self.is_parent(event.emitter):
             return
         dateindex = event.args[1]
-        i = self.parent.index.index(dateindex)
-        self.calculate_windows_from_index(i)
+        i = bisect.bisect_left(self.parent.index, dateindex)
+        self.calculate_windows_from_index(i, count=self.max_size)
     
     def copy(self):
         return self.__class__(self.parent, min_size=self.min_size,
@@ -113,21 +597,29 @@ class MovingWindow(SimpleMovingWindow):
 
 
 class SMA(SimpleMovingWindow):
+    kernel = MeanKernel
+    
     def set_window_operation(self):
         self.window_operation = lambda window: None if None in window else np.mean(window)  # noqa: E501
 
 
 class Min(SimpleMovingWindow):
+    kernel = MinKernel
+    
     def set_window_operation(self):
         self.window_operation = lambda window: None if None in window else np.min(window)  # noqa: E501
 
 
 class Max(SimpleMovingWindow):
+    kernel = MaxKernel
+    
     def set_window_operation(self):
         self.window_operation = lambda window: None if None in window else np.max(window)  # noqa: E501
 
 
 class Std(SimpleMovingWindow):
+    kernel = StdKernel
+    
     def set_window_operation(self):
         self.window_operation = lambda window: None if None in window else np.std(window)  # noqa: E501
 
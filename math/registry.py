@@ -0,0 +1,193 @@
+from collections import OrderedDict
+
+
+class RegistryEntry(object):
+    def __init__(self, key, indicator, parents):
+        self.key = key
+        self.indicator = indicator
+        self.parents = parents
+        self.refcount = 0
+        self.dependencies = []
+
+
+class IndicatorRegistry(object):
+    """Share indicators between their users instead of computing the
+    same indicator of the same parent multiple times.
+    
+    Indicators are keyed by the identity of their parents, their class
+    and their parameters. `get` returns the existing instance for a key
+    or creates it. Since indicators follow changes of their parents
+    through events, an existing instance is always up to date and the
+    key does not need to include the state of the parents.
+    
+    Every `get` increases the reference count of the entry and every
+    `release` decreases it. Entries that are no longer referenced are
+    kept for later users until more than `maxsize` of them exist. Then
+    the least recently used ones are evicted: they stop listening to
+    the events of their parents and release the indicators they got from
+    the registry during their construction.
+    
+    Arguments
+    ---------
+    maxsize : {int or None, 128}
+        The maximum number of unreferenced entries that are kept. If
+        None they are never evicted.
+    
+    Examples
+    --------
+    >>> registry = IndicatorRegistry()
+    >>> ema = registry.get(EMA, feed.close, window_size=12)
+    >>> ema is registry.get(EMA, feed.close, window_size=12)
+    True
+    >>> registry.stats()
+    {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'referenced': 1}
+    
+    Notes
+    -----
+    -The parameters must be hashable. Parameters that lead to the same
+     indicator but are passed differently (e.g. a window size and the
+     corresponding alpha of an EMA) result in different entries.
+    -Shared indicators must not be modified by their users.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = {}
+        self.idle = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._keys = {}
+        self._building = []
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, indicator):
+        return self._entry_of(indicator) is not None
+    
+    @staticmethod
+    def make_key(cls, parents, params):
+        return (cls, tuple(id(parent) for parent in parents),
+                tuple(sorted(params.items())))
+    
+    def _entry_of(self, indicator):
+        return self.entries.get(self._keys.get(id(indicator)))
+    
+    def get(self, cls, *parents, **params):
+        """Return the indicator of the parents with the given parameters
+        and increase its reference count.
+        
+        Arguments
+        ---------
+        cls : type
+            The class of the indicator.
+        *parents :
+            The positional arguments of the indicator, i.e. the series
+            it is computed from.
+        **params :
+            The keyword arguments of the indicator.
+        
+        Returns
+        -------
+        indicator:
+            `cls(*parents, **params)` or the instance that was created
+            by an earlier call with the same arguments.
+        """
+        key = self.make_key(cls, parents, params)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = RegistryEntry(key, None, parents)
+            self._building.append(entry)
+            try:
+                entry.indicator = cls(*parents, **params)
+            except:
+                self._building.pop()
+                for dependency in entry.dependencies:
+                    self._release_entry(dependency)
+                raise
+            self._building.pop()
+            self.entries[key] = entry
+            self._keys[id(entry.indicator)] = key
+        else:
+            self.hits += 1
+            self.idle.pop(key, None)
+        if len(self._building) > 0:
+            self._building[-1].dependencies.append(entry)
+        entry.refcount += 1
+        return entry.indicator
+    
+    def release(self, indicator):
+        """Decrease the reference count of an indicator that was
+        returned by `get`.
+        
+        Raises
+        ------
+        KeyError:
+            If the indicator is not in the registry.
+        """
+        entry = self._entry_of(indicator)
+        if entry is None:
+            raise KeyError('The indicator is not in the registry.')
+        self._release_entry(entry)
+    
+    def _release_entry(self, entry):
+        if entry.refcount > 0:
+            entry.refcount -= 1
+        if entry.refcount == 0 and entry.key in self.entries:
+            self.idle[entry.key] = entry
+            self.idle.move_to_end(entry.key)
+            self._evict()
+    
+    def _evict(self):
+        if self.maxsize is None:
+            return
+        while len(self.idle) > self.maxsize:
+            key, entry = self.idle.popitem(last=False)
+            self._remove(entry)
+    
+    def _remove(self, entry):
+        del self.entries[entry.key]
+        del self._keys[id(entry.indicator)]
+        self.idle.pop(entry.key, None)
+        self.evictions += 1
+        self.detach(entry.indicator)
+        for dependency in entry.dependencies:
+            self._release_entry(dependency)
+    
+    @staticmethod
+    def detach(indicator):
+        """Stop all listeners of an indicator, such that it is no longer
+        updated by its parents.
+        """
+        handlers = getattr(indicator.handler, 'handlers', [indicator.handler])
+        for handler in handlers:
+            for event_tag, funcs in list(handler.subscriptions.items()):
+                for func in list(funcs):
+                    if getattr(func, '__self__', None) is indicator:
+                        handler.stop_listen(event_tag, func)
+    
+    def clear(self):
+        """Evict all unreferenced entries.
+        """
+        while len(self.idle) > 0:
+            key, entry = self.idle.popitem(last=False)
+            self._remove(entry)
+    
+    def stats(self):
+        """Return the number of hits, misses and evictions and the
+        number of all and of referenced entries.
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'referenced': len(self.entries) - len(self.idle)}
+    
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+default_registry = IndicatorRegistry()
@@ -1,4 +1,4 @@
-from ..math import MACDSignal, Crossover
+from ..math import MACDSignal, Crossover, IndicatorRegistry
 from ..broker.order import BuyLongOrder, SellLongOrder
 from ..depot.position import Position
 
@@ -30,25 +30,80 @@ class BaseStrategy(object):
 
 
 class MACDStrat(BaseStrategy):
-    def __init__(self, broker, depot, candle_feeds=None):
+    """Buy when the MACD signal crosses the MACD line from below.
+    
+    The indicators are taken from a registry (see IndicatorRegistry).
+    By default every strategy uses its own registry. Pass the same
+    registry to multiple strategies (e.g. of a parameter sweep) on the
+    same feeds to share the indicators instead of computing them once
+    per strategy. Strategies that share a registry should call
+    `release` when they are no longer used (or be used as context
+    manager), such that the registry can evict their indicators.
+    
+    Arguments
+    ---------
+    broker : Broker
+        The broker to trade with.
+    depot : Depot
+        The depot of the strategy.
+    candle_feeds : {list of CandleFeed or None, None}
+        The feeds to trade.
+    registry : {IndicatorRegistry or None, None}
+        The registry of the indicators. If None a registry that is
+        private to the strategy is used.
+    
+    Examples
+    --------
+    >>> registry = IndicatorRegistry()
+    >>> with MACDStrat(broker, depot, feeds, registry=registry) as strat:
+    ...     orders = strat.suggest_orders()
+    """
+    def __init__(self, broker, depot, candle_feeds=None, registry=None):
         self.crosses_above = []
         self.crosses_below = []
+        self.registry = registry if registry is not None else IndicatorRegistry()
+        self.indicators = []
         super().__init__(broker, depot, candle_feeds=candle_feeds)
     
     def add_candle_feed(self, candle_feed):
         if candle_feed in self.broker:
             self.candle_feeds.append(candle_feed)
-            signal = MACDSignal(candle_feed.close)
+            registry = self.registry
+            signal = registry.get(MACDSignal, candle_feed.close,
+                                  l_signal=9, l_fast=12, l_slow=26,
+                                  registry=registry)
             macd = signal.macd
-            self.crosses_below.append(Crossover(signal, macd, from_above=False))
-            self.crosses_above.append(Crossover(signal, macd, from_below=False))
+            below = registry.get(Crossover, signal, macd, from_above=False)
+            above = registry.get(Crossover, signal, macd, from_below=False)
+            self.indicators.extend([signal, below, above])
+            self.crosses_below.append(below)
+            self.crosses_above.append(above)
+    
+    def release(self):
+        """Return the indicators of the strategy to the registry, such
+        that they can be evicted once no other strategy uses them.
+        """
+        for indicator in self.indicators:
+            self.registry.release(indicator)
+        self.indicators = []
+        self.candle_feeds = []
+        self.crosses_above = []
+        self.crosses_below = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
     
     def suggest_orders(self):
         orders = []
         for pos in self.positions:
             cf = pos.candle_feed
             op = pos.open_price
-            if cf.value.low < op * 0.9 or cf.value.high > op * 1.15:
+            low, high = cf.value.get_prices(('low', 'high'),
+                                            currency=getattr(op, 'currency', None))
+            if low < float(op) * 0.9 or high > float(op) * 1.15:
                 order = SellLongOrder(pos, pos.size)
                 orders.append(order)
         for cf, below, above in zip(self.candle_feeds,
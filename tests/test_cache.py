@@ -0,0 +1,43 @@
+import datetime
+from PyTrest.feed import CandleFeed
+from PyTrest.math import IndicatorCache, MovingWindow, SMA, MACDSignal
+from PyTrest.types import ValueArray
+
+
+def make_feed(num):
+    feed = CandleFeed(columnar=True)
+    index = [datetime.datetime(2020, 1, 1) + datetime.timedelta(days=i)
+             for i in range(num)]
+    data = [{'Open': 100. + i, 'Close': 100. + i % 7, 'High': 110. + i,
+             'Low': 90. + i, 'Volume': 1.} for i in range(num)]
+    feed.add_candles(index, data)
+    return feed
+
+
+def test_uncacheable_indicator_is_computed(tmp_path):
+    feed = make_feed(30)
+    cache = IndicatorCache(str(tmp_path))
+    window = cache.get(MovingWindow, feed.close, window_size=5)
+    assert isinstance(window, MovingWindow)
+    assert len(window) == len(feed)
+    assert len(window.data[-1]) == 5
+    assert cache.stats() == {'hits': 0, 'extensions': 0, 'misses': 0}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cached_indicator_is_reused(tmp_path):
+    feed = make_feed(30)
+    first = IndicatorCache(str(tmp_path)).get(SMA, feed.close, window_size=5)
+    cache = IndicatorCache(str(tmp_path))
+    second = cache.get(SMA, feed.close, window_size=5)
+    assert cache.stats()['hits'] == 1
+    assert isinstance(second.data, ValueArray)
+    assert [float(value) for value in second.data[4:]] == [float(value) for value in first.data[4:]]
+
+
+def test_composite_indicator_is_computed(tmp_path):
+    feed = make_feed(40)
+    cache = IndicatorCache(str(tmp_path))
+    signal = cache.get(MACDSignal, feed.close)
+    assert isinstance(signal, MACDSignal)
+    assert cache.stats() == {'hits': 0, 'extensions': 0, 'misses': 0}
@@ -0,0 +1,55 @@
+import datetime
+import numpy as np
+from PyTrest.feed import CandleFeed
+from PyTrest.math import SMA, Min, Max, Std, EMA
+
+
+def candles(num, missing):
+    index = [datetime.datetime(2020, 1, 1) + datetime.timedelta(days=i)
+             for i in range(num)]
+    data = [{'Open': 100. + i,
+             'Close': np.nan if i in missing else 100. + i,
+             'High': 110. + i,
+             'Low': 90. + i,
+             'Volume': 1.} for i in range(num)]
+    return index, data
+
+
+def as_floats(series):
+    return [None if value is None else float(value) for value in series.data]
+
+
+def test_streaming_matches_bulk_with_nan():
+    index, data = candles(60, missing={20, 41})
+    for cls in (SMA, Min, Max, Std):
+        streamed = CandleFeed(columnar=True)
+        indicator = cls(streamed.close, window_size=5)
+        for dateindex, candle in zip(index, data):
+            streamed.add_candles([dateindex], [candle])
+        bulk = CandleFeed(columnar=True)
+        bulk.add_candles(index, data)
+        expected = as_floats(cls(bulk.close, window_size=5))
+        result = as_floats(indicator)
+        assert len(result) == len(expected)
+        for value, other in zip(result, expected):
+            if other is None:
+                assert value is None
+            else:
+                assert abs(value - other) < 1e-9
+        # Windows with a missing value are None, later ones recover
+        assert result[20:25] == [None] * 5
+        assert result[25] is not None
+
+
+def test_ema_skips_nan():
+    index, data = candles(60, missing={20})
+    streamed = CandleFeed(columnar=True)
+    ema = EMA(streamed.close, window_size=5)
+    for dateindex, candle in zip(index, data):
+        streamed.add_candles([dateindex], [candle])
+    bulk = CandleFeed(columnar=True)
+    bulk.add_candles(index, data)
+    expected = as_floats(EMA(bulk.close, window_size=5))
+    result = as_floats(ema)
+    assert result[20] is None and expected[20] is None
+    assert np.allclose(result[21:], expected[21:])
@@ -0,0 +1,38 @@
+import datetime
+from PyTrest.feed import CandleFeed
+from PyTrest.types import ValueArray
+
+
+def make_feed(num):
+    index = [datetime.datetime(2020, 1, 1) + datetime.timedelta(days=i)
+             for i in range(num)]
+    data = [{'Open': 100. + i,
+             'Close': 101. + i,
+             'High': 110. + i,
+             'Low': 90. + i,
+             'Volume': 1000. + i} for i in range(num)]
+    feed = CandleFeed(columnar=True, currency='EUR')
+    feed.add_candles(index, data)
+    return feed
+
+
+def test_columnar_sub_feed_matches_candles():
+    feed = make_feed(10)
+    close = feed.close
+    assert isinstance(close.data, ValueArray)
+    for dateindex, candle, value in zip(feed.index, feed.data, close.data):
+        assert value.amount == candle.close.amount
+        assert value.currency == 'EUR'
+        assert value.conversion_date == dateindex
+    assert all(isinstance(value, float) for value in feed.volume.data)
+
+
+def test_columnar_sub_feed_follows_feed():
+    feed = make_feed(10)
+    close = feed.close
+    dateindex = feed.index[-1] + datetime.timedelta(days=1)
+    feed.add_candle(dateindex, {'Open': 1., 'Close': 2., 'High': 3.,
+                                'Low': 0.5, 'Volume': 4.})
+    assert close.index[-1] == dateindex
+    assert float(close.data[-1]) == 2.
+    assert close.data[-1].conversion_date == dateindex
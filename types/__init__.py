@@ -1,4 +1,6 @@
 from PyTrest.types.dateseries import DateSeries, DateSeriesWrapper
-from PyTrest.types.candle import Candle
+from PyTrest.types.candle import Candle, CandleRow, CandleArray
+from PyTrest.types.valuearray import ValueArray
 from PyTrest.types.priorityQueue import PriorityQueue
 from PyTrest.types.dictlist import DictList
+from PyTrest.types.events import EventProfiler, AsyncEventHandler
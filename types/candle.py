@@ -1,6 +1,7 @@
 import numpy as np
 import datetime
 import warnings
+from collections.abc import MutableMapping
 
 class Candle(object):
     """A class to handle stock prices in forms of candles.
@@ -203,9 +204,9 @@ class Candle(object):
         object or PyTrest.currency.Money:
             The value contained in the data dictionary.
         """
-        from ..currency import Money
-        if self.currency is not None and as_currency:
-            if k in list(self.names.values()) and not k == self.names['volume']:
+        if as_currency and self.currency is not None:
+            if k != self.names['volume'] and k in self.names.values():
+                from ..currency import Money
                 return Money(self.data.get(k, d),
                             currency=self.currency,
                             conversion_date=self.timestamp)
@@ -225,6 +226,71 @@ class Candle(object):
         """
         return self.get(self.names[name])
     
+    def get_raw(self, name):
+        """Get a value by any of the keys in names as a float. Unlike
+        the properties `open`, `close`, `high` and `low` this does not
+        create a PyTrest.currency.Money instance.
+        
+        Arguments
+        ---------
+        name : str
+            The key in names to access (e.g. `close`).
+        
+        Returns
+        -------
+        float:
+            The value in the currency of the Candle. NaN if the value is
+            missing.
+        """
+        val = self.data.get(self.names[name])
+        if val is None:
+            return np.nan
+        return float(val)
+    
+    def get_raw_many(self, names=('open', 'high', 'low', 'close')):
+        """Get multiple values by keys in names as floats.
+        
+        Arguments
+        ---------
+        names : {iterable of str, ('open', 'high', 'low', 'close')}
+            The keys in names to access.
+        
+        Returns
+        -------
+        tuple of float:
+            The values in the currency of the Candle in the order of
+            `names`.
+        """
+        return tuple(self.get_raw(name) for name in names)
+    
+    def get_prices(self, names=('open', 'high', 'low', 'close'),
+                   currency=None):
+        """Get multiple prices as floats in a given currency.
+        
+        The conversion factor is determined once for all values, such
+        that at most one conversion is done per call.
+        
+        Arguments
+        ---------
+        names : {iterable of str, ('open', 'high', 'low', 'close')}
+            The keys in names to access.
+        currency : {str or None, None}
+            The currency to return the prices in. If None or equal to
+            the currency of the Candle, no conversion is done.
+        
+        Returns
+        -------
+        numpy.ndarray:
+            The prices in the order of `names`.
+        """
+        ret = np.array(self.get_raw_many(names), dtype=np.float64)
+        if currency is None or self.currency is None or currency == self.currency:
+            return ret
+        from ..currency import Money
+        factor = Money(1., currency=self.currency).convert(currency,
+                                                           date=self.timestamp)
+        return ret * float(factor)
+    
     def convert(self, currency):
         """Convert this Candle to a Candle in another currency.
         
@@ -257,15 +323,11 @@ class Candle(object):
         return ret
     
     def intersecting_keys(self, other):
-        if not isinstance(other, type(self)):
+        if not isinstance(other, Candle):
             return
-        self_keys = list(self.keys())
-        other_keys = list(other.keys())
-        for key in self.required_keys:
-            self_keys.remove(self.names[key])
-            other_keys.remove(other.names[key])
-        
-        return list(set(self_keys).intersection(set(other_keys)))
+        self_required = {self.names[key] for key in self.required_keys}
+        other_required = {other.names[key] for key in other.required_keys}
+        return list((self.keys() - self_required) & (other.keys() - other_required))
     
     def as_dict(self):
         """Serialize this instance as a dictionary.
@@ -376,7 +438,7 @@ class Candle(object):
         return self.binary_operator(other, '__or__')
     
     def __eq__(self, other):
-        if isinstance(other, type(self)):
+        if isinstance(other, Candle):
             return self.data == other.data
         elif isinstance(other, dict):
             return self.data == other
@@ -394,3 +456,404 @@ class Candle(object):
     
     def __lt__(self, other):
         return self.binary_operator(other, '__lt__')
+
+
+class CandleRowData(MutableMapping):
+    """A dictionary-like view on a single row of a CandleArray. Reading
+    and writing goes straight to the column arrays.
+    
+    Arguments
+    ---------
+    array : CandleArray
+        The array that holds the data.
+    position : int
+        The row of the array this view refers to.
+    """
+    def __init__(self, array, position):
+        self.array = array
+        self.position = position
+    
+    def __getitem__(self, key):
+        return float(self.array.column(key)[self.position])
+    
+    def __setitem__(self, key, value):
+        if key not in self.array.keys():
+            self.array.add_column(key)
+        self.array.column(key)[self.position] = np.nan if value is None else float(value)
+    
+    def __delitem__(self, key):
+        raise TypeError('Cannot delete a single value from a CandleArray.')
+    
+    def __iter__(self):
+        return iter(self.array.keys())
+    
+    def __len__(self):
+        return len(self.array.keys())
+
+
+class CandleRow(Candle):
+    """A lightweight Candle that does not hold its own data but refers
+    to a single row of a CandleArray.
+    
+    Rows are created on access and are not meant to be stored. Inserting
+    rows into the array in front of the row shifts the data the row
+    refers to.
+    
+    Arguments
+    ---------
+    array : CandleArray
+        The array that holds the data.
+    position : int
+        The row of the array this view refers to.
+    """
+    def __init__(self, array, position):
+        self.array = array
+        self.position = position
+        self.required_keys = array.required_keys
+        self.names = array.names
+        self.currency = array.currency
+        self.timestamp = array.timestamp(position)
+        self._data = CandleRowData(array, position)
+    
+    @property
+    def data(self):
+        return self._data
+    
+    @data.setter
+    def data(self, data):
+        if data is None:
+            return
+        for key, val in data.items():
+            self._data[key] = val
+    
+    def get_raw(self, name):
+        return float(self.array.column(self.names[name])[self.position])
+    
+    def copy(self):
+        """Return a Candle that holds a copy of the data of this row.
+        """
+        return Candle(data=dict(self.data.items()), currency=self.currency,
+                      timestamp=self.timestamp, names=self.names.copy())
+
+
+class CandleArray(object):
+    """A list-like container of candles that stores the data of all
+    candles as one contiguous float64 array per key (struct-of-arrays).
+    
+    Indexing with an integer returns a CandleRow, a lightweight Candle
+    that reads from and writes to the arrays. Slicing returns a new
+    CandleArray. The arrays of a single key can be accessed without
+    copying through `column`.
+    
+    Arguments
+    ---------
+    columns : {dict or None, None}
+        A dictionary of the form {key: 1D array-like}. All arrays must
+        have the same length. Keys that are required by the names
+        dictionary but missing are filled with NaN.
+    names : {dict or None, None}
+        The names dictionary as used by Candle. Defaults to the names
+        of Candle.
+    currency : {str or None, None}
+        The currency of all candles in the array.
+    index : {list of datetime or None, None}
+        The timestamps of the rows. Usually this is the index of the
+        CandleFeed that holds the array.
+    copy : {bool, True}
+        Copy the given columns. If False, columns that already are
+        float64 arrays are used as they are, e.g. to keep memory-mapped
+        columns on disk until they are accessed.
+    
+    Notes
+    -----
+    -All values are stored as float64. Missing values are stored as
+     NaN.
+    -The arrays grow geometrically, such that appending a candle has
+     amortized constant cost.
+    """
+    def __init__(self, columns=None, names=None, currency=None,
+                 index=None, copy=True):
+        self.required_keys = ['open', 'close', 'high', 'low', 'volume']
+        self.names = {'open': 'Open',
+                      'close': 'Close',
+                      'high': 'High',
+                      'low': 'Low',
+                      'volume': 'Volume'}
+        if names is not None:
+            self.names.update(names)
+        self.currency = currency
+        self.index = index
+        
+        if columns is None:
+            columns = {}
+        lengths = set(len(col) for col in columns.values())
+        if len(lengths) > 1:
+            raise ValueError('All columns must have the same length.')
+        self._length = lengths.pop() if len(lengths) > 0 else 0
+        self._columns = {}
+        for key, col in columns.items():
+            if copy:
+                self._columns[key] = np.array(col, dtype=np.float64)
+            else:
+                self._columns[key] = np.asarray(col, dtype=np.float64)
+        for key in self.names.values():
+            if key not in self._columns:
+                self._columns[key] = np.full(self._length, np.nan)
+    
+    @classmethod
+    def from_candles(cls, candles, names=None, currency=None, index=None):
+        """Create a CandleArray from an iterable of Candles.
+        
+        Arguments
+        ---------
+        candles : iterable of Candle
+            The candles to store.
+        names : {dict or None, None}
+            The names dictionary to use. If None the names of the first
+            candle are used.
+        currency : {str or None, None}
+            The currency of the array. If None the currency of the first
+            candle is used.
+        index : {list of datetime or None, None}
+            The timestamps of the rows.
+        
+        Returns
+        -------
+        CandleArray
+        """
+        candles = list(candles)
+        if len(candles) > 0:
+            if names is None:
+                names = candles[0].names
+            if currency is None:
+                currency = candles[0].currency
+        ret = cls(names=names, currency=currency, index=index)
+        ret.extend(candles)
+        return ret
+    
+    def __len__(self):
+        return self._length
+    
+    @property
+    def capacity(self):
+        return len(next(iter(self._columns.values())))
+    
+    @property
+    def nbytes(self):
+        """The number of bytes occupied by the column arrays.
+        """
+        return sum(col.nbytes for col in self._columns.values())
+    
+    def keys(self):
+        """Return the keys of all stored columns.
+        """
+        return self._columns.keys()
+    
+    def column(self, key):
+        """Return the values of a key for all rows. The returned array
+        is a view on the stored data; no copy is made.
+        
+        Arguments
+        ---------
+        key : str
+            The key of the column as used in the data of the candles.
+        
+        Returns
+        -------
+        numpy.ndarray
+        """
+        return self._columns[key][:self._length]
+    
+    def column_by_name(self, name):
+        """Same as `column` but uses a key of the names dictionary
+        (e.g. `close`).
+        """
+        return self.column(self.names[name])
+    
+    def timestamp(self, position):
+        """Return the timestamp of a row or None if it is unknown.
+        """
+        if self.index is None or position >= len(self.index):
+            return None
+        return self.index[position]
+    
+    def reserve(self, capacity):
+        """Make sure the arrays can hold at least `capacity` rows
+        without reallocating.
+        """
+        if capacity <= self.capacity:
+            return
+        for key, col in self._columns.items():
+            new = np.full(capacity, np.nan)
+            new[:self._length] = col[:self._length]
+            self._columns[key] = new
+    
+    def add_column(self, key):
+        """Add a column filled with NaN.
+        """
+        if key in self._columns:
+            return
+        self._columns[key] = np.full(self.capacity, np.nan)
+    
+    def candle_values(self, candle):
+        """Map the data of a Candle or dictionary to the keys of this
+        array.
+        
+        Returns
+        -------
+        dict:
+            A dictionary of the form {key: float}.
+        """
+        if isinstance(candle, Candle):
+            data = candle.data
+            names = candle.names
+        elif isinstance(candle, dict):
+            data = candle
+            names = self.names
+        else:
+            msg = 'Can only store Candles or dictionaries in a '
+            msg += f'CandleArray. Got {type(candle)} instead.'
+            raise TypeError(msg)
+        renamed = {names[key]: self.names[key] for key in self.required_keys}
+        ret = {}
+        for key, val in data.items():
+            ret[renamed.get(key, key)] = np.nan if val is None else float(val)
+        return ret
+    
+    def insert(self, position, candle):
+        """Insert a candle in front of the given row, like list.insert.
+        """
+        length = self._length
+        if position < 0:
+            position = max(0, length + position)
+        position = min(position, length)
+        values = self.candle_values(candle)
+        for key in values:
+            self.add_column(key)
+        if length + 1 > self.capacity:
+            self.reserve(max(16, 2 * self.capacity))
+        for key, col in self._columns.items():
+            if position < length:
+                col[position+1:length+1] = col[position:length]
+            col[position] = values.get(key, np.nan)
+        self._length += 1
+    
+    def append(self, candle):
+        self.insert(self._length, candle)
+    
+    def extend(self, candles):
+        """Append multiple candles.
+        
+        Arguments
+        ---------
+        candles : CandleArray or dict or iterable of Candle
+            If a dictionary is given, it must be of the form
+            {key: 1D array-like} with all arrays of the same length.
+        """
+        if isinstance(candles, CandleArray):
+            renamed = {candles.names[key]: self.names[key]
+                       for key in self.required_keys}
+            columns = {renamed.get(key, key): candles.column(key)
+                       for key in candles.keys()}
+        elif isinstance(candles, dict):
+            columns = {key: np.asarray(col, dtype=np.float64)
+                       for key, col in candles.items()}
+        else:
+            columns = {}
+            rows = [self.candle_values(candle) for candle in candles]
+            for i, row in enumerate(rows):
+                for key, val in row.items():
+                    if key not in columns:
+                        columns[key] = np.full(len(rows), np.nan)
+                    columns[key][i] = val
+        lengths = set(len(col) for col in columns.values())
+        if len(lengths) > 1:
+            raise ValueError('All columns must have the same length.')
+        num = lengths.pop() if len(lengths) > 0 else 0
+        if num == 0:
+            return
+        for key in columns:
+            self.add_column(key)
+        length = self._length
+        if length + num > self.capacity:
+            self.reserve(max(length + num, 2 * self.capacity))
+        for key, col in self._columns.items():
+            if key in columns:
+                col[length:length+num] = columns[key]
+            else:
+                col[length:length+num] = np.nan
+        self._length += num
+    
+    def pop(self, position=-1):
+        """Remove a row and return its contents as a Candle.
+        """
+        if position < 0:
+            position += self._length
+        if position < 0 or position >= self._length:
+            raise IndexError('pop index out of range')
+        ret = self[position].copy()
+        for col in self._columns.values():
+            col[position:self._length-1] = col[position+1:self._length]
+            col[self._length-1] = np.nan
+        self._length -= 1
+        return ret
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            columns = {k: col[:self._length][key]
+                       for k, col in self._columns.items()}
+            index = None if self.index is None else self.index[key]
+            return CandleArray(columns=columns, names=self.names.copy(),
+                               currency=self.currency, index=index)
+        if key < 0:
+            key += self._length
+        if key < 0 or key >= self._length:
+            raise IndexError('CandleArray index out of range')
+        return CandleRow(self, key)
+    
+    def __setitem__(self, key, candle):
+        if isinstance(key, slice):
+            positions = range(*key.indices(self._length))
+            candles = list(candle)
+            if len(candles) != len(positions):
+                raise ValueError('Length of the slice and the value do not match.')
+            for pos, cand in zip(positions, candles):
+                self[pos] = cand
+            return
+        if key < 0:
+            key += self._length
+        if key < 0 or key >= self._length:
+            raise IndexError('CandleArray index out of range')
+        values = self.candle_values(candle)
+        for k in values:
+            self.add_column(k)
+        for k, col in self._columns.items():
+            col[key] = values.get(k, np.nan)
+    
+    def __iter__(self):
+        for i in range(self._length):
+            yield CandleRow(self, i)
+    
+    def __eq__(self, other):
+        if isinstance(other, CandleArray):
+            if len(self) != len(other) or set(self.keys()) != set(other.keys()):
+                return False
+            return all(np.array_equal(self.column(key), other.column(key),
+                                      equal_nan=True)
+                       for key in self.keys())
+        if isinstance(other, list):
+            return len(self) == len(other) and all(row == cand for row, cand in zip(self, other))
+        return False
+    
+    def copy(self):
+        columns = {key: self.column(key).copy() for key in self.keys()}
+        return CandleArray(columns=columns, names=self.names.copy(),
+                           currency=self.currency, index=self.index)
+    
+    def to_list(self):
+        """Return a list of independent Candles.
+        """
+        return [row.copy() for row in self]
+    
+    def __repr__(self):
+        return f'CandleArray(length={len(self)}, keys={list(self.keys())})'
@@ -2,10 +2,12 @@
 It is a class that stores arbitrary data ordered by a datetime index and
 exposes easy access functions.
 """
+import bisect
 import datetime
 import numpy as np
 import matplotlib.pyplot as plt
 from .events import EventManager, EventHandler
+from .valuearray import ValueArray
 
 
 class DateSeries(object):
@@ -20,9 +22,10 @@ class DateSeries(object):
     parent : {None or DateSeries like object, None}
         A DateSeries from which this instance is derived. Certain action
         may be synchronised with this parent.
-    data : {list or None, None}
+    data : {list or ValueArray or None, None}
         A list of initial data. If None, an empty list is initialized.
-        Must be of same length as index.
+        Must be of same length as index. Numeric data can be stored in
+        a ValueArray, which uses the index as conversion dates.
     index : {list or None, None}
         A list of datetimes corresponding to the elements in data. If
         None an empty list is initialized. Must be of same length as
@@ -30,6 +33,11 @@ class DateSeries(object):
     datetime_format : {str, '%d.%m.%Y %H:%M:%S'}
         A string which is used to encode datetimes as strings and decode
         strings into datetime objects.
+    handler : {EventHandler or None, None}
+        The EventHandler used to synchronise this instance with derived
+        DateSeries. Only used if no parent is given, otherwise the
+        handler of the parent is used. If None a new EventHandler is
+        created.
     
     Properties
     ----------
@@ -48,10 +56,10 @@ class DateSeries(object):
     manager = EventManager()
     
     def __init__(self, parent=None, data=None, index=None,
-                 datetime_format='%d.%m.%Y %H:%M:%S'):
+                 datetime_format='%d.%m.%Y %H:%M:%S', handler=None):
         self.parent = parent
         if self.parent is None:
-            self.handler = EventHandler()
+            self.handler = handler if handler is not None else EventHandler()
         else:
             self.handler = parent.handler
         
@@ -67,6 +75,9 @@ class DateSeries(object):
             self.index = index
         
         assert len(self.data) == len(self.index)
+        if isinstance(self.data, ValueArray):
+            # Values are wrapped with the dateindex of their row
+            self.data.index = self.index
         
         if len(self.index) == 0:
             self.head = [-1, None]
@@ -161,7 +172,7 @@ class DateSeries(object):
             
             self.head = [0, self.index[0]]
         else:
-            idx = np.searchsorted(np.array(self.index), dateindex)
+            idx = bisect.bisect_left(self.index, dateindex)
             if idx < len(self.index):
                 if self.index[idx] == dateindex:
                     msg = 'Cannot insert when index is already occupied.'
@@ -174,6 +185,52 @@ class DateSeries(object):
             self.index.insert(idx, dateindex)
             self.data.insert(idx, value)
         
+    def extend(self, index, data):
+        """Append multiple values to the end of the DateSeries at once.
+        
+        Unlike calling `insert_value` for every value, this sends only a
+        single `insert_value` event for the first appended dateindex.
+        Listeners are expected to bring themselves up to date from that
+        dateindex on.
+        
+        Arguments
+        ---------
+        index : list of datetime
+            The datetimes of the values to append. Must be strictly
+            increasing and larger than the current maximum dateindex.
+        data : list of objects
+            The values to append. Must be of the same length as index.
+        
+        Raises
+        ------
+        ValueError:
+            Raises a ValueError if the lengths do not match or the index
+            cannot be appended.
+        """
+        index = list(index)
+        if len(index) != len(data):
+            raise ValueError('The index and data must be of the same length.')
+        if len(index) == 0:
+            return
+        if any(nxt <= prev for prev, nxt in zip(index[:-1], index[1:])):
+            raise ValueError('The index to extend by must be strictly increasing.')
+        if len(self.index) > 0 and index[0] <= self.index[-1]:
+            msg = 'Can only extend by dateindices larger than the current '
+            msg += 'maximum dateindex. Use `insert_value` instead.'
+            raise ValueError(msg)
+        self.extend_unchecked(index[0], index, data)
+    
+    @manager.send('insert_value')
+    def extend_unchecked(self, dateindex, index, data):
+        """Append values and send a single `insert_value` event for
+        `dateindex`. Use `extend` instead, which checks the inputs.
+        """
+        was_empty = len(self.index) == 0
+        self.index.extend(index)
+        self.data.extend(data)
+        if was_empty:
+            self.head = [0, self.index[0]]
+    
     @manager.send('set_head')
     def set_head(self, dateindex):
         """Set the read head to a given dateindex.
@@ -286,7 +343,7 @@ class DateSeries(object):
         if dateindex in self.index:
             self.set_head(dateindex)
         else:
-            idx = np.searchsorted(np.array(self.index), dateindex)
+            idx = bisect.bisect_left(self.index, dateindex)
             self.set_head(self.index[idx-1])
     
     def __next__(self):
@@ -667,7 +724,7 @@ class DateSeries(object):
                 if step is None:
                     step = 1
                 length = len(self.data[slice(start, stop, step)])
-                if isinstance(value, list):
+                if isinstance(value, (list, ValueArray)):
                     assert length == len(value)
                     for i, idx in enumerate(range(start, stop, step)):
                         self.data[idx] = value[i]
@@ -682,9 +739,8 @@ class DateSeries(object):
             dateindex = datetime.datetime.strptime(dateindex,
                                                    self.datetime_format)
         if isinstance(dateindex, datetime.datetime):
-            if dateindex in self.index:
-                i = self.index.index(dateindex)
-            else:
+            i = bisect.bisect_left(self.index, dateindex)
+            if i == len(self.index) or self.index[i] != dateindex:
                 raise ValueError(f'Dateindex {dateindex} not in DateSeries.')
             self.data[i] = value
             return
@@ -1,4 +1,10 @@
+import asyncio
 import functools
+import inspect
+import threading
+import time
+from collections import deque
+import numpy as np
 
 """This module provides functionality to call functions based on events.
 
@@ -41,7 +47,208 @@ class Event(object):
         self.kwargs = kwargs if kwargs is not None else {}
 
 
+class EventProfiler(object):
+    """Collect statistics on the events that pass through one or more
+    EventHandlers.
+    
+    Arguments
+    ---------
+    handlers : {None or list of EventHandler/EventMultiHandler, None}
+        The handlers to profile while the profiler is active. If None,
+        all EventHandlers are profiled.
+    
+    Attributes
+    ----------
+    tag_counts : dict
+        The number of events that were handled per event tag.
+    fan_out : dict
+        A list of the number of listeners that were called per event,
+        sorted by event tag.
+    latencies : dict
+        A list of the runtimes (in seconds) of each call per listener.
+        Listeners are identified by `ClassName.method_name`.
+    max_depth : dict
+        The maximum depth at which an event tag was handled. An event
+        that is sent from within a listener has a depth one larger than
+        the event that triggered the listener. Long listener chains show
+        up as large depths.
+    
+    Usage example:
+    with EventProfiler() as profiler:
+        backtester.start()
+    print(profiler.as_dataframe())
+    
+    Notes
+    -----
+    -When no profiler is active the cost for every handled event is a
+     single attribute lookup.
+    """
+    def __init__(self, handlers=None):
+        self.handlers = handlers
+        self._previous = []
+        self.reset()
+    
+    def reset(self):
+        """Remove all collected statistics.
+        """
+        self.tag_counts = {}
+        self.fan_out = {}
+        self.latencies = {}
+        self.max_depth = {}
+        self.depth = 0
+    
+    def start(self):
+        """Start profiling the handlers specified at initialization.
+        """
+        if self.handlers is None:
+            handlers = [EventHandler]
+        else:
+            handlers = []
+            for handler in self.handlers:
+                if isinstance(handler, EventMultiHandler):
+                    handlers.extend(handler.handlers)
+                else:
+                    handlers.append(handler)
+        self._previous = []
+        for handler in handlers:
+            self._previous.append((handler, vars(handler).get('profiler')))
+            handler.profiler = self
+    
+    def stop(self):
+        """Stop profiling and restore the previous state of the
+        handlers.
+        """
+        for handler, previous in reversed(self._previous):
+            if previous is None and not isinstance(handler, type):
+                del handler.profiler
+            else:
+                handler.profiler = previous
+        self._previous = []
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+    
+    @staticmethod
+    def listener_name(func):
+        """Return a readable name for a listener.
+        """
+        owner = getattr(func, '__self__', None)
+        name = getattr(func, '__name__', repr(func))
+        if owner is None:
+            return getattr(func, '__qualname__', name)
+        return f'{owner.__class__.__name__}.{name}'
+    
+    def dispatch(self, funcs, event):
+        """Call all listeners for an event and record their statistics.
+        
+        Arguments
+        ---------
+        funcs : list of callable
+            The listeners to call.
+        event : Event
+            The event that is passed to the listeners.
+        """
+        self.enter(funcs, event)
+        try:
+            for func in funcs:
+                t_start = time.perf_counter()
+                try:
+                    func(event)
+                finally:
+                    self.record(func, time.perf_counter() - t_start)
+        finally:
+            self.exit(event)
+    
+    def enter(self, funcs, event):
+        """Record that the listeners of an event are about to be called.
+        Handlers that call the listeners themselves (e.g. the
+        AsyncEventHandler) call this instead of `dispatch` and `exit`
+        when they are done.
+        """
+        tag = event.tag
+        self.tag_counts[tag] = self.tag_counts.get(tag, 0) + 1
+        self.fan_out.setdefault(tag, []).append(len(funcs))
+        self.depth += 1
+        if self.depth > self.max_depth.get(tag, 0):
+            self.max_depth[tag] = self.depth
+    
+    def exit(self, event):
+        """Record that all listeners of an event were called.
+        """
+        self.depth -= 1
+    
+    def record(self, func, duration):
+        """Record the runtime of one call of a listener in seconds.
+        """
+        name = self.listener_name(func)
+        self.latencies.setdefault(name, []).append(duration)
+    
+    def as_dict(self):
+        """Summarize the collected statistics.
+        
+        Returns
+        -------
+        dict:
+            A dictionary with the keys `tags` and `listeners`. The value
+            of `tags` is a dictionary of the form
+            {tag: {'count', 'mean_fan_out', 'max_fan_out', 'max_depth'}}.
+            The value of `listeners` is a dictionary of the form
+            {listener: {'calls', 'total', 'mean', 'p99'}}, where all
+            times are given in seconds. The `total` is inclusive, i.e.
+            it contains the time spent in listeners that were triggered
+            by events sent from within the listener.
+        """
+        tags = {}
+        for tag, count in self.tag_counts.items():
+            fan_out = self.fan_out[tag]
+            tags[tag] = {'count': count,
+                         'mean_fan_out': float(np.mean(fan_out)),
+                         'max_fan_out': int(max(fan_out)),
+                         'max_depth': self.max_depth[tag]}
+        listeners = {}
+        for name, latencies in self.latencies.items():
+            total = float(sum(latencies))
+            listeners[name] = {'calls': len(latencies),
+                               'total': total,
+                               'mean': total / len(latencies),
+                               'p99': float(np.percentile(latencies, 99))}
+        return {'tags': tags, 'listeners': listeners}
+    
+    def as_dataframe(self, kind='listeners'):
+        """Return the summary given by `as_dict` as a pandas DataFrame.
+        
+        Arguments
+        ---------
+        kind : {'listeners' or 'tags', 'listeners'}
+            Which part of the summary to return. Listeners are sorted by
+            their total runtime, tags by their count.
+        
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        import pandas
+        summary = self.as_dict()
+        if kind == 'listeners':
+            sort_key = 'total'
+        elif kind == 'tags':
+            sort_key = 'count'
+        else:
+            raise ValueError(f'Unknown kind {kind}.')
+        df = pandas.DataFrame.from_dict(summary[kind], orient='index')
+        if len(df) > 0:
+            df = df.sort_values(sort_key, ascending=False)
+        return df
+
+
 class EventHandler(object):
+    profiler = None
+    
     def __init__(self):
         self.events = 0
         self.subscriptions = {}
@@ -50,6 +257,9 @@ class EventHandler(object):
         event_tag = event.tag
         if event_tag not in self.subscriptions:
             return
+        if self.profiler is not None:
+            self.profiler.dispatch(self.subscriptions[event_tag], event)
+            return
         for func in self.subscriptions[event_tag]:
             func(event)
     
@@ -85,9 +295,280 @@ class EventHandler(object):
             return False
         if func not in self.subscriptions[event_tag]:
             return False
+        self.subscriptions[event_tag].remove(func)
         return True
 
 
+class AsyncEventHandler(EventHandler):
+    """An EventHandler that dispatches events from an asyncio task.
+    
+    Events are put into a bounded queue when they are sent and are
+    handled by a worker task in the order they were sent. Listeners may
+    be plain functions or coroutine functions. Listeners that are
+    registered with `in_executor=True` are run in an executor, such
+    that CPU-heavy computations do not block the event loop.
+    
+    Arguments
+    ---------
+    maxsize : {int, 1000}
+        The maximum number of events that are queued. See the notes on
+        how a full queue is handled.
+    executor : {concurrent.futures.Executor or None, None}
+        The executor to run listeners registered with `in_executor=True`
+        in. If None the default executor of the event loop is used.
+    
+    Usage example:
+    async def main():
+        handler = AsyncEventHandler(maxsize=100)
+        feed = CandleFeed(name='AAPL', handler=handler)
+        sma = SMA(feed.close, window_size=20)
+        async with handler:
+            await update_yahoo_feeds_async([feed])
+    
+    Notes
+    -----
+    -Before `start` is called (or outside of the `async with` block)
+     events are handled synchronously like in the EventHandler.
+     Coroutine listeners are then scheduled on the running event loop
+     or run to completion if no loop is running.
+    -When the queue is full, producers in other threads block until
+     space is available. Producers running in the event loop thread
+     cannot block. Their events are kept in an overflow buffer in the
+     order they were sent and are moved to the queue before any other
+     event as soon as there is space, such that events are still
+     handled in order. Producers in the event loop should therefore
+     await `wait_for_capacity` between sends (or use `put`), which
+     bounds the buffer.
+    -Listeners registered with `in_executor=True` must not send events
+     on the same handler while the worker is running. The worker waits
+     for the listener, so the listener could never queue its event.
+     Such sends raise a RuntimeError.
+    -Outside of the worker, failures of coroutine and executor
+     listeners are reported to the exception handler of the event
+     loop, like failures in the worker.
+    -Listeners see the state of the DateSeries at the time the event is
+     handled, not at the time it was sent.
+    -An active EventProfiler records the runtime of coroutine listeners
+     until they finish and of executor listeners in the executor. Time
+     waiting for a free worker of the executor is included.
+    """
+    def __init__(self, maxsize=1000, executor=None):
+        super().__init__()
+        self.maxsize = maxsize
+        self.executor = executor
+        self.offloaded = set()
+        self.loop = None
+        self.queue = None
+        self.worker = None
+        self.overflow = deque()
+        self.pending = set()
+        self._local = threading.local()
+    
+    @property
+    def running(self):
+        return self.worker is not None and not self.worker.done()
+    
+    def listen(self, event_tag, func, in_executor=False):
+        super().listen(event_tag, func)
+        if in_executor:
+            self.offloaded.add(func)
+    
+    def stop_listen(self, event_tag, func):
+        ret = super().stop_listen(event_tag, func)
+        self.offloaded.discard(func)
+        return ret
+    
+    def start(self):
+        """Start the worker task. Must be called from within a running
+        event loop.
+        """
+        if self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.overflow.clear()
+        self.worker = self.loop.create_task(self.run())
+    
+    async def join(self):
+        """Wait until all queued events have been handled.
+        """
+        if self.queue is not None:
+            await self.queue.join()
+    
+    async def stop(self):
+        """Handle all remaining events and stop the worker task.
+        """
+        if not self.running:
+            return
+        await self.join()
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        self.worker = None
+        self.queue = None
+    
+    async def __aenter__(self):
+        self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+        return False
+    
+    async def put(self, event):
+        """Queue an event. Waits for space in the queue if it is full.
+        """
+        await self.queue.put(event)
+    
+    async def wait_for_capacity(self):
+        """Wait until the queue is no longer full. Meant to be awaited
+        by producers in the event loop between sending events.
+        """
+        if self.queue is not None and (self.queue.full() or len(self.overflow) > 0):
+            await self.queue.join()
+    
+    def handle_event(self, event):
+        if event.tag not in self.subscriptions:
+            return
+        if not self.running:
+            self.handle_event_now(event)
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if not in_loop:
+            if getattr(self._local, 'in_listener', False):
+                msg = f'A listener run in the executor sent the event {event.tag} '
+                msg += 'on the handler that is waiting for it.'
+                raise RuntimeError(msg)
+            future = asyncio.run_coroutine_threadsafe(self.put(event),
+                                                      self.loop)
+            future.result()
+            return
+        if len(self.overflow) > 0 or self.queue.full():
+            self.overflow.append(event)
+            return
+        self.queue.put_nowait(event)
+    
+    def _refill(self):
+        """Move events from the overflow buffer to the queue.
+        """
+        while len(self.overflow) > 0 and not self.queue.full():
+            self.queue.put_nowait(self.overflow.popleft())
+    
+    def _call_offloaded(self, func, event, profiler=None):
+        self._local.in_listener = True
+        t_start = time.perf_counter()
+        try:
+            return func(event)
+        finally:
+            self._local.in_listener = False
+            if profiler is not None:
+                profiler.record(func, time.perf_counter() - t_start)
+    
+    def _track(self, loop, future, event, func=None, profiler=None):
+        """Keep a reference to a scheduled listener and report its
+        failure to the exception handler of the loop. If a profiler is
+        given, the time until the listener finishes is recorded for
+        `func`.
+        """
+        self.pending.add(future)
+        t_start = time.perf_counter()
+        
+        def done(future):
+            self.pending.discard(future)
+            if profiler is not None:
+                profiler.record(func, time.perf_counter() - t_start)
+            if future.cancelled() or future.exception() is None:
+                return
+            loop.call_exception_handler({
+                'message': f'Listener for event {event.tag} failed.',
+                'exception': future.exception(),
+                'future': future})
+        
+        future.add_done_callback(done)
+    
+    def handle_event_now(self, event):
+        """Handle an event synchronously, without using the queue.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        funcs = list(self.subscriptions[event.tag])
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enter(funcs, event)
+        try:
+            for func in funcs:
+                if func in self.offloaded and loop is not None:
+                    future = loop.run_in_executor(self.executor,
+                                                  self._call_offloaded,
+                                                  func, event, profiler)
+                    self._track(loop, future, event)
+                    continue
+                t_start = time.perf_counter()
+                ret = func(event)
+                if inspect.isawaitable(ret) and loop is not None:
+                    self._track(loop, asyncio.ensure_future(ret), event,
+                                func=func, profiler=profiler)
+                    continue
+                if inspect.isawaitable(ret):
+                    asyncio.run(ret)
+                if profiler is not None:
+                    profiler.record(func, time.perf_counter() - t_start)
+        finally:
+            if profiler is not None:
+                profiler.exit(event)
+    
+    async def dispatch(self, event):
+        """Call all listeners of an event. Coroutine listeners are
+        awaited, listeners registered with `in_executor=True` are run in
+        the executor.
+        """
+        funcs = list(self.subscriptions.get(event.tag, []))
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enter(funcs, event)
+        try:
+            for func in funcs:
+                t_start = time.perf_counter()
+                try:
+                    if func in self.offloaded:
+                        ret = await self.loop.run_in_executor(self.executor,
+                                                              self._call_offloaded,
+                                                              func, event)
+                    else:
+                        ret = func(event)
+                    if inspect.isawaitable(ret):
+                        await ret
+                finally:
+                    if profiler is not None:
+                        profiler.record(func, time.perf_counter() - t_start)
+        finally:
+            if profiler is not None:
+                profiler.exit(event)
+    
+    async def run(self):
+        """The worker loop. Handles queued events one at a time.
+        """
+        while True:
+            event = await self.queue.get()
+            self._refill()
+            try:
+                await self.dispatch(event)
+            except Exception as exc:
+                self.loop.call_exception_handler({
+                    'message': f'Listener for event {event.tag} failed.',
+                    'exception': exc,
+                    'task': self.worker})
+            finally:
+                self.queue.task_done()
+
+
 class EventMultiHandler():
     def __init__(self, handlers=None):
         if handlers is None:
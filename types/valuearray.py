@@ -0,0 +1,247 @@
+import numpy as np
+
+
+class ValueArray(object):
+    """A list-like container of numbers that stores all values in one
+    contiguous float64 array, like a single column of a CandleArray.
+    
+    The values are wrapped on access only. Indexing with an integer
+    returns the stored float as PyTrest.currency.Money in the currency
+    of the array, with the timestamp of the row as conversion date, or
+    as float if the array has no currency. Slicing returns a new
+    ValueArray. The floats can be accessed without copying through
+    `values`.
+    
+    Arguments
+    ---------
+    values : {1D array-like or None, None}
+        The initial values as floats. Missing values are NaN.
+    currency : {str or None, None}
+        The currency of all values. If None the values are floats.
+    index : {list of datetime or None, None}
+        The timestamps of the rows, which are used as conversion dates.
+        A DateSeries sets this to its own index.
+    nan_as_none : {bool, True}
+        Return None for NaN values. Otherwise NaN is wrapped like any
+        other value.
+    copy : {bool, True}
+        Copy the given values. If False, values that already are a
+        float64 array are used as they are, e.g. to keep memory-mapped
+        values on disk until they are accessed. Read-only arrays are
+        copied before the first write.
+    
+    Notes
+    -----
+    -Values that are stored are converted with `float`. Money in a
+     different currency is converted to the currency of the array.
+    -The array grows geometrically, such that appending a value has
+     amortized constant cost.
+    """
+    def __init__(self, values=None, currency=None, index=None,
+                 nan_as_none=True, copy=True):
+        if values is None:
+            values = np.empty(0)
+        if copy:
+            self._values = np.array(values, dtype=np.float64)
+        else:
+            self._values = np.asarray(values, dtype=np.float64)
+        if self._values.ndim != 1:
+            raise ValueError('The values of a ValueArray must be one dimensional.')
+        self._length = len(self._values)
+        self.currency = currency
+        self.index = index
+        self.nan_as_none = nan_as_none
+    
+    @classmethod
+    def from_values(cls, values, currency=None, index=None,
+                    nan_as_none=True):
+        """Create a ValueArray from an iterable of numbers, Money or
+        None.
+        """
+        ret = cls(currency=currency, index=index, nan_as_none=nan_as_none)
+        ret.extend(values)
+        return ret
+    
+    def __len__(self):
+        return self._length
+    
+    @property
+    def capacity(self):
+        return len(self._values)
+    
+    @property
+    def nbytes(self):
+        return self._values.nbytes
+    
+    def values(self):
+        """Return the stored floats. The returned array is a view on the
+        stored data; no copy is made.
+        
+        Returns
+        -------
+        numpy.ndarray
+        """
+        return self._values[:self._length]
+    
+    def timestamp(self, position):
+        """Return the timestamp of a row or None if it is unknown.
+        """
+        if self.index is None or position >= len(self.index):
+            return None
+        return self.index[position]
+    
+    def reserve(self, capacity):
+        """Make sure the array can hold at least `capacity` values
+        without reallocating.
+        """
+        if capacity <= self.capacity:
+            return
+        new = np.full(capacity, np.nan)
+        new[:self._length] = self._values[:self._length]
+        self._values = new
+    
+    def _writable(self):
+        if not self._values.flags.writeable:
+            self._values = self._values.copy()
+    
+    def value_of(self, value):
+        """Convert a value to the float that is stored.
+        """
+        if value is None:
+            return np.nan
+        currency = getattr(value, 'currency', None)
+        if currency is not None and self.currency is not None and currency != self.currency:
+            value = value.convert(self.currency, date=value.conversion_date)
+        return float(value)
+    
+    def wrap(self, position, amount):
+        """Return a stored float as it is returned on access.
+        """
+        if self.nan_as_none and amount != amount:
+            return None
+        if self.currency is None:
+            return amount
+        from ..currency import Money
+        return Money(amount, currency=self.currency,
+                     conversion_date=self.timestamp(position))
+    
+    def insert(self, position, value):
+        """Insert a value in front of the given position, like
+        list.insert.
+        """
+        length = self._length
+        if position < 0:
+            position = max(0, length + position)
+        position = min(position, length)
+        value = self.value_of(value)
+        if length + 1 > self.capacity:
+            self.reserve(max(16, 2 * self.capacity))
+        self._writable()
+        values = self._values
+        if position < length:
+            values[position+1:length+1] = values[position:length]
+        values[position] = value
+        self._length += 1
+    
+    def append(self, value):
+        self.insert(self._length, value)
+    
+    def extend(self, values):
+        """Append multiple values.
+        
+        Arguments
+        ---------
+        values : ValueArray or numpy.ndarray or iterable
+            Arrays are appended as floats. The items of other iterables
+            are converted with `value_of`.
+        """
+        if isinstance(values, ValueArray) and (values.currency == self.currency or values.currency is None):
+            values = values.values()
+        elif isinstance(values, np.ndarray):
+            values = np.asarray(values, dtype=np.float64)
+        else:
+            values = np.array([self.value_of(value) for value in values],
+                              dtype=np.float64)
+        num = len(values)
+        if num == 0:
+            return
+        length = self._length
+        if length + num > self.capacity:
+            self.reserve(max(length + num, 2 * self.capacity))
+        self._writable()
+        self._values[length:length+num] = values
+        self._length += num
+    
+    def pop(self, position=-1):
+        """Remove a value and return it.
+        """
+        if position < 0:
+            position += self._length
+        if position < 0 or position >= self._length:
+            raise IndexError('pop index out of range')
+        ret = self[position]
+        self._writable()
+        values = self._values
+        values[position:self._length-1] = values[position+1:self._length]
+        values[self._length-1] = np.nan
+        self._length -= 1
+        return ret
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            index = None if self.index is None else self.index[key]
+            return ValueArray(self.values()[key], currency=self.currency,
+                              index=index, nan_as_none=self.nan_as_none)
+        if key < 0:
+            key += self._length
+        if key < 0 or key >= self._length:
+            raise IndexError('ValueArray index out of range')
+        return self.wrap(key, float(self._values[key]))
+    
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            positions = range(*key.indices(self._length))
+            values = list(value)
+            if len(values) != len(positions):
+                raise ValueError('Length of the slice and the value do not match.')
+            for pos, val in zip(positions, values):
+                self[pos] = val
+            return
+        if key < 0:
+            key += self._length
+        if key < 0 or key >= self._length:
+            raise IndexError('ValueArray index out of range')
+        value = self.value_of(value)
+        self._writable()
+        self._values[key] = value
+    
+    def __iter__(self):
+        for i, amount in enumerate(self.values().tolist()):
+            yield self.wrap(i, amount)
+    
+    def __array__(self, dtype=None, copy=None):
+        ret = self.values()
+        if dtype is not None:
+            ret = ret.astype(dtype)
+        return ret.copy() if copy else ret
+    
+    def __eq__(self, other):
+        if isinstance(other, ValueArray):
+            return (self.currency == other.currency
+                    and np.array_equal(self.values(), other.values(),
+                                       equal_nan=True))
+        if isinstance(other, list):
+            return len(self) == len(other) and all(own == val for own, val in zip(self, other))
+        return False
+    
+    def copy(self):
+        return ValueArray(self.values(), currency=self.currency,
+                          index=self.index, nan_as_none=self.nan_as_none)
+    
+    def to_list(self):
+        """Return a list of the wrapped values.
+        """
+        return list(self)
+    
+    def __repr__(self):
+        return f'ValueArray(length={len(self)}, currency={self.currency})'
@@ -1,4 +1,6 @@
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+import numpy as np
 from ..types import DateSeries
 
 
@@ -333,3 +335,153 @@ def plot(args, show=False, store=False, default_orientation='v',
         fig.show()
     
     return fig, axs
+
+
+def ohlc_buckets(x, open, high, low, close, buckets):
+    """Combine consecutive candles into at most `buckets` candles.
+    
+    Every bucket holds the same number of consecutive candles (up to
+    one). Its open is the first open, its close the last close and its
+    high and low are the extreme values within the bucket. NaN values
+    are ignored.
+    
+    Arguments
+    ---------
+    x : numpy.ndarray
+        The positions of the candles.
+    open, high, low, close : numpy.ndarray
+        The values of the candles.
+    buckets : int
+        The maximum number of candles to return.
+    
+    Returns
+    -------
+    tuple of numpy.ndarray:
+        The x-positions (of the first candle of every bucket), open,
+        high, low and close of the buckets.
+    """
+    num = len(x)
+    if num <= buckets:
+        return x, open, high, low, close
+    starts = np.unique(np.linspace(0, num, buckets, endpoint=False).astype(np.int64))
+    ends = np.append(starts[1:], num) - 1
+    return (x[starts],
+            open[starts],
+            np.fmax.reduceat(high, starts),
+            np.fmin.reduceat(low, starts),
+            close[ends])
+
+
+class CandleRenderer(object):
+    """Draw candles on an axes as one LineCollection for the wicks and
+    one PolyCollection for the bodies.
+    
+    Only the candles within the visible x-range are drawn. If there are
+    more of them than `pixels_per_candle` allows for the width of the
+    axes, they are combined per bucket (see ohlc_buckets). The candles
+    are redrawn whenever the x-limits of the axes change, such that the
+    cost of drawing depends on the resolution and not on the number of
+    candles.
+    
+    Arguments
+    ---------
+    ax : matplotlib.axes.Axes
+        The axes to draw on.
+    x : numpy.ndarray
+        The increasing positions of the candles in matplotlib date units,
+        i.e. days since the epoch of matplotlib in UTC.
+    open, high, low, close : numpy.ndarray
+        The values of the candles.
+    up_color : {str, 'green'}
+        The color of candles that close above their open.
+    down_color : {str, 'red'}
+        The color of all other candles.
+    pixels_per_candle : {float, 3.}
+        The minimum width of a drawn candle in pixels.
+    max_candles : {int or None, None}
+        The maximum number of drawn candles. If None it is derived from
+        the width of the axes.
+    tz : {datetime.tzinfo or str or None, None}
+        The timezone the dates of the x-axis are shown in. If None the
+        timezone of the matplotlib rcParams is used.
+    **kwargs :
+        Passed to both collections, e.g. `alpha` or `zorder`.
+    """
+    def __init__(self, ax, x, open, high, low, close, up_color='green',
+                 down_color='red', pixels_per_candle=3., max_candles=None,
+                 tz=None, **kwargs):
+        self.ax = ax
+        self.x = np.asarray(x, dtype=np.float64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.up_color = up_color
+        self.down_color = down_color
+        self.pixels_per_candle = pixels_per_candle
+        self.max_candles = max_candles
+        self.wicks = LineCollection([], linewidths=1., **kwargs)
+        self.bodies = PolyCollection([], linewidths=0., **kwargs)
+        ax.add_collection(self.wicks)
+        ax.add_collection(self.bodies)
+        self._range = None
+        self.update(full=True)
+        if len(self.x) > 0:
+            ax.update_datalim(np.column_stack([self.x[[0, -1]],
+                                               [np.nanmin(self.low), np.nanmax(self.high)]]))
+            ax.autoscale_view()
+        ax.xaxis_date(tz=tz)
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+    
+    def buckets(self):
+        """The maximum number of candles to draw.
+        """
+        if self.max_candles is not None:
+            return self.max_candles
+        width = self.ax.get_window_extent().width
+        return max(1, int(width / self.pixels_per_candle))
+    
+    def update(self, full=False):
+        """Redraw the candles within the x-limits of the axes.
+        
+        Arguments
+        ---------
+        full : {bool, False}
+            Draw all candles instead of the visible ones.
+        """
+        if full:
+            lo, hi = 0, len(self.x)
+        else:
+            xmin, xmax = sorted(self.ax.get_xlim())
+            lo = max(0, np.searchsorted(self.x, xmin) - 1)
+            hi = min(len(self.x), np.searchsorted(self.x, xmax, side='right') + 1)
+        buckets = self.buckets()
+        if self._range == (lo, hi, buckets):
+            return
+        self._range = (lo, hi, buckets)
+        x, open, high, low, close = ohlc_buckets(self.x[lo:hi],
+                                                 self.open[lo:hi],
+                                                 self.high[lo:hi],
+                                                 self.low[lo:hi],
+                                                 self.close[lo:hi],
+                                                 buckets)
+        num = len(x)
+        step = np.median(np.diff(x)) if num > 1 else 0.5
+        width = 0.8 * step
+        center = x + step / 2 if hi - lo > num else x
+        colors = np.where(open < close, self.up_color, self.down_color)
+        segments = np.empty((num, 2, 2))
+        segments[:, 0, 0] = segments[:, 1, 0] = center
+        segments[:, 0, 1] = low
+        segments[:, 1, 1] = high
+        left = center - width / 2
+        right = center + width / 2
+        verts = np.empty((num, 4, 2))
+        verts[:, 0, 0] = verts[:, 1, 0] = left
+        verts[:, 2, 0] = verts[:, 3, 0] = right
+        verts[:, 0, 1] = verts[:, 3, 1] = open
+        verts[:, 1, 1] = verts[:, 2, 1] = close
+        self.wicks.set_segments(segments)
+        self.wicks.set_color(colors)
+        self.bodies.set_verts(verts)
+        self.bodies.set_facecolor(colors)
@@ -1,30 +1,143 @@
-from ..feed import YahooFeed, CandleFeed
-from ..types.events import Event
+from ..feed import YahooFeed, CandleFeed, get_fetcher
+from ..types.events import Event, AsyncEventHandler
+import asyncio
 import datetime
+import functools
 
-def update_yahoo_feed(feed, dateindex=None):
-    if dateindex is None:
-        dateindex = datetime.datetime.now()
+def download_update(feed, dateindex=None, fetcher=None):
+    """Download the candles of the last week of a feed up to a datetime.
+    The feed itself is not changed, such that this can run on any thread.
     
-    start = feed.max_dateindex - datetime.timedelta(days=7)
-    end = dateindex
-    down_data = YahooFeed(feed.name, start=start, end=end)
+    Arguments
+    ---------
+    feed : CandleFeed
+        The feed to update. Its name has to be the ticker symbol.
+    dateindex : {datetime or None, None}
+        The datetime up to which to download. If None the download runs
+        up to now. The end is then left out of the request, such that it
+        does not contain the current time and is found again by the
+        ResponseCache.
+    fetcher : {Fetcher or None, None}
+        The Fetcher to download with. Defaults to the shared Fetcher.
     
+    Returns
+    -------
+    YahooFeed
+    """
+    start = feed.max_dateindex - datetime.timedelta(days=7)
+    return YahooFeed(feed.name, start=start, end=dateindex, fetcher=fetcher)
+
+
+def apply_update(feed, down_data):
+    """Add the candles of a download that are not yet part of a feed.
+    The listeners of the feed run on the calling thread.
+    """
     for date, candle in zip(down_data.index, down_data.data):
         if date in feed:
             continue
         else:
             feed.add_candle(date, candle)
+
+
+def update_yahoo_feed(feed, dateindex=None, fetcher=None):
+    apply_update(feed, download_update(feed, dateindex=dateindex,
+                                       fetcher=fetcher))
     return
 
 
-def update_feed(feed, dateindex=None):
-    if dateindex is None:
-        dateindex = datetime.datetime.now()
+def update_yahoo_feeds(feeds, dateindex=None, fetcher=None,
+                       return_exceptions=False):
+    """Update multiple feeds with data from Yahoo Finance concurrently.
     
-    start = feed.max_dateindex - datetime.timedelta(days=7)
-    end = dateindex
-    down_data = YahooFeed(feed.name, start=start, end=end)
+    The downloads run on the thread pool of the fetcher. The new candles
+    are added on the calling thread, such that the listeners of the
+    feeds run on it as well.
+    
+    Arguments
+    ---------
+    feeds : list of CandleFeed
+        The feeds to update. The names of the feeds have to be the
+        ticker symbols.
+    dateindex : {datetime or None, None}
+        The datetime up to which to update. If None the feeds are updated
+        up to now.
+    fetcher : {Fetcher or None, None}
+        The Fetcher to download with. Its thread pool bounds the number
+        of concurrent downloads. Defaults to the shared Fetcher.
+    return_exceptions : {bool, False}
+        If True, the exceptions of failed updates are returned instead
+        of being raised.
+    
+    Returns
+    -------
+    list:
+        None for every successful update or the exception of a failed
+        update if return_exceptions is set.
+    """
+    if fetcher is None:
+        fetcher = get_fetcher()
+    
+    def download(feed):
+        return download_update(feed, dateindex=dateindex, fetcher=fetcher)
+    
+    feeds = list(feeds)
+    downloads = fetcher.map(download, feeds,
+                            return_exceptions=return_exceptions)
+    ret = []
+    for feed, down_data in zip(feeds, downloads):
+        if isinstance(down_data, Exception):
+            ret.append(down_data)
+            continue
+        try:
+            apply_update(feed, down_data)
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            ret.append(exc)
+        else:
+            ret.append(None)
+    return ret
+
+
+async def update_yahoo_feeds_async(feeds, dateindex=None, executor=None):
+    """Update multiple feeds with data from Yahoo Finance concurrently.
+    
+    The downloads are run in an executor, such that the network I/O of
+    all feeds overlaps. The new candles are added from within the event
+    loop. If a feed uses an AsyncEventHandler, the listeners of the feed
+    are run by the worker task of the handler and adding candles waits
+    whenever the event queue of the handler is full.
+    
+    Arguments
+    ---------
+    feeds : list of CandleFeed
+        The feeds to update. The names of the feeds have to be the
+        ticker symbols.
+    dateindex : {datetime or None, None}
+        The datetime up to which to update. If None the feeds are updated
+        up to now.
+    executor : {concurrent.futures.Executor or None, None}
+        The executor to run the downloads in. If None the default
+        executor of the event loop is used.
+    """
+    loop = asyncio.get_running_loop()
+    
+    async def update(feed):
+        download = functools.partial(download_update, feed,
+                                     dateindex=dateindex)
+        down_data = await loop.run_in_executor(executor, download)
+        for date, candle in zip(down_data.index, down_data.data):
+            if date in feed:
+                continue
+            feed.add_candle(date, candle)
+            if isinstance(feed.handler, AsyncEventHandler):
+                await feed.handler.wait_for_capacity()
+    
+    await asyncio.gather(*[update(feed) for feed in feeds])
+
+
+def update_feed(feed, dateindex=None):
+    down_data = download_update(feed, dateindex=dateindex)
     
     added = 0
     for date, candle in zip(down_data.index, down_data.data):
@@ -1,5 +1,6 @@
-from .update import update_yahoo_feed
-from ..feed import CandleFeed, YahooFeed
+from .update import download_update, apply_update, update_yahoo_feeds
+from ..feed.fetch import get_fetcher
+from ..feed import CandleFeed, YahooFeed, FeedStore, FeedCatalog
 import os
 import pandas as pd
 import datetime
@@ -24,8 +25,7 @@ class WatchList(object):
         self.feeds = []
         self.storage = storage
         if tickers is not None:
-            for ticker in tickers:
-                self.add_ticker(ticker)
+            self.add_tickers(tickers)
         #self.tickers = tickers if tickers is not None else []
         #self.feeds = [YahooFeed(ticker) for ticker in self.tickers]
     
@@ -40,35 +40,77 @@ class WatchList(object):
         else:
             return False
     
+    @staticmethod
+    def feed_path(path, ticker):
+        """Return the path of the stored feed of a ticker or None if
+        there is none.
+        
+        Feeds are stored as FeedStore directories `<ticker>.feed`.
+        Watchlists saved by older versions stored `<ticker>.hdf` files,
+        which are still found.
+        """
+        store_path = os.path.join(path, ticker + '.feed')
+        if FeedStore.is_store(store_path):
+            return store_path
+        hdf_path = os.path.join(path, ticker + '.hdf')
+        if os.path.isfile(hdf_path):
+            return hdf_path
+        return None
+    
+    @staticmethod
+    def now(feed):
+        """Return the current datetime in the timezone of the index of a
+        feed, e.g. the timezone of the exchange for YahooFeeds.
+        """
+        if len(feed) == 0:
+            return datetime.datetime.now()
+        return datetime.datetime.now(feed.max_dateindex.tzinfo)
+    
     def add_ticker(self, ticker):
-        if ticker in self:
+        self.add_tickers([ticker])
+    
+    def add_tickers(self, tickers):
+        """Add multiple tickers. Tickers with stored data are updated and
+        tickers without are downloaded. All downloads run concurrently
+        on the shared Fetcher. The stored feeds are updated on the
+        calling thread.
+        """
+        stored = []
+        new = []
+        for ticker in tickers:
+            if ticker in self or ticker in stored or ticker in new:
+                continue
+            if self.feed_path(self.storage, ticker) is not None:
+                stored.append(ticker)
+            else:
+                new.append(ticker)
+        if len(stored) + len(new) == 0:
             return
-        file_path = os.path.join(self.storage, ticker + '.hdf')
-        if os.path.isfile(file_path):
+        fetcher = get_fetcher()
+        feeds = [CandleFeed.from_save(self.feed_path(self.storage, ticker))
+                 for ticker in stored]
+        
+        def download(item):
+            if isinstance(item, CandleFeed):
+                return download_update(item, fetcher=fetcher)
+            return YahooFeed(item, fetcher=fetcher)
+        downloads = fetcher.map(download, feeds + new)
+        for feed, down_data in zip(feeds, downloads):
+            apply_update(feed, down_data)
+        feeds.extend(downloads[len(feeds):])
+        for ticker, feed in zip(stored + new, feeds):
+            feed.set_head_or_prior(self.now(feed))
             self.tickers.append(ticker)
-            feed = CandleFeed.from_save(file_path)
-            update_yahoo_feed(feed)
-            feed.set_head_or_prior(datetime.datetime.now())
             self.feeds.append(feed)
-            
-            return
-        feed = YahooFeed(ticker)
-        feed.set_head_or_prior(datetime.datetime.now())
-        self.tickers.append(ticker)
-        self.feeds.append(feed)
-        self.update()
     
     def update(self, dateindex=None):
-        """Update the data in the stored feeds.
+        """Update the data in the stored feeds. The feeds are downloaded
+        concurrently.
         """
-        if dateindex is None:
-            dateindex = datetime.datetime.now()
+        update_yahoo_feeds(self.feeds, dateindex=dateindex,
+                           return_exceptions=True)
         for feed in self.feeds:
-            try:
-                update_yahoo_feed(feed, dateindex=dateindex)
-            except:
-                pass
-            feed.set_head_or_prior(dateindex)
+            feed.set_head_or_prior(self.now(feed) if dateindex is None else dateindex)
     
     @classmethod
     def from_storage(cls, path, name=None, update=True):
@@ -94,11 +136,19 @@ class WatchList(object):
         with open(os.path.join(path, name), 'r') as fp:
             tickers = [line[:-1] for line in fp.readlines()]
         
-        feeds = []
-        for ticker in tickers:
-            load_path = os.path.join(path, ticker + '.hdf')
-            feed = CandleFeed.from_save(load_path)
-            feeds.append(feed)
+        catalog = None
+        if FeedCatalog.is_catalog(path):
+            catalog = FeedCatalog(path)
+        if catalog is not None and all(ticker in catalog for ticker in tickers):
+            feeds = catalog.feeds(tickers)
+        else:
+            feeds = []
+            for ticker in tickers:
+                load_path = cls.feed_path(path, ticker)
+                if load_path is None:
+                    raise IOError(f'No stored feed found for {ticker} at {path}.')
+                feed = CandleFeed.from_save(load_path)
+                feeds.append(feed)
         
         ret = WatchList(name=watchlist_name, storage=path)
         ret.tickers = tickers
@@ -202,9 +252,9 @@ class WatchList(object):
             for ticker in self.tickers:
                 fp.write(ticker)
                 fp.write('\n')
+        catalog = FeedCatalog(self.storage)
         for ticker, feed in zip(self.tickers, self.feeds):
-            path = os.path.join(self.storage, ticker + '.hdf')
-            feed.save(path)
+            catalog.add(feed, ticker=ticker)
     
     def to_ticker(self, feed):
         if isinstance(feed, str):